@@ -7,7 +7,7 @@
 # 从子模块中提升常用的类/常量到 app 命名空间，方便外部导入
 from .app_orchestrator import AppOrchestrator
 from .constants import AppConstants, SCRIPT_VERSION
-from .logger_setup import FileLogger, LogLevel, LoggerInterface
+from .logger_setup import FileLogger, LogLevel, LoggerInterface, LogMessage
 from .exceptions import ConfigError, LocationError, ServiceAccessError, UpdateRequiredError
 
 # __all__ 定义了当执行 `from app import *` 时会导入哪些名字。
@@ -19,6 +19,7 @@ __all__ = [
     "FileLogger",
     "LogLevel",
     "LoggerInterface",
+    "LogMessage",
     "ConfigError",
     "LocationError",
     "ServiceAccessError",
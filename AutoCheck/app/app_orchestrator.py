@@ -7,7 +7,7 @@ import traceback
 from typing import Dict, Any, Optional
 
 from app.constants import AppConstants, SCRIPT_VERSION
-from app.logger_setup import LoggerInterface, FileLogger, LogLevel
+from app.logger_setup import LoggerInterface, FileLogger, LogLevel, parse_log_level
 from app.exceptions import ServiceAccessError, UpdateRequiredError, ConfigError
 
 from app.config.storage import JsonConfigStorage
@@ -16,12 +16,17 @@ from app.config.remote_manager import RemoteConfigManager
 from app.config.models import NotificationSettings, ConfigModel # NotificationSettings for type hint, ConfigModel for ensuring app_config structure
 
 from app.utils.app_utils import write_version_file, launch_updater_and_exit, get_app_dir
+from app.utils.http_utils import create_pooled_session
+from app.utils.wait_utils import ApplicationRunEvent
 from app.utils.display_utils import tampilkan_info_aplikasi_dasar, tampilkan_免责声明_并获取用户同意
+from app.utils.console_utils import ConsoleCapabilities, get_console_capabilities, set_console_capabilities
+from app.utils.console_renderer import ConsoleRenderer, create_console_renderer
 
 from app.services.device_manager import DeviceManager
 from app.services.location_engine import LocationEngine
 from app.services.data_uploader import DataUploader
 from app.services.sign_service import SignService
+from app.services.sign_state_store import SignStateStore
 from app.services.notification import NotificationManager 
 
 from app.cli.setup_wizard import SetupWizard
@@ -30,13 +35,16 @@ from app.cli.command_handler import CommandHandler
 from app.tasks.background_job_manager import BackgroundJobManager
 from app.tasks.main_task_runner import MainTaskRunner
 
-from packaging.version import parse as parse_version
 from colorama import Fore, Style
 
 
 class AppOrchestrator:
-    def __init__(self):
-        self.application_run_event = threading.Event()
+    def __init__(self, headless: Optional[bool] = None):
+        # 无头/服务模式 (--headless / --daemon)：不输出控制台内容，不启动命令监听，不进入交互式提示。
+        # 命令行参数只在这里解析；headless 参数供嵌入调用方显式指定
+        self.headless: bool = headless if headless is not None else any(arg in AppConstants.HEADLESS_CLI_FLAGS for arg in sys.argv[1:])
+        self.renderer: Optional[ConsoleRenderer] = None
+        self.application_run_event = ApplicationRunEvent()
         self.application_run_event.set() 
 
         self._exit_code: int = 0
@@ -59,17 +67,34 @@ class AppOrchestrator:
         self.command_handler: Optional[CommandHandler] = None
         self.bg_job_manager: Optional[BackgroundJobManager] = None
 
+        # 后台获取的远程配置触发的停止 (访问限制/强制更新)，由主线程处理
+        self._remote_policy_lock = threading.Lock()
+        self._remote_policy_error: Optional[Exception] = None
+        self._shown_announcement: Optional[tuple] = None
+        self._notified_latest_version: Optional[str] = None
+
     # 在 AppOrchestrator 类的 _initialize_logger 方法中
     def _initialize_logger(self):
+        if self.headless:
+            # 在创建 Logger 之前关闭控制台输出，之后所有组件都不再构建控制台内容
+            set_console_capabilities(ConsoleCapabilities(is_tty=get_console_capabilities().is_tty, color=False, silent=True))
+        self.renderer = create_console_renderer(self.headless)
+
         if "--debug-console" in sys.argv: 
             console_log_level = LogLevel.DEBUG
         else: 
             console_log_level = LogLevel.INFO # <--- 改回 INFO，这样INFO和DEBUG(如果用了--debug-console)日志都会在控制台显示
 
+        # 文件日志级别: --file-log-level=INFO，默认 DEBUG
+        file_log_level_arg = next((arg.split("=", 1)[1] for arg in sys.argv if arg.startswith("--file-log-level=")), None)
+        file_log_level = parse_log_level(file_log_level_arg, parse_log_level(AppConstants.DEFAULT_FILE_LOG_LEVEL, LogLevel.DEBUG))
+
         log_file_name = f"{AppConstants.APP_NAME}.log"
-        self.logger = FileLogger(log_file=log_file_name, console_level=console_log_level)
+        self.logger = FileLogger(log_file=log_file_name, console_level=console_log_level, file_level=file_log_level)
         self.logger.log(f"--- {AppConstants.APP_NAME} v{SCRIPT_VERSION} 应用编排器开始初始化 ---", LogLevel.INFO)
-        self.logger.log(f"控制台日志级别已设置为: {console_log_level.name} (文件日志始终为DEBUG及以上)", LogLevel.INFO)
+        self.logger.log(f"控制台日志级别已设置为: {console_log_level.name}，文件日志级别: {file_log_level.name}", LogLevel.INFO)
+        if self.headless:
+            self.logger.log("以无头模式运行：控制台输出、命令监听和交互式提示均已关闭。", LogLevel.INFO)
    
    
     def _perform_initial_setup_and_checks(self) -> bool:
@@ -86,7 +111,7 @@ class AppOrchestrator:
             config_storage = JsonConfigStorage(config_path=AppConstants.CONFIG_FILE)
             self.local_config_manager = ConfigManager(storage=config_storage, logger=self.logger)
 
-            if not tampilkan_免责声明_并获取用户同意(self.logger, self.local_config_manager):
+            if not tampilkan_免责声明_并获取用户同意(self.logger, self.local_config_manager, interactive=not self.headless):
                 # tampilkan_免责声明_并获取用户同意 内部已打印和记录日志
                 raise ConfigError("用户未同意免责声明，应用终止。")
 
@@ -95,65 +120,18 @@ class AppOrchestrator:
             self.current_device_id = device_manager.get_id()
             self.logger.log(f"当前设备ID: {self.current_device_id}", LogLevel.INFO)
 
+            # 不在启动路径上等待网络：先用磁盘缓存 (或默认) 的远程配置继续初始化，启动时的这次后台获取完成后再执行一次远程策略检查
+            # (之后的定期刷新不再检查强制更新，运行中的访问控制变化由 watch_device_access 推送给 MainTaskRunner)
             self.remote_config_manager_instance = RemoteConfigManager(
                 self.logger,
                 AppConstants.PRIMARY_REMOTE_CONFIG_URL,
                 AppConstants.SECONDARY_REMOTE_CONFIG_URL,
-                self.application_run_event # Pass the event
+                self.application_run_event, # Pass the event
+                fetch_on_init=False,
+                cache_path=AppConstants.REMOTE_CONFIG_CACHE_FILE
             )
-            if not self.remote_config_manager_instance._last_successful_fetch_time: # Accessing private for check
-                self.logger.log("警告: 初始远程配置获取失败，将使用默认远程配置。", LogLevel.WARNING)
-            else:
-                self.logger.log("初始远程配置已加载。", LogLevel.INFO)
-            
-            announcement = self.remote_config_manager_instance.get_announcement()
-            if announcement and announcement.get("enabled"):
-                ann_title = announcement.get("title", "公告")
-                ann_msg = announcement.get("message")
-                # Log and print for visibility
-                self.logger.log(f"{Fore.MAGENTA}📢 [{ann_title}] {ann_msg}{Style.RESET_ALL}", LogLevel.INFO)
-
-            self.logger.log("执行启动时更新检查...", LogLevel.INFO)
-            if self.remote_config_manager_instance.is_forced_updates_enabled():
-                forced_version_str = self.remote_config_manager_instance.get_forced_update_below_version()
-                if forced_version_str and forced_version_str != "0.0.0":
-                    if parse_version(SCRIPT_VERSION) < parse_version(forced_version_str):
-                        reason = self.remote_config_manager_instance.get_forced_update_reason()
-                        update_msg = (f"检测到强制更新！当前版本 {SCRIPT_VERSION} < 最低要求 {forced_version_str}。"
-                                      f"{f' 原因: {reason}' if reason else ''}")
-                        self.logger.log(update_msg, LogLevel.CRITICAL)
-                        print(f"\n{Fore.RED}*** 强制更新通知 ***\n{update_msg}\n将尝试启动更新程序...{Style.RESET_ALL}")
-                        self.is_update_failure_fatal = True 
-                        self._trigger_update_process_internal() # This calls launch_updater_and_exit
-                        # If launch_updater_and_exit doesn't sys.exit(), it means updater failed to start
-                        self.logger.log("强制更新：无法启动更新程序或更新程序未找到。程序必须退出。", LogLevel.CRITICAL)
-                        raise UpdateRequiredError(update_msg, forced_version_str, SCRIPT_VERSION, reason)
-            
-            self.is_update_failure_fatal = False # Reset for optional updates
-
-            latest_stable_str = self.remote_config_manager_instance.get_config_value(["latest_stable_version"], "0.0.0")
-            if latest_stable_str and latest_stable_str != "0.0.0":
-                if parse_version(SCRIPT_VERSION) < parse_version(latest_stable_str):
-                    opt_msg_template = self.remote_config_manager_instance.get_optional_update_message_template()
-                    opt_msg = (opt_msg_template.format(latest_stable_version=latest_stable_str, current_version=SCRIPT_VERSION)
-                               if opt_msg_template
-                               else f"发现新版本 {latest_stable_str} 可用！(当前: {SCRIPT_VERSION})\n建议稍后在程序内输入 'update' 命令更新。")
-                    self.logger.log(f"检测到可选更新: {latest_stable_str}", LogLevel.INFO)
-                    print(f"\n{Fore.GREEN}💡 可选更新提示 💡\n{opt_msg}{Style.RESET_ALL}\n")
-
-            self.logger.log("执行启动时访问控制检查...", LogLevel.DEBUG)
-            if self.remote_config_manager_instance.is_globally_disabled():
-                msg = self.remote_config_manager_instance.get_global_disable_message()
-                self.logger.log(f"远程配置: 全局禁用已激活。消息: '{msg}'. 程序将退出。", LogLevel.CRITICAL)
-                print(f"\n{Fore.RED}🚫 服务通知 🚫\n{msg}{Style.RESET_ALL}")
-                raise ServiceAccessError(f"全局禁用: {msg}")
-
-            if not self.remote_config_manager_instance.is_device_allowed(self.current_device_id): # type: ignore
-                msg_template = self.remote_config_manager_instance.get_device_block_message_template()
-                msg = msg_template.format(device_id=self.current_device_id)
-                self.logger.log(f"远程配置: 设备 {self.current_device_id} 被禁止。消息: '{msg}'. 程序将退出。", LogLevel.CRITICAL)
-                print(f"\n{Fore.RED}🚫 访问限制 🚫\n{msg}{Style.RESET_ALL}")
-                raise ServiceAccessError(f"设备被禁用: {msg}")
+            self.remote_config_manager_instance.start_background_fetch(on_fetched=self._on_remote_config_updated)
+            self._apply_remote_config_policies()
 
             self.logger.log("初始设置和检查通过。", LogLevel.INFO)
             return True
@@ -175,6 +153,92 @@ class AppOrchestrator:
             self.application_run_event.clear()
             return False
 
+    def _apply_remote_config_policies(self, from_background: bool = False) -> None:
+        """
+        根据当前远程配置显示公告、检查更新并执行访问控制。
+
+        启动时基于默认 (或已缓存的) 远程配置调用一次，后台获取到新配置后再调用一次。
+        后台线程中不直接启动更新程序，只抛出 UpdateRequiredError，由主线程处理。
+        """
+        remote = self.remote_config_manager_instance
+        if not (self.logger and remote):
+            return
+        with self._remote_policy_lock:
+            snapshot = remote.get_snapshot() # 本轮检查全部基于同一份配置
+            announcement = snapshot.announcement
+            if announcement and announcement.get("enabled"):
+                ann_title = announcement.get("title", "公告")
+                ann_msg = announcement.get("message")
+                if (announcement.get("id"), ann_msg) != self._shown_announcement:
+                    self._shown_announcement = (announcement.get("id"), ann_msg)
+                    # Log and print for visibility
+                    self.logger.log(f"{Fore.MAGENTA}📢 [{ann_title}] {ann_msg}{Style.RESET_ALL}", LogLevel.INFO)
+
+            self.logger.log("执行远程配置更新检查...", LogLevel.INFO if not from_background else LogLevel.DEBUG)
+            if snapshot.forced_update_required:
+                forced_version_str = snapshot.forced_update_below_version
+                reason = snapshot.forced_update_reason
+                update_msg = (f"检测到强制更新！当前版本 {SCRIPT_VERSION} < 最低要求 {forced_version_str}。"
+                              f"{f' 原因: {reason}' if reason else ''}")
+                self.logger.log(update_msg, LogLevel.CRITICAL)
+                update_error = UpdateRequiredError(update_msg, forced_version_str, SCRIPT_VERSION, reason)
+                if not from_background:
+                    self._start_forced_update(update_error)
+                raise update_error
+            
+            if not from_background:
+                self.is_update_failure_fatal = False # Reset for optional updates
+
+            latest_stable_str = snapshot.latest_stable_version
+            if snapshot.optional_update_available and latest_stable_str != self._notified_latest_version:
+                self._notified_latest_version = latest_stable_str
+                opt_msg_template = snapshot.optional_update_message_template
+                opt_msg = (opt_msg_template.format(latest_stable_version=latest_stable_str, current_version=SCRIPT_VERSION)
+                           if opt_msg_template
+                           else f"发现新版本 {latest_stable_str} 可用！(当前: {SCRIPT_VERSION})\n建议稍后在程序内输入 'update' 命令更新。")
+                self.logger.log(f"检测到可选更新: {latest_stable_str}", LogLevel.INFO)
+                self._render_message(f"\n💡 可选更新提示 💡\n{opt_msg}\n", Fore.GREEN)
+
+            self.logger.log("执行远程访问控制检查...", LogLevel.DEBUG)
+            if snapshot.global_disable:
+                msg = snapshot.global_disable_message
+                self.logger.log(f"远程配置: 全局禁用已激活。消息: '{msg}'. 程序将退出。", LogLevel.CRITICAL)
+                self._render_message(f"\n🚫 服务通知 🚫\n{msg}", Fore.RED)
+                raise ServiceAccessError(f"全局禁用: {msg}")
+
+            if self.current_device_id and not snapshot.is_device_allowed(self.current_device_id):
+                msg_template = snapshot.device_block_message_template
+                msg = msg_template.format(device_id=self.current_device_id)
+                self.logger.log(f"远程配置: 设备 {self.current_device_id} 被禁止。消息: '{msg}'. 程序将退出。", LogLevel.CRITICAL)
+                self._render_message(f"\n🚫 访问限制 🚫\n{msg}", Fore.RED)
+                raise ServiceAccessError(f"设备被禁用: {msg}")
+
+    def _on_remote_config_updated(self) -> None:
+        """启动时的后台远程配置获取成功后的回调 (在后台线程中执行)。"""
+        try:
+            self._apply_remote_config_policies(from_background=True)
+        except (UpdateRequiredError, ServiceAccessError) as e_policy:
+            if self._remote_policy_error is None:
+                self._remote_policy_error = e_policy
+                if self.logger: self.logger.log(f"AppOrchestrator: 新的远程配置要求应用停止: {e_policy}", LogLevel.CRITICAL)
+                self.application_run_event.clear() # 主线程退出当前阶段后处理该错误
+
+    def _raise_deferred_remote_policy_error(self) -> None:
+        """在主线程中重新抛出后台远程配置检查记录的错误；强制更新在此启动更新程序。"""
+        policy_error = self._remote_policy_error
+        if policy_error is None:
+            return
+        if isinstance(policy_error, UpdateRequiredError):
+            self._start_forced_update(policy_error)
+        raise policy_error
+
+    def _start_forced_update(self, update_error: UpdateRequiredError) -> None:
+        self._render_message(f"\n*** 强制更新通知 ***\n{update_error.args[0]}\n将尝试启动更新程序...", Fore.RED)
+        self.is_update_failure_fatal = True 
+        self._trigger_update_process_internal() # This calls launch_updater_and_exit
+        # If launch_updater_and_exit doesn't sys.exit(), it means updater failed to start
+        if self.logger: self.logger.log("强制更新：无法启动更新程序或更新程序未找到。程序必须退出。", LogLevel.CRITICAL)
+
     def _initialize_core_components(self):
         if not (self.logger and self.local_config_manager and self.current_device_id and self.remote_config_manager_instance):
             # This check ensures that _perform_initial_setup_and_checks ran successfully enough
@@ -194,7 +258,8 @@ class AppOrchestrator:
         config_updater = SetupWizard(
             config_manager=self.local_config_manager,
             logger=self.logger,
-            location_engine=self.location_engine_instance
+            location_engine=self.location_engine_instance,
+            interactive=not self.headless
         )
         self.logger.log("准备加载或初始化用户应用配置...", LogLevel.DEBUG)
         raw_app_config_dict = config_updater.init_config() # This returns a dict and can raise ConfigError
@@ -218,6 +283,18 @@ class AppOrchestrator:
 
         self.logger.log("本地应用配置加载/创建并验证成功。", LogLevel.INFO)
 
+        if isinstance(self.logger, FileLogger):
+            logging_settings = self.app_config.logging
+            self.logger.configure_rotation(
+                max_bytes=logging_settings.rotate_max_bytes,
+                daily=logging_settings.rotate_daily,
+                backup_count=logging_settings.backup_count,
+                compress=logging_settings.compress_backups
+            )
+            if logging_settings.structured_log:
+                self.logger.enable_structured_log(f"{AppConstants.APP_NAME}{AppConstants.STRUCTURED_LOG_FILE_SUFFIX}")
+                self.logger.log("结构化事件日志 (JSONL) 已开启。", LogLevel.INFO)
+
         # Initialize NotificationManager using the 'notifications' part of app_config
         # app_config.notifications is already a NotificationSettings object due to ConfigModel default_factory
         self.notification_manager = NotificationManager(
@@ -237,11 +314,26 @@ class AppOrchestrator:
             initial_config=self.app_config.model_dump() # Pass the dict form
         )
 
+        network_settings = self.app_config.network
+        sign_http_session = create_pooled_session(
+            pool_connections=network_settings.pool_connections,
+            pool_maxsize=network_settings.pool_maxsize,
+            pool_block=network_settings.pool_block,
+            keep_alive=network_settings.keep_alive
+        )
+        self.logger.log(f"SignService HTTP 连接池已创建 (主机池: {network_settings.pool_connections}, 每主机连接: {network_settings.pool_maxsize}, 阻塞: {network_settings.pool_block}, Keep-Alive: {network_settings.keep_alive})", LogLevel.DEBUG)
+
         self.sign_service = SignService(
             logger=self.logger,
             app_config=self.app_config.model_dump(), # Pass the dict form
             remote_config_manager=self.remote_config_manager_instance,
-            notification_manager=self.notification_manager # Pass the manager instance
+            notification_manager=self.notification_manager, # Pass the manager instance
+            http_session=sign_http_session, # SignService takes ownership and closes it on shutdown
+            renderer=self.renderer,
+            task_state_store=SignStateStore(
+                self.logger, AppConstants.SIGN_STATE_DB_FILE,
+                user_id=(self.app_config.user_info or {}).get("uid") or ""
+            ) # SignService closes it on shutdown
         )
 
         self.main_task_runner = MainTaskRunner(
@@ -252,16 +344,18 @@ class AppOrchestrator:
             sign_service=self.sign_service,
             location_engine=self.location_engine_instance,
             data_uploader_instance=self.data_uploader_instance,
-            device_id=self.current_device_id
+            device_id=self.current_device_id,
+            renderer=self.renderer
         )
 
-        self.command_handler = CommandHandler(
-            logger=self.logger,
-            application_run_event=self.application_run_event,
-            app_orchestrator_ref=self, 
-            sign_service_ref=self.sign_service,
-            main_task_runner_ref=self.main_task_runner
-        )
+        if not self.headless: # 无头模式下没有可读取命令的终端
+            self.command_handler = CommandHandler(
+                logger=self.logger,
+                application_run_event=self.application_run_event,
+                app_orchestrator_ref=self, 
+                sign_service_ref=self.sign_service,
+                main_task_runner_ref=self.main_task_runner
+            )
 
         self.bg_job_manager = BackgroundJobManager(self.logger, self.application_run_event)
 
@@ -272,7 +366,9 @@ class AppOrchestrator:
             self.bg_job_manager.add_job(
                 self.remote_config_manager_instance.fetch_config,
                 config_refresh_interval,
-                "RemoteConfigRefresh"
+                "RemoteConfigRefresh",
+                max_runtime_seconds=config_refresh_interval,
+                first_run_delay_seconds=config_refresh_interval # 启动时已在后台获取过一次
             )
 
         data_upload_interval = self.remote_config_manager_instance.get_setting(
@@ -293,7 +389,8 @@ class AppOrchestrator:
                 self.bg_job_manager.add_job( 
                     self.main_task_runner._upload_data_job, 
                     data_upload_interval,
-                    "DataUpload"
+                    "DataUpload",
+                    max_runtime_seconds=data_upload_interval
                 )
             else: 
                 self.logger.log("CRITICAL_ERROR: MainTaskRunner instance does not have _upload_data_job attribute when adding job.", LogLevel.CRITICAL)
@@ -308,11 +405,17 @@ class AppOrchestrator:
             if not self._perform_initial_setup_and_checks():
                 # _perform_initial_setup_and_checks already set exit reason/code and cleared event
                 self._app_must_exit_due_to_initial_check = True 
+            self._raise_deferred_remote_policy_error()
             
             if self.application_run_event.is_set() and not self._app_must_exit_due_to_initial_check:
-                self._initialize_core_components() 
+                try:
+                    self._initialize_core_components() 
+                except ConfigError:
+                    self._raise_deferred_remote_policy_error() # 配置被中止可能是远程配置要求停止
+                    raise
 
                 if not self.application_run_event.is_set(): 
+                     self._raise_deferred_remote_policy_error()
                      # Core components init might have cleared the event (e.g., ConfigError)
                      self.logger.log("核心组件初始化失败或被中止，应用无法启动。", LogLevel.CRITICAL) # type: ignore
                      self._exit_reason = self._exit_reason or "核心组件初始化失败" 
@@ -326,6 +429,7 @@ class AppOrchestrator:
                     self._exit_reason = "应用正常结束主循环" 
                     self._exit_code = 0
                     if self.main_task_runner: self.main_task_runner.run_loop() # This is blocking
+                    self._raise_deferred_remote_policy_error()
             
             # If we reach here because _app_must_exit_due_to_initial_check was true
             elif self._app_must_exit_due_to_initial_check and self.logger : # Ensure logger exists
@@ -398,6 +502,12 @@ class AppOrchestrator:
         if self.bg_job_manager and hasattr(self.bg_job_manager, 'threads') and self.bg_job_manager.threads:
             self.logger.log("AppOrchestrator: 等待后台任务线程（daemon）随主程序结束...", LogLevel.DEBUG) 
 
+        if self.main_task_runner:
+            self.main_task_runner.close()
+
+        if self.sign_service:
+            self.sign_service.close()
+
         if self.sign_service and self.local_config_manager and hasattr(self.local_config_manager, 'config') and self.local_config_manager.config:
             try:
                 # app_config 应该是 ConfigModel 实例，从中获取 total_successful_sign_ins
@@ -429,15 +539,25 @@ class AppOrchestrator:
         self.logger.log(f"--- {AppConstants.APP_NAME} v{SCRIPT_VERSION} {self._exit_reason} (最终退出码: {self._exit_code}) ---", final_log_level) 
         
         if is_error_exit:
-            print(f"{Fore.RED}程序因错误退出。详情请查看日志文件。{Style.RESET_ALL}")
+            self._render_message("程序因错误退出。详情请查看日志文件。", Fore.RED)
             delay_seconds = getattr(AppConstants, 'GRACEFUL_ERROR_EXIT_DELAY_SECONDS', 3)
             self.logger.log(f"由于发生错误，程序将在 {delay_seconds} 秒后完全关闭...", LogLevel.DEBUG) 
             time.sleep(delay_seconds)
         elif self._exit_code == 0 and not isinstance(self._main_task_exception, KeyboardInterrupt):
             self.logger.log(f"程序正常关闭。将在短暂延时后退出...", LogLevel.DEBUG) 
             time.sleep(1)
+
+        if hasattr(self.logger, 'close'):
+            self.logger.close() # 写完队列中剩余的文件日志
             
-        print(Style.RESET_ALL)
+        if not self.headless:
+            print(Style.RESET_ALL)
+
+    def _render_message(self, text: str, color: str = "") -> None:
+        if self.renderer:
+            self.renderer.message(text, color)
+        else:
+            print(f"{color}{text}{Style.RESET_ALL}")
 
     def request_shutdown(self, reason: str, exit_code: int = 0):
         if not self.logger: print(f"SHUTDOWN REQUEST (Logger N/A): {reason}, code: {exit_code}")
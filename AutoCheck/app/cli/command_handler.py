@@ -355,6 +355,9 @@ class CommandHandler:
             session_success_rate = (total_tasks_processed_in_session / total_tasks_found_in_session) * 100
             print(f"\n📊 本次会话签到任务成功率 (基于已发现任务): {session_success_rate:.2f}%")
         else: print(f"\n📊 本次会话尚未发现可处理的签到任务。")
+        if hasattr(self.sign_service, 'get_parse_stats'):
+            parse_stats = self.sign_service.get_parse_stats()
+            print(f"🧩 页面解析 ({parse_stats['parser']}): {parse_stats['count']} 次, 平均 {parse_stats['avg_ms']:.2f}ms, 最长 {parse_stats['max_ms']:.2f}ms")
         print("-" * 40); return True
 
     def _handle_update_command(self) -> bool:
@@ -21,13 +21,18 @@ from datetime import datetime
 
 
 class SetupWizard:
-    def __init__(self, config_manager: ConfigManager, logger: LoggerInterface, location_engine: Optional[LocationEngine]):
+    def __init__(self, config_manager: ConfigManager, logger: LoggerInterface, location_engine: Optional[LocationEngine], interactive: bool = True):
         self.manager = config_manager
         self.logger = logger
         self.location_engine = location_engine
+        self.interactive = interactive # 无头模式下为 False：只能静默加载已有配置，不进入需要输入的向导
         self.login_system = QRLoginSystem(logger)
         self.scanned_data: Optional[Dict[str, Any]] = None
 
+    def _notice(self, message: str) -> None:
+        if self.interactive:
+            print(message)
+
     def _parse_cookie_string_to_dict(self, cookie_string: str) -> Dict[str, str]:
         cookie_dict = {}
         if not cookie_string: return cookie_dict
@@ -77,7 +82,7 @@ class SetupWizard:
         # Try to use existing_config if it's fully valid for a silent start
         if existing_config and self._validate_current_config_quietly(existing_config):
             self.logger.log("检测到完整历史配置，尝试静默刷新用户信息与班级详情...", LogLevel.INFO)
-            print(f"{Fore.CYAN}检测到有效历史配置，正在静默刷新信息...{Style.RESET_ALL}")
+            self._notice(f"{Fore.CYAN}检测到有效历史配置，正在静默刷新信息...{Style.RESET_ALL}")
             try:
                 parsed_cookies = self._parse_cookie_string_to_dict(existing_config["cookie"])
                 if not parsed_cookies: raise ValueError("无法解析已存Cookie (init_config)")
@@ -93,13 +98,13 @@ class SetupWizard:
 
                     if not server_user_info or not server_user_info.get("uid"):
                         self.logger.log("静默刷新：服务器未能返回有效的用户信息(UID)。Cookie可能已失效。", LogLevel.ERROR)
-                        print(f"{Fore.RED}错误：无法验证当前登录状态，Cookie可能已过期。请重新配置。{Style.RESET_ALL}")
+                        self._notice(f"{Fore.RED}错误：无法验证当前登录状态，Cookie可能已过期。请重新配置。{Style.RESET_ALL}")
                         current_partial_data = deepcopy(existing_config); current_partial_data.pop("cookie",None); current_partial_data.pop("class_ids",None); current_partial_data.pop("user_info",None)
                         return self._first_run_config_wizard(partial_data=current_partial_data)
 
                     if stored_user_info and stored_user_info.get("uid") != server_user_info.get("uid"):
                         self.logger.log(f"Cookie对应的用户UID ({server_user_info.get('uid')}) 与配置中UID ({stored_user_info.get('uid')}) 不符！需要重新登录。", LogLevel.CRITICAL)
-                        print(f"{Fore.RED}错误：当前Cookie与配置的用户信息不符，请重新登录。{Style.RESET_ALL}")
+                        self._notice(f"{Fore.RED}错误：当前Cookie与配置的用户信息不符，请重新登录。{Style.RESET_ALL}")
                         current_partial_data = deepcopy(existing_config); current_partial_data.pop("cookie",None); current_partial_data.pop("class_ids",None); current_partial_data.pop("user_info",None)
                         return self._first_run_config_wizard(partial_data=current_partial_data)
 
@@ -109,12 +114,12 @@ class SetupWizard:
 
                     if not validated_class_ids and stored_class_ids: 
                         self.logger.log(f"所有已存储班级ID ({stored_class_ids}) 不再有效。需重新选择。", LogLevel.WARNING)
-                        print(f"{Fore.YELLOW}警告：您配置的班级已全部失效，请重新选择。{Style.RESET_ALL}")
+                        self._notice(f"{Fore.YELLOW}警告：您配置的班级已全部失效，请重新选择。{Style.RESET_ALL}")
                         config_for_wizard = deepcopy(existing_config); config_for_wizard["class_ids"] = [] 
                         return self._first_run_config_wizard(partial_data=config_for_wizard)
                     elif len(validated_class_ids) < len(stored_class_ids):
                         self.logger.log(f"部分已存储班级ID不再有效。原: {stored_class_ids}, 现: {validated_class_ids}。将使用剩余有效班级。", LogLevel.WARNING)
-                        print(f"{Fore.YELLOW}警告：您配置的部分班级信息已更新。当前将使用有效班级。建议稍后手动检查配置。{Style.RESET_ALL}")
+                        self._notice(f"{Fore.YELLOW}警告：您配置的部分班级信息已更新。当前将使用有效班级。建议稍后手动检查配置。{Style.RESET_ALL}")
                     
                     final_runtime_config = deepcopy(existing_config)
                     final_runtime_config["class_ids"] = validated_class_ids 
@@ -130,7 +135,7 @@ class SetupWizard:
                 
                 else: # get_all_class_details_from_server failed
                     self.logger.log(f"静默刷新信息失败: {server_data_result.get('message', '未知错误')}. Cookie可能已失效。", LogLevel.WARNING)
-                    print(f"{Fore.YELLOW}Cookie可能已过期或无效，需要重新配置凭证。{Style.RESET_ALL}")
+                    self._notice(f"{Fore.YELLOW}Cookie可能已过期或无效，需要重新配置凭证。{Style.RESET_ALL}")
                     current_partial_data = deepcopy(existing_config) if existing_config else {}
                     current_partial_data.pop("cookie", None); current_partial_data.pop("class_ids", None); current_partial_data.pop("user_info", None); current_partial_data.pop("all_fetched_class_details", None)
                     return self._first_run_config_wizard(partial_data=current_partial_data)
@@ -146,6 +151,9 @@ class SetupWizard:
         return self._first_run_config_wizard(partial_data=existing_config if existing_config else None)
 
     def _first_run_config_wizard(self, partial_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        if not self.interactive:
+            self.logger.log("无头模式下无法运行配置向导，请先以交互模式完成配置。", LogLevel.CRITICAL)
+            raise ConfigError("无头模式下配置不完整或已失效，需要交互式配置")
         self.logger.log(f"\n{Fore.GREEN}🌟 欢迎使用 {AppConstants.APP_NAME} v{SCRIPT_VERSION} 🌟{Style.RESET_ALL}", LogLevel.INFO)
         if partial_data: print(f"{Fore.YELLOW}配置信息不完整或需更新，开始配置向导（基于部分现有数据）。{Style.RESET_ALL}")
         else: print(f"{Fore.YELLOW}首次运行，开始初始配置向导。{Style.RESET_ALL}")
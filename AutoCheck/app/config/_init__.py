@@ -5,8 +5,9 @@
 """
 
 from .models import ConfigModel, HotSpotData, SelectedSchoolData
-from .storage import ConfigStorageInterface, JsonConfigStorage
+from .storage import ConfigStorageInterface, JsonConfigStorage, JsonRemoteConfigCache
 from .manager import ConfigManager
+from .remote_snapshot import DeviceAccessDecision, RemoteConfigSnapshot
 from .remote_manager import RemoteConfigManager
 
 __all__ = [
@@ -15,6 +16,9 @@ __all__ = [
     "SelectedSchoolData",
     "ConfigStorageInterface",
     "JsonConfigStorage",
+    "JsonRemoteConfigCache",
     "ConfigManager",
+    "DeviceAccessDecision",
+    "RemoteConfigSnapshot",
     "RemoteConfigManager",
 ]
\ No newline at end of file
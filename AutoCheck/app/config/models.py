@@ -14,6 +14,79 @@ class PushPlusConfig(BaseModel):
 class NotificationSettings(BaseModel):
     pushplus: PushPlusConfig = Field(default_factory=PushPlusConfig)
 
+# --- Network Config Models ---
+class NetworkSettings(BaseModel):
+    pool_connections: int = AppConstants.DEFAULT_HTTP_POOL_CONNECTIONS
+    pool_maxsize: int = AppConstants.DEFAULT_HTTP_POOL_MAXSIZE
+    pool_block: bool = AppConstants.DEFAULT_HTTP_POOL_BLOCK
+    keep_alive: bool = AppConstants.DEFAULT_HTTP_KEEP_ALIVE
+
+    @field_validator("pool_connections", "pool_maxsize")
+    @classmethod
+    def validate_pool_size(cls, v: int) -> int:
+        if v <= 0: raise ValueError("连接池大小必须为正整数")
+        return v
+
+# --- Logging Config Models ---
+class LoggingSettings(BaseModel):
+    rotate_max_bytes: int = AppConstants.DEFAULT_LOG_ROTATE_MAX_BYTES
+    rotate_daily: bool = AppConstants.DEFAULT_LOG_ROTATE_DAILY
+    backup_count: int = AppConstants.DEFAULT_LOG_BACKUP_COUNT
+    compress_backups: bool = AppConstants.DEFAULT_LOG_COMPRESS_BACKUPS
+    structured_log: bool = AppConstants.DEFAULT_STRUCTURED_LOG_ENABLED
+
+    @field_validator("rotate_max_bytes", "backup_count")
+    @classmethod
+    def validate_non_negative(cls, v: int) -> int:
+        if v < 0: raise ValueError("日志轮转大小和保留个数不能为负数")
+        return v
+
+# --- Polling Config Models ---
+class PollingSettings(BaseModel):
+    fetch_concurrency: int = AppConstants.DEFAULT_FETCH_CONCURRENCY
+    execution_mode: str = AppConstants.DEFAULT_EXECUTION_MODE
+    html_parser: str = AppConstants.DEFAULT_HTML_PARSER
+    restricted_parse: bool = AppConstants.DEFAULT_RESTRICTED_PARSE
+    page_cache: bool = AppConstants.DEFAULT_PAGE_CACHE_ENABLED
+    conditional_get: bool = AppConstants.DEFAULT_CONDITIONAL_GET_ENABLED
+    adaptive: bool = AppConstants.DEFAULT_ADAPTIVE_POLLING
+    min_interval_seconds: int = AppConstants.DEFAULT_ADAPTIVE_MIN_INTERVAL_SECONDS
+    max_interval_seconds: int = AppConstants.DEFAULT_ADAPTIVE_MAX_INTERVAL_SECONDS
+    backoff_factor: float = AppConstants.DEFAULT_ADAPTIVE_BACKOFF_FACTOR
+    near_window_seconds: int = AppConstants.DEFAULT_ADAPTIVE_NEAR_WINDOW_SECONDS
+
+    @field_validator("fetch_concurrency")
+    @classmethod
+    def validate_fetch_concurrency(cls, v: int) -> int:
+        if v <= 0: raise ValueError("并发获取数必须为正整数")
+        return v
+
+    @field_validator("execution_mode")
+    @classmethod
+    def validate_execution_mode(cls, v: str) -> str:
+        if v not in ["threaded", "async"]:
+            raise ValueError("执行模式必须是 'threaded' 或 'async'")
+        return v
+
+    @field_validator("min_interval_seconds", "max_interval_seconds")
+    @classmethod
+    def validate_adaptive_interval(cls, v: int) -> int:
+        if v <= 0: raise ValueError("自适应轮询间隔必须为正整数")
+        return v
+
+    @field_validator("backoff_factor")
+    @classmethod
+    def validate_backoff_factor(cls, v: float) -> float:
+        if v < 1: raise ValueError("退避系数不能小于 1")
+        return v
+
+    @field_validator("html_parser")
+    @classmethod
+    def validate_html_parser(cls, v: str) -> str:
+        if v not in ["auto", "lxml", "html.parser"]:
+            raise ValueError("HTML 解析后端必须是 'auto'、'lxml' 或 'html.parser'")
+        return v
+
 # --- School Data TypedDicts ---
 class HotSpotData(TypedDict):
     name: str
@@ -64,7 +137,16 @@ class ConfigModel(BaseModel):
 
     # Notification settings
     notifications: NotificationSettings = Field(default_factory=NotificationSettings)
-    
+
+    # HTTP connection pool settings
+    network: NetworkSettings = Field(default_factory=NetworkSettings)
+
+    # Log file rotation settings
+    logging: LoggingSettings = Field(default_factory=LoggingSettings)
+
+    # Sign cycle polling settings
+    polling: PollingSettings = Field(default_factory=PollingSettings)
+
     # Runtime only, not saved to JSON (Pydantic handles this with exclude=True)
     all_fetched_class_details: Optional[List[Dict[str,str]]] = Field(default_factory=list, exclude=True)
 
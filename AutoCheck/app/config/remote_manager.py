@@ -4,11 +4,13 @@ import json
 import threading
 import time # <--- 确保这一行存在且未被注释
 from datetime import datetime
-from typing import Dict, Any, Optional, List 
-from copy import deepcopy
+from typing import Callable, Dict, Any, Optional, List, Tuple
 
-from app.constants import AppConstants
+from app.constants import AppConstants, SCRIPT_VERSION
+from app.config.remote_snapshot import DeviceAccessDecision, RemoteConfigSnapshot
+from app.config.storage import JsonRemoteConfigCache
 from app.logger_setup import LoggerInterface, LogLevel
+from app.utils.wait_utils import CancellableWait
 
 class RemoteConfigManager:
     def __init__(
@@ -16,18 +18,110 @@ class RemoteConfigManager:
         logger: LoggerInterface,
         primary_url: Optional[str],
         secondary_url: Optional[str],
-        application_run_event: threading.Event
+        application_run_event: threading.Event,
+        fetch_on_init: bool = True,
+        cache_path: Optional[str] = None
     ):
         self.logger = logger
         self.application_run_event = application_run_event
         self.primary_url = primary_url
         self.secondary_url = secondary_url
-        self._config: Dict[str, Any] = deepcopy(AppConstants.DEFAULT_REMOTE_CONFIG)
+        # 读取方直接取用当前快照引用，不加锁；更新时整体替换为新快照
+        self._snapshot: RemoteConfigSnapshot = RemoteConfigSnapshot(self._merge_with_defaults({}))
         self._last_successful_fetch_time: Optional[datetime] = None
         self._lock = threading.Lock()
-        self.fetch_config()
+        self._fetch_lock = threading.Lock() # 同一时间只进行一次获取，后来者等待并共享结果
+        self._last_fetch_succeeded: bool = False
+        # 当前设备的访问决定随快照一起计算；发生变化时推送给访问监听者，调用方无需轮询
+        self._watched_device_id: Optional[str] = None
+        self._access_decision: Optional[DeviceAccessDecision] = None
+        self._access_listeners: List[Callable[[DeviceAccessDecision], None]] = []
+        self._bootstrap_thread: Optional[threading.Thread] = None
 
-    def _fetch_from_url(self, url: str, attempt: int) -> Optional[Dict[str, Any]]:
+        # 磁盘缓存: 当前配置来自哪个源，以及该源返回的 ETag / Last-Modified
+        self._disk_cache: Optional[JsonRemoteConfigCache] = JsonRemoteConfigCache(cache_path) if cache_path else None
+        self._cache_source_url: Optional[str] = None
+        self._cache_validators: Dict[str, Optional[str]] = {}
+        self._load_disk_cache()
+
+        if fetch_on_init and not self.is_cache_valid():
+            self.fetch_config()
+
+    def start_background_fetch(self, on_fetched: Optional[Callable[[], None]] = None) -> Optional[threading.Thread]:
+        """
+        在后台线程中获取远程配置，调用方先使用当前 (缓存或默认) 配置继续启动。磁盘缓存仍在有效期内时不发起请求。
+
+        on_fetched 只在这一次后台获取成功后调用 (在后台线程中)，之后的定期刷新不会触发它。
+        """
+        if self.is_cache_valid():
+            self.logger.log("磁盘缓存的远程配置仍在有效期内，跳过启动时获取。", LogLevel.INFO)
+            return None
+        if self._bootstrap_thread is not None and self._bootstrap_thread.is_alive():
+            return self._bootstrap_thread
+        self._bootstrap_thread = threading.Thread(target=self._bootstrap_fetch, args=(on_fetched,), name="RemoteConfigBootstrap", daemon=True)
+        self._bootstrap_thread.start()
+        self.logger.log(f"远程配置将在后台获取，当前先使用{'磁盘缓存的' if self.has_fetched() else '默认'}远程配置。", LogLevel.INFO)
+        return self._bootstrap_thread
+
+    def _bootstrap_fetch(self, on_fetched: Optional[Callable[[], None]]) -> None:
+        if not self.fetch_config() or on_fetched is None:
+            return
+        try:
+            on_fetched()
+        except Exception as e:
+            self.logger.log(f"远程配置后台获取完成回调执行出错: {e}", LogLevel.ERROR, exc_info=True)
+
+    def has_fetched(self) -> bool:
+        return self._last_successful_fetch_time is not None
+
+    def _load_disk_cache(self) -> None:
+        if self._disk_cache is None:
+            return
+        entry = self._disk_cache.load()
+        if not entry:
+            return
+        cached_config = entry.get("config")
+        fetched_at = entry.get("fetched_at")
+        if entry.get("script_version") != SCRIPT_VERSION or not isinstance(cached_config, dict) or not isinstance(fetched_at, (int, float)):
+            self.logger.log("远程配置磁盘缓存不可用 (版本不同或格式无效)，忽略。", LogLevel.DEBUG)
+            return
+        self._publish_snapshot(RemoteConfigSnapshot(cached_config), datetime.fromtimestamp(fetched_at)) # 缓存中保存的是已与默认配置合并后的结果
+        with self._lock:
+            self._cache_source_url = entry.get("source_url")
+            validators = entry.get("validators")
+            self._cache_validators = validators if isinstance(validators, dict) else {}
+        self.logger.log(f"已从磁盘缓存加载远程配置 (获取于 {self._last_successful_fetch_time.strftime('%Y-%m-%d %H:%M:%S')})。", LogLevel.INFO)
+
+    def _save_disk_cache(self) -> None:
+        if self._disk_cache is None or self._last_successful_fetch_time is None:
+            return
+        with self._lock:
+            entry = {
+                "script_version": SCRIPT_VERSION,
+                "fetched_at": self._last_successful_fetch_time.timestamp(),
+                "source_url": self._cache_source_url,
+                "validators": dict(self._cache_validators),
+                "config": self._snapshot.source,
+            }
+        try:
+            self._disk_cache.save(entry)
+        except (ValueError, TypeError) as e:
+            self.logger.log(f"写入远程配置磁盘缓存失败: {e}", LogLevel.WARNING)
+
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """当前配置来自该源时附带校验信息，配置未变化的源只需返回 304。"""
+        headers: Dict[str, str] = {}
+        with self._lock:
+            if url != self._cache_source_url or self._last_successful_fetch_time is None:
+                return headers
+            if self._cache_validators.get("etag"):
+                headers["If-None-Match"] = str(self._cache_validators["etag"])
+            if self._cache_validators.get("last_modified"):
+                headers["If-Modified-Since"] = str(self._cache_validators["last_modified"])
+        return headers
+
+    def _fetch_from_url(self, url: str, attempt: int) -> Optional[Tuple[Optional[Dict[str, Any]], Dict[str, Optional[str]]]]:
+        """返回 (配置, 校验信息)；源返回 304 时配置为 None，表示当前配置仍是最新。失败返回 None。"""
         try:
             self.logger.log(
                 f"尝试从 {url} 获取远程配置 (尝试 {attempt})", LogLevel.DEBUG
@@ -36,13 +130,21 @@ class RemoteConfigManager:
                 self.logger.log(f"应用停止，取消从 {url} 获取远程配置。", LogLevel.DEBUG)
                 return None
                 
-            response = requests.get(url, timeout=10)
+            response = requests.get(url, headers=self._conditional_headers(url), timeout=AppConstants.REMOTE_CONFIG_REQUEST_TIMEOUT_SECONDS)
+            validators = {"etag": response.headers.get("ETag"), "last_modified": response.headers.get("Last-Modified")}
+            if response.status_code == 304:
+                self.logger.log(f"{url} 上的远程配置未变化 (304)。", LogLevel.DEBUG)
+                with self._lock:
+                    return None, {key: validators[key] or self._cache_validators.get(key) for key in validators}
             response.raise_for_status()
             config_data = response.json()
+            if not isinstance(config_data, dict):
+                self.logger.log(f"来自 {url} 的远程配置不是 JSON 对象，忽略。", LogLevel.DEBUG)
+                return None
             self.logger.log(
                 f"成功从 {url} 获取远程配置", LogLevel.DEBUG
             )
-            return config_data
+            return config_data, validators
         except requests.RequestException as e:
             self.logger.log(
                 f"从 {url} 获取配置失败 (尝试 {attempt}): {e}", LogLevel.DEBUG
@@ -54,6 +156,21 @@ class RemoteConfigManager:
         return None
 
     def fetch_config(self) -> bool:
+        if not self._fetch_lock.acquire(blocking=False):
+            self.logger.log("远程配置正在由其他线程获取，等待其结果。", LogLevel.DEBUG)
+            with self._fetch_lock:
+                return self._last_fetch_succeeded
+        try:
+            self._last_fetch_succeeded = self._fetch_config_hedged()
+        finally:
+            self._fetch_lock.release()
+        return self._last_fetch_succeeded
+
+    def _fetch_config_hedged(self) -> bool:
+        """
+        对冲请求各个远程配置源：主源立即开始，备用源在 REMOTE_CONFIG_HEDGE_DELAY_SECONDS 后
+        (或前一个源全部重试失败时立即) 开始，采用最先返回的有效配置，其余请求的结果被丢弃。
+        """
         urls_to_try = []
         if self.primary_url:
             urls_to_try.append(self.primary_url)
@@ -62,63 +179,123 @@ class RemoteConfigManager:
 
         if not urls_to_try:
             self.logger.log("未配置远程配置URL，使用默认或缓存的远程配置。", LogLevel.DEBUG)
-            with self._lock:
-                pass 
             return False
 
-        max_retries_per_url = 3
-        fetched_successfully = False
+        if not self.application_run_event.is_set():
+            self.logger.log("应用停止，终止远程配置获取尝试。", LogLevel.INFO)
+            return False
 
-        for url_index, url in enumerate(urls_to_try):
-            for attempt in range(1, max_retries_per_url + 1):
-                if not self.application_run_event.is_set():
-                    self.logger.log("应用停止，终止远程配置获取尝试。", LogLevel.INFO)
-                    return False
-
-                config_data = self._fetch_from_url(url, attempt)
-                if config_data:
-                    with self._lock:
-                        merged_config = deepcopy(AppConstants.DEFAULT_REMOTE_CONFIG)
-                        for key, value in config_data.items():
-                            if key in merged_config and isinstance(merged_config[key], dict) and isinstance(value, dict):
-                                merged_config[key].update(value)
-                            else:
-                                merged_config[key] = value
-                        self._config = merged_config
-                        self._last_successful_fetch_time = datetime.now()
-                    self.logger.log(
-                        f"远程配置已从 {url} 更新。", LogLevel.INFO
-                    )
-                    fetched_successfully = True
-                    break 
-
-                if attempt < max_retries_per_url:
-                    wait_time = 2**attempt
-                    for _ in range(wait_time): # 使用 time.sleep()
-                        if not self.application_run_event.is_set():
-                            self.logger.log("应用停止，中断远程配置获取的等待。", LogLevel.INFO)
-                            return False
-                        time.sleep(1) # <--- 这里使用了 time.sleep()
-            
-            if fetched_successfully:
-                break
-        
-        if not fetched_successfully:
+        fetch = _HedgedFetch(self.application_run_event, len(urls_to_try))
+        started_at = time.monotonic()
+        for index, url in enumerate(urls_to_try):
+            threading.Thread(
+                target=self._fetch_from_mirror,
+                args=(fetch, index, url),
+                name=f"RemoteConfigFetch-{index + 1}",
+                daemon=True
+            ).start()
+
+        winner = fetch.wait_for_first_result()
+        fetch.cancel() # 让其余仍在重试/等待的源尽快退出
+        if winner is None:
+            if not self.application_run_event.is_set():
+                self.logger.log("应用停止，终止远程配置获取尝试。", LogLevel.INFO)
+            else:
+                self.logger.log(
+                    "所有远程配置源均获取失败。将继续使用当前缓存的或默认的远程配置。", LogLevel.WARNING
+                )
+            return False
+
+        url, (config_data, validators) = winner
+        if config_data is None:
+            with self._lock:
+                self._last_successful_fetch_time = datetime.now()
+                self._cache_validators = validators
+            self.logger.log(f"远程配置已通过 {url} 确认未变化 (耗时 {time.monotonic() - started_at:.2f}s)。", LogLevel.INFO)
+        else:
+            self._apply_fetched_config(config_data)
+            with self._lock:
+                self._cache_source_url = url
+                self._cache_validators = validators
             self.logger.log(
-                "所有远程配置源均获取失败。将继续使用当前缓存的或默认的远程配置。", LogLevel.WARNING
+                f"远程配置已从 {url} 更新 (耗时 {time.monotonic() - started_at:.2f}s)。", LogLevel.INFO
             )
-            return False
+        self._save_disk_cache()
         return True
 
-    def get_config_value(self, keys: List[str], default: Any = None) -> Any:
-        with self._lock:
-            config_dict = self._config
+    def _fetch_from_mirror(self, fetch: "_HedgedFetch", index: int, url: str) -> None:
+        """在独立线程中按重试策略请求单个配置源，成功时把结果交给 fetch。"""
         try:
-            for key in keys:
-                config_dict = config_dict[key]
-            return config_dict
-        except (KeyError, TypeError):
-            return default
+            if index > 0 and fetch.wait_for_hedge(index, AppConstants.REMOTE_CONFIG_HEDGE_DELAY_SECONDS * index):
+                return # 已有其他源成功或应用停止
+            max_retries_per_url = AppConstants.REMOTE_CONFIG_MAX_RETRIES_PER_URL
+            for attempt in range(1, max_retries_per_url + 1):
+                if fetch.is_cancelled() or not self.application_run_event.is_set():
+                    return
+                fetch_result = self._fetch_from_url(url, attempt)
+                if fetch_result is not None:
+                    fetch.submit(url, fetch_result)
+                    return
+                fetch.start_next_mirror() # 本源已失败一次，备用源无需再等对冲延迟
+                if attempt < max_retries_per_url and fetch.sleep(index, 2**attempt):
+                    return
+        finally:
+            fetch.mirror_finished()
+
+    @staticmethod
+    def _merge_with_defaults(config_data: Dict[str, Any]) -> Dict[str, Any]:
+        """与默认配置做一层合并。只复制被覆盖的那一层，默认值本身不会被修改，无需深拷贝。"""
+        merged_config = dict(AppConstants.DEFAULT_REMOTE_CONFIG)
+        for key, value in config_data.items():
+            if key in merged_config and isinstance(merged_config[key], dict) and isinstance(value, dict):
+                merged_config[key] = {**merged_config[key], **value}
+            else:
+                merged_config[key] = value
+        return merged_config
+
+    def _apply_fetched_config(self, config_data: Dict[str, Any]) -> None:
+        self._publish_snapshot(RemoteConfigSnapshot(self._merge_with_defaults(config_data)), datetime.now()) # 在锁外构建，锁内只替换引用
+
+    def _publish_snapshot(self, snapshot: RemoteConfigSnapshot, fetched_at: datetime) -> None:
+        with self._lock:
+            device_id = self._watched_device_id
+            new_decision = snapshot.access_decision_for(device_id) if device_id is not None else None
+            changed = new_decision is not None and new_decision != self._access_decision
+            self._snapshot = snapshot
+            self._access_decision = new_decision
+            self._last_successful_fetch_time = fetched_at
+            listeners = list(self._access_listeners) if changed else []
+        for listener in listeners:
+            try:
+                listener(new_decision) # type: ignore[arg-type]
+            except Exception as e:
+                self.logger.log(f"设备访问状态回调执行出错: {e}", LogLevel.ERROR, exc_info=True)
+
+    def watch_device_access(
+        self, device_id: str, listener: Optional[Callable[[DeviceAccessDecision], None]] = None
+    ) -> DeviceAccessDecision:
+        """
+        为 device_id 预先计算访问决定并返回。此后每次配置更新时重新计算一次，
+        决定发生变化时调用 listener (在执行获取的线程中调用)。
+        """
+        with self._lock:
+            if device_id != self._watched_device_id or self._access_decision is None:
+                self._watched_device_id = device_id
+                self._access_decision = self._snapshot.access_decision_for(device_id)
+            if listener is not None:
+                self._access_listeners.append(listener)
+            return self._access_decision
+
+    def get_access_decision(self) -> Optional[DeviceAccessDecision]:
+        """watch_device_access 所监视设备的当前访问决定，未监视任何设备时为 None。"""
+        return self._access_decision
+
+    def get_snapshot(self) -> RemoteConfigSnapshot:
+        """当前远程配置快照。快照不可变，需要多次读取且要求前后一致时应先取一次快照再读。"""
+        return self._snapshot
+
+    def get_config_value(self, keys: List[str], default: Any = None) -> Any:
+        return self._snapshot.get(tuple(keys), default)
 
     def is_cache_valid(self) -> bool:
         if not self._last_successful_fetch_time:
@@ -135,61 +312,116 @@ class RemoteConfigManager:
             self.logger.log("远程配置缓存仍然有效。", LogLevel.DEBUG)
     
     def get_forced_update_below_version(self) -> str:
-        return str(
-            self.get_config_value(
-                ["script_version_control", "forced_update_below_version"], "0.0.0"
-            )
-        )
+        return self._snapshot.forced_update_below_version
+
+    def is_forced_update_required(self) -> bool:
+        """已启用强制更新且当前脚本版本低于要求的最低版本。"""
+        return self._snapshot.forced_update_required
+
+    def get_latest_stable_version(self) -> str:
+        return self._snapshot.latest_stable_version
+
+    def is_optional_update_available(self) -> bool:
+        return self._snapshot.optional_update_available
 
     def is_globally_disabled(self) -> bool:
-        return bool(self.get_config_value(["access_control", "global_disable"], False))
+        return self._snapshot.global_disable
 
     def is_device_allowed(self, device_id: str) -> bool:
-        whitelist = self.get_config_value(["access_control", "device_whitelist"], [])
-        blacklist = self.get_config_value(["access_control", "device_blacklist"], [])
-        if isinstance(whitelist, list) and whitelist:
-            return device_id in whitelist
-        if isinstance(blacklist, list) and device_id in blacklist:
-            return False
-        return True
+        decision = self._access_decision
+        if decision is not None and decision.device_id == device_id:
+            return decision.reason != DeviceAccessDecision.DEVICE_BLOCKED
+        return self._snapshot.is_device_allowed(device_id)
 
     def get_announcement(self) -> Optional[Dict[str, Any]]:
-        announcement_config = self.get_config_value(["announcement"], {})
-        if (
-            isinstance(announcement_config, dict)
-            and announcement_config.get("enabled")
-            and announcement_config.get("message")
-        ):
-            return {
-                "id": str(announcement_config.get("id", "")),
-                "title": str(announcement_config.get("title", "")).strip(),
-                "message": str(announcement_config.get("message", "")),
-                "enabled": True
-            }
-        return None
+        announcement = self._snapshot.announcement
+        return dict(announcement) if announcement is not None else None
 
     def get_setting(self, setting_name: str, default: Any) -> Any:
-        return self.get_config_value(["settings", setting_name], default)
+        return self._snapshot.get(("settings", setting_name), default)
 
     def is_forced_updates_enabled(self) -> bool:
-        return bool(self.get_config_value(["script_version_control", "enable_forced_updates"], False))
+        return self._snapshot.forced_updates_enabled
 
     def get_optional_update_message_template(self) -> Optional[str]:
-        msg = self.get_config_value(["script_version_control", "optional_update_message"], None)
-        if msg and isinstance(msg, str) and msg.strip():
-            return msg.strip()
-        return None
+        return self._snapshot.optional_update_message_template
 
     def get_global_disable_message(self) -> str:
-        default_msg = "Access to the service is currently disabled globally."
-        return str(self.get_config_value(["access_control", "global_disable_message"], default_msg))
+        return self._snapshot.global_disable_message
 
     def get_device_block_message_template(self) -> str:
-        default_msg = "Your device ({device_id}) is not permitted to use this service."
-        return str(self.get_config_value(["access_control", "device_block_message_template"], default_msg))
+        return self._snapshot.device_block_message_template
 
     def get_forced_update_reason(self) -> Optional[str]:
-        reason = self.get_config_value(["script_version_control", "forced_update_reason"])
-        if reason and isinstance(reason, str) and reason.strip():
-            return reason.strip()
-        return None
\ No newline at end of file
+        return self._snapshot.forced_update_reason
+
+class _HedgedFetch:
+    """一次 fetch_config 调用中各配置源线程共享的状态：第一个有效结果、取消标志和对冲启动信号。"""
+
+    def __init__(self, application_run_event: threading.Event, mirror_count: int):
+        self._lock = threading.Lock()
+        self._result: Optional[Tuple[str, Any]] = None
+        self._pending_mirrors = mirror_count
+        self._cancelled = threading.Event()
+        self._start_next_mirror = threading.Event()
+        self._result_wait = CancellableWait(application_run_event) # 应用停止时也会唤醒等待结果的调用方
+        # 每个源线程各自的等待 (对冲延迟、重试间隔)，取消、对冲提前开始或应用停止时被唤醒
+        self._mirror_waits = [CancellableWait(application_run_event) for _ in range(mirror_count)]
+        self._application_run_event = application_run_event
+
+    def submit(self, url: str, fetch_result: Any) -> None:
+        with self._lock:
+            if self._result is not None or self._cancelled.is_set():
+                return # 已有更快的源，丢弃
+            self._result = (url, fetch_result)
+        self._result_wait.wake()
+
+    def mirror_finished(self) -> None:
+        with self._lock:
+            self._pending_mirrors -= 1
+        self.start_next_mirror()
+        self._result_wait.wake()
+
+    def start_next_mirror(self) -> None:
+        self._start_next_mirror.set()
+        self._wake_mirrors()
+
+    def _wake_mirrors(self) -> None:
+        for mirror_wait in self._mirror_waits:
+            mirror_wait.wake()
+
+    def _wait_until(self, index: int, seconds: float, done: Callable[[], bool]) -> None:
+        """在第 index 个源的线程中等待最多 seconds 秒，done() 为真或应用停止时提前返回。"""
+        deadline = time.monotonic() + seconds
+        while not done() and self._application_run_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            self._mirror_waits[index].wait(remaining)
+
+    def wait_for_first_result(self) -> Optional[Tuple[str, Any]]:
+        while True:
+            with self._lock:
+                if self._result is not None or self._pending_mirrors <= 0:
+                    return self._result
+            if not self._application_run_event.is_set():
+                return None
+            self._result_wait.wait(AppConstants.REMOTE_CONFIG_REQUEST_TIMEOUT_SECONDS)
+
+    def wait_for_hedge(self, index: int, delay_seconds: float) -> bool:
+        """等待对冲延迟 (已有源请求失败时提前结束)。返回 True 表示无需再请求。"""
+        self._wait_until(index, delay_seconds, lambda: self._start_next_mirror.is_set() or self.is_cancelled())
+        return self.is_cancelled() or not self._application_run_event.is_set()
+
+    def sleep(self, index: int, seconds: float) -> bool:
+        """重试间隔，返回 True 表示已被取消或应用已停止。"""
+        self._wait_until(index, seconds, self.is_cancelled)
+        return self.is_cancelled() or not self._application_run_event.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+        self._start_next_mirror.set()
+        self._wake_mirrors()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set() or self._result is not None
@@ -0,0 +1,143 @@
+# app/config/remote_snapshot.py
+from types import MappingProxyType
+from typing import Any, Dict, FrozenSet, Mapping, Optional, Tuple
+
+from packaging.version import InvalidVersion, Version, parse as parse_version
+
+from app.constants import SCRIPT_VERSION
+
+_MISSING = object()
+
+
+def _freeze(value: Any) -> Any:
+    """递归转换为只读结构：dict -> MappingProxyType，list -> tuple。"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _flatten(mapping: Mapping[str, Any], prefix: Tuple[str, ...], out: Dict[Tuple[str, ...], Any]) -> None:
+    for key, value in mapping.items():
+        path = prefix + (key,)
+        out[path] = value
+        if isinstance(value, Mapping):
+            _flatten(value, path, out)
+
+
+def _parse_version_or_none(version_str: Any) -> Optional[Version]:
+    try:
+        return parse_version(str(version_str))
+    except (InvalidVersion, TypeError):
+        return None
+
+
+def _non_empty_str(value: Any) -> Optional[str]:
+    if value and isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def _id_set(value: Any) -> FrozenSet[str]:
+    if not isinstance(value, (list, tuple)):
+        return frozenset()
+    return frozenset(item for item in value if isinstance(item, str))
+
+
+class DeviceAccessDecision:
+    """某个设备在某份远程配置下是否允许使用服务 (随配置刷新计算一次)。"""
+
+    ALLOWED = "allowed"
+    GLOBAL_DISABLE = "global_disable"
+    DEVICE_BLOCKED = "device_blocked"
+
+    def __init__(self, device_id: str, reason: str, message: str = ""):
+        self.device_id = device_id
+        self.reason = reason
+        self.message = message
+
+    @property
+    def allowed(self) -> bool:
+        return self.reason == self.ALLOWED
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DeviceAccessDecision):
+            return NotImplemented
+        return (self.device_id, self.reason, self.message) == (other.device_id, other.reason, other.message)
+
+    def __hash__(self) -> int:
+        return hash((self.device_id, self.reason, self.message))
+
+    def __repr__(self) -> str:
+        return f"DeviceAccessDecision(device_id={self.device_id!r}, reason={self.reason!r})"
+
+
+class RemoteConfigSnapshot:
+    """
+    某一时刻的远程配置，构建后不再修改。
+
+    RemoteConfigManager 每次获取成功后构建一个新快照并整体替换引用，读取方无需加锁；
+    所有路径预先展开为 {键路径元组: 值}，常用字段 (访问控制名单、版本比较结果等) 在构建时计算好。
+    """
+
+    def __init__(self, merged_config: Dict[str, Any]):
+        self.source: Dict[str, Any] = merged_config # 仅用于写入磁盘缓存，不对外暴露
+        self.values: Dict[Tuple[str, ...], Any] = {}
+        _flatten(_freeze(merged_config), (), self.values)
+
+        self.global_disable: bool = bool(self.get(("access_control", "global_disable"), False))
+        self.global_disable_message: str = str(self.get(("access_control", "global_disable_message"),
+                                                        "Access to the service is currently disabled globally."))
+        self.device_whitelist: FrozenSet[str] = _id_set(self.get(("access_control", "device_whitelist")))
+        self.device_blacklist: FrozenSet[str] = _id_set(self.get(("access_control", "device_blacklist")))
+        self.device_block_message_template: str = str(self.get(("access_control", "device_block_message_template"),
+                                                               "Your device ({device_id}) is not permitted to use this service."))
+
+        self.forced_updates_enabled: bool = bool(self.get(("script_version_control", "enable_forced_updates"), False))
+        self.forced_update_below_version: str = str(self.get(("script_version_control", "forced_update_below_version"), "0.0.0"))
+        self.forced_update_reason: Optional[str] = _non_empty_str(self.get(("script_version_control", "forced_update_reason")))
+        self.optional_update_message_template: Optional[str] = _non_empty_str(self.get(("script_version_control", "optional_update_message")))
+        self.latest_stable_version: str = str(self.get(("latest_stable_version",), "0.0.0") or "0.0.0")
+
+        current_version = parse_version(SCRIPT_VERSION)
+        forced_below = _parse_version_or_none(self.forced_update_below_version)
+        latest_stable = _parse_version_or_none(self.latest_stable_version)
+        self.forced_update_required: bool = (self.forced_updates_enabled and self.forced_update_below_version != "0.0.0"
+                                             and forced_below is not None and current_version < forced_below)
+        self.optional_update_available: bool = (self.latest_stable_version != "0.0.0"
+                                                and latest_stable is not None and current_version < latest_stable)
+
+        self.announcement: Optional[Mapping[str, Any]] = self._build_announcement()
+
+    def get(self, keys: Tuple[str, ...], default: Any = None) -> Any:
+        value = self.values.get(keys, _MISSING)
+        return default if value is _MISSING else value
+
+    def is_device_allowed(self, device_id: str) -> bool:
+        if self.device_whitelist:
+            return device_id in self.device_whitelist
+        return device_id not in self.device_blacklist
+
+    def access_decision_for(self, device_id: str) -> DeviceAccessDecision:
+        if self.global_disable:
+            return DeviceAccessDecision(device_id, DeviceAccessDecision.GLOBAL_DISABLE, self.global_disable_message)
+        if not self.is_device_allowed(device_id):
+            return DeviceAccessDecision(device_id, DeviceAccessDecision.DEVICE_BLOCKED,
+                                        self.device_block_message_template.format(device_id=device_id))
+        return DeviceAccessDecision(device_id, DeviceAccessDecision.ALLOWED)
+
+    def _build_announcement(self) -> Optional[Mapping[str, Any]]:
+        announcement_config = self.get(("announcement",))
+        if (
+            isinstance(announcement_config, Mapping)
+            and announcement_config.get("enabled")
+            and announcement_config.get("message")
+        ):
+            return MappingProxyType({
+                "id": str(announcement_config.get("id", "")),
+                "title": str(announcement_config.get("title", "")).strip(),
+                "message": str(announcement_config.get("message", "")),
+                "enabled": True
+            })
+        return None
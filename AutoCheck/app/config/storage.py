@@ -2,7 +2,7 @@
 import json
 import os # JsonConfigStorage 使用了 AppConstants.CONFIG_FILE，但最好路径由外部传入
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 
 # AppConstants.CONFIG_FILE 的使用需要调整。
 # JsonConfigStorage 的构造函数应接收 config_path 参数，而不是硬编码依赖 AppConstants
@@ -36,3 +36,39 @@ class JsonConfigStorage(ConfigStorageInterface):
         except IOError as e:
             raise ValueError(f"保存配置文件 {self.config_path} 时出错: {e}")
 
+
+
+class JsonRemoteConfigCache:
+    """
+    远程配置的磁盘缓存 (与 data.json 放在一起)。
+
+    保存最近一次成功获取的远程配置、获取时间和条件请求校验信息 (ETag / Last-Modified)；
+    先写临时文件再替换，进程中途退出也不会留下半个文件。
+    """
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """读取缓存，文件不存在或已损坏时返回 None。"""
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError, OSError):
+            return None
+        return entry if isinstance(entry, dict) else None
+
+    def save(self, entry: Dict[str, Any]) -> None:
+        temp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise ValueError(f"保存远程配置缓存 {self.cache_path} 时出错: {e}")
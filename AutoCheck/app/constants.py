@@ -12,8 +12,21 @@ class AppConstants:
         r"remember_student_59ba36addc2b2f9401580f014c7f58ea4e30989d=[^;]+"
     )
     LOG_DIR: str = "logs" # 日志目录，相对于项目根目录
+    HEADLESS_CLI_FLAGS: Tuple[str, ...] = ("--headless", "--daemon") # 无头/服务模式：不输出控制台内容，不读取命令与交互输入
+    DEFAULT_FILE_LOG_LEVEL: str = "DEBUG" # 文件日志级别，可用 --file-log-level=INFO 覆盖
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0 # 日志写入线程最长攒批时间
+    LOG_FLUSH_BATCH_SIZE: int = 200 # 攒够这么多条日志立即写入
+    LOG_CLOSE_TIMEOUT_SECONDS: float = 5.0 # 关闭时等待剩余日志写完的最长时间
+    DEFAULT_LOG_ROTATE_MAX_BYTES: int = 10 * 1024 * 1024 # 日志文件超过该大小时轮转，0 表示不按大小轮转
+    DEFAULT_LOG_ROTATE_DAILY: bool = False # 是否在日期变化时轮转
+    DEFAULT_LOG_BACKUP_COUNT: int = 10 # 保留的历史日志个数
+    DEFAULT_LOG_COMPRESS_BACKUPS: bool = True # 是否在后台用 gzip 压缩历史日志
+    DEFAULT_STRUCTURED_LOG_ENABLED: bool = False # 是否额外输出结构化事件日志 (JSONL)
+    STRUCTURED_LOG_FILE_SUFFIX: str = ".events.jsonl" # 结构化事件日志文件名 = APP_NAME + 该后缀
     CONFIG_FILE: str = "data.json" # 主配置文件名，相对于项目根目录
     DEVICE_ID_FILE: str = "device_id.txt"  # Stores unique device ID, 相对于项目根目录
+    REMOTE_CONFIG_CACHE_FILE: str = "remote_config_cache.json" # 远程配置磁盘缓存，与 data.json 同目录
+    SIGN_STATE_DB_FILE: str = "sign_state.db" # 已签到/无效/已通知任务的持久化记录 (SQLite)，与 data.json 同目录
     DEFAULT_SEARCH_INTERVAL: int = 60
     USER_AGENT_TEMPLATE: str = (
         "Mozilla/5.0 (Linux; Android {android_version}; {device} Build/{build_number}; wv) "
@@ -129,10 +142,62 @@ class AppConstants:
     GITEE_DATA_UPLOAD_FILENAME: str = "device_activity_log.jsonl"
 
     # Intervals for Background Tasks
-    REMOTE_CONFIG_CACHE_TTL_SECONDS: int = 300  # 5 minutes
+    REMOTE_CONFIG_CACHE_TTL_SECONDS: int = 300  # 5 minutes；磁盘缓存在有效期内重启时不再请求远程配置
+    REMOTE_CONFIG_REQUEST_TIMEOUT_SECONDS: float = 10.0 # 单次远程配置请求超时
+    REMOTE_CONFIG_MAX_RETRIES_PER_URL: int = 3 # 每个配置源的最大尝试次数
+    REMOTE_CONFIG_HEDGE_DELAY_SECONDS: float = 1.5 # 主源未在该时间内返回时并行请求备用源 (0 表示同时请求)
     DEFAULT_REMOTE_CONFIG_REFRESH_INTERVAL_SECONDS: int = 900  # 15 minutes
     DEFAULT_DATA_UPLOAD_INTERVAL_SECONDS: int = 3600  # 1 hour
 
+    # 后台任务调度 (单个调度线程 + 少量工作线程)
+    DEFAULT_BG_JOB_MAX_WORKERS: int = 2
+    DEFAULT_BG_JOB_JITTER_SECONDS: float = 5.0        # 每次执行时间的随机推迟上限，避免多个任务同时触发
+    DEFAULT_BG_JOB_IDLE_WAIT_SECONDS: float = 3600.0  # 没有任务时调度线程的最长等待
+
+    # HTTP 连接池 (SignService 的长连接会话)
+    DEFAULT_HTTP_POOL_CONNECTIONS: int = 4   # 缓存的主机连接池数量
+    DEFAULT_HTTP_POOL_MAXSIZE: int = 10      # 每个主机连接池保留的最大连接数
+    DEFAULT_HTTP_POOL_BLOCK: bool = False    # 连接池耗尽时是否阻塞等待空闲连接
+    DEFAULT_HTTP_KEEP_ALIVE: bool = True
+
+    # 签到周期内并发获取各班级签到列表的最大线程数 (1 表示按顺序获取)
+    DEFAULT_FETCH_CONCURRENCY: int = 4
+    FETCH_STOP_CHECK_INTERVAL_SECONDS: float = 0.5 # 并发获取期间检查应用停止信号的间隔
+    # 签到周期执行引擎: "threaded" (线程池 + requests) 或 "async" (asyncio + aiohttp，需安装 aiohttp)
+    DEFAULT_EXECUTION_MODE: str = "threaded"
+    # 签到页面 HTML 解析后端: "auto" (优先 lxml，未安装时回退), "lxml" 或 "html.parser"
+    DEFAULT_HTML_PARSER: str = "auto"
+    # 仅为签到卡片容器和 punch_gps_* 输入框建立节点，跳过页面其余部分
+    DEFAULT_RESTRICTED_PARSE: bool = True
+    # 按响应内容哈希缓存各班级的解析结果，页面未变化时跳过解析和展示
+    DEFAULT_PAGE_CACHE_ENABLED: bool = True
+    # 对签到页面使用 ETag / Last-Modified 条件请求 (依赖页面缓存)；连续未命中达到上限后对该主机自动关闭
+    DEFAULT_CONDITIONAL_GET_ENABLED: bool = True
+    CONDITIONAL_GET_MAX_MISSES: int = 3
+    # 任务状态记录在任务结束时间之后再保留的秒数；无法得知结束时间的任务保留 SIGN_STATE_DEFAULT_TTL_SECONDS。
+    # 结束时间按本机时区解析，留出足够余量以免本机时钟/时区与服务器不同或任务结束后仍留在列表中时被反复处理
+    SIGN_STATE_EXPIRY_GRACE_SECONDS: int = 12 * 60 * 60
+    SIGN_STATE_DEFAULT_TTL_SECONDS: int = 24 * 60 * 60
+    SIGN_STATE_PURGE_INTERVAL_SECONDS: int = 60 * 60 # 长时间运行时定期清除过期的任务状态记录
+
+    # 签到响应分类短语 (正则片段，普通文字可直接使用)，按分类优先级排列；
+    # 远程配置 settings.sign_response_phrases 中的同名分类会追加到这里 (按普通文字匹配，正则需放在其 "regex" 键下)，无需改代码即可适配新的提示文字
+    SIGN_RESPONSE_PHRASES: Dict[str, List[str]] = {
+        "password": ["密码错误", "请输入密码"],
+        "already_signed": ["已签到过啦", "您已签到", "签过啦", "打卡成功(?=.*重复)", "重复(?=.*打卡成功)"],
+        "success": ["成功"],
+        "not_in_time": ["不在签到时间", "还未开始", "已结束", "考勤未开始"],
+        "out_of_range": ["不在签到范围", "距离太远"],
+        "invalid_task": ["不存在", "参数错误", "无效的参数"],
+    }
+
+    # 自适应轮询: 按班级的任务状态计算下次检索时间 (默认关闭，使用固定的 time 间隔)
+    DEFAULT_ADAPTIVE_POLLING: bool = False
+    DEFAULT_ADAPTIVE_MIN_INTERVAL_SECONDS: int = 5       # 任务即将开始/结束时的密集检索间隔
+    DEFAULT_ADAPTIVE_MAX_INTERVAL_SECONDS: int = 600     # 空闲班级退避的间隔上限
+    DEFAULT_ADAPTIVE_BACKOFF_FACTOR: float = 2.0
+    DEFAULT_ADAPTIVE_NEAR_WINDOW_SECONDS: int = 60       # 距任务结束多少秒内进入密集检索
+
     # SCHOOL_DATA_FILE 路径相对于项目根目录下的 resources 文件夹
     SCHOOL_DATA_FILE: str = os.path.join("resources", "school_zones.yaml")
     MAX_RANDOM_OFFSET_METERS: float = 50.0 # 最大随机偏移距离（米）
@@ -152,6 +217,7 @@ class AppConstants:
         "settings": {
             "config_refresh_interval_seconds": DEFAULT_REMOTE_CONFIG_REFRESH_INTERVAL_SECONDS,
             "data_upload_interval_seconds": DEFAULT_DATA_UPLOAD_INTERVAL_SECONDS,
+            "sign_response_phrases": {}, # 追加的签到响应分类短语 (按普通文字匹配)，格式同 SIGN_RESPONSE_PHRASES；正则需放在 "regex" 键下
             # 可以在此为 User-Agent 池添加默认值，但原脚本似乎没有在这里定义，而是在RemoteConfigManager中处理
              "user_agent_pool": {
                 "enabled": False, # 默认不启用远程UA池
@@ -1,16 +1,26 @@
 # app/logger_setup.py
+import atexit
+import glob
+import json
+import gzip
 import os
+import shutil
+import queue
 import sys
+import threading
+import time
 import traceback
 from enum import Enum, auto
 from abc import ABC, abstractmethod
-from datetime import datetime
+from datetime import date, datetime
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple, Union
 import colorama # 确保导入了 colorama
 from colorama import Fore, Style
 
 # 从我们新创建的 app.constants 模块导入 AppConstants
 # FileLogger 类会使用 AppConstants.LOG_DIR
 from app.constants import AppConstants
+from app.utils.console_utils import ConsoleCapabilities, get_console_capabilities
 
 # 直接初始化 colorama，它能处理重复调用
 # 如果在其他地方也初始化了，autoreset=True 通常能保证行为一致
@@ -23,14 +33,141 @@ class LogLevel(Enum):
     ERROR = auto()
     CRITICAL = auto()
 
+# 日志消息可以是字符串，也可以是返回字符串的无参可调用对象 (延迟构建，仅在该级别会被输出时才调用)
+LogMessage = Union[str, Callable[[], str]]
+
+def parse_log_level(name: Optional[str], default: LogLevel) -> LogLevel:
+    """按名称 (不区分大小写) 解析日志级别，无效时返回 default。"""
+    if not name:
+        return default
+    return LogLevel.__members__.get(name.strip().upper(), default)
+
 class LoggerInterface(ABC):
     @abstractmethod
-    def log(self, message: str, level: LogLevel = LogLevel.INFO, exc_info: bool = False) -> None:
+    def log(self, message: LogMessage, level: LogLevel = LogLevel.INFO, exc_info: bool = False) -> None:
+        pass
+
+    def is_enabled(self, level: LogLevel) -> bool:
+        """该级别的日志是否会被输出到任一目标。调用方可据此跳过昂贵的日志内容构建。"""
+        return True
+
+    def log_event(self, event: str, level: LogLevel = LogLevel.INFO, **fields: Any) -> None:
+        """记录一条结构化事件 (供机器处理，如 cycle/class_id/task_id/duration_ms)。默认无操作。"""
         pass
 
+    def close(self) -> None:
+        """释放日志资源 (如写入线程、打开的文件)。默认无操作。"""
+        pass
+
+class _RotatingLogFile:
+    """
+    由写入线程使用的单个日志文件：保持文件打开，按大小/日期轮转为带时间戳的归档，
+    并在后台压缩、清理多余的归档。轮转设置从所属的 FileLogger 读取。
+    """
+
+    def __init__(self, path: str, owner: "FileLogger"):
+        self.path = path
+        self.owner = owner
+        self._file: Optional[IO[str]] = None
+        self._file_date: Optional[date] = None # 当前文件开始写入的日期，用于按天轮转
+
+    def write(self, entries: List[str]) -> None:
+        """写入并 flush 一批日志，文件句柄在两次写入之间保持打开。"""
+        if not entries:
+            return
+        try:
+            if self._file is None:
+                self._open()
+            if self._should_rotate():
+                self._rotate()
+                self._open()
+            self._file.writelines(entries)
+            self._file.flush()
+        except (IOError, OSError, ValueError) as e:
+            self.owner._report_write_error(self.path, e)
+            self.close() # 下一批重新打开
+
+    def write_sync(self, entries: List[str]) -> None:
+        """不经过写入线程、每次打开文件追加 (写入线程不可用或已关闭时使用)。"""
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.writelines(entries)
+        except IOError as e:
+            self.owner._report_write_error(self.path, e)
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a", encoding="utf-8")
+        try:
+            # 已存在的文件按其最后修改日期计算，这样跨天重启后也会轮转
+            self._file_date = date.fromtimestamp(os.path.getmtime(self.path)) if self._file.tell() > 0 else date.today()
+        except OSError:
+            self._file_date = date.today()
+
+    def _should_rotate(self) -> bool:
+        if self._file is None:
+            return False
+        if self.owner.rotate_max_bytes and self._file.tell() >= self.owner.rotate_max_bytes:
+            return True
+        return self.owner.rotate_daily and self._file_date is not None and self._file_date != date.today()
+
+    def _rotate(self) -> None:
+        """把当前文件改名为带时间戳的归档，然后在后台压缩并清理多余的归档。"""
+        self.close()
+        archive_path = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+        suffix = 1
+        while os.path.exists(archive_path) or os.path.exists(archive_path + ".gz"):
+            archive_path = f"{self.path}.{datetime.now().strftime('%Y%m%d-%H%M%S')}-{suffix}"
+            suffix += 1
+        try:
+            os.replace(self.path, archive_path)
+        except OSError as e:
+            self.owner._report_write_error(self.path, e)
+            return
+
+        if self.owner.compress_backups:
+            threading.Thread(target=self._compress_and_prune, args=(archive_path,), name="LogCompressor", daemon=True).start()
+        else:
+            self._prune_archives()
+
+    def _compress_and_prune(self, archive_path: str) -> None:
+        try:
+            with open(archive_path, "rb") as src, gzip.open(archive_path + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(archive_path)
+        except OSError as e:
+            self.owner.log(f"压缩历史日志 {archive_path} 失败: {e}", LogLevel.WARNING) # 在后台线程中，经由日志器输出 (无头模式下只写文件)
+        self._prune_archives()
+
+    def _prune_archives(self) -> None:
+        # 归档文件名以时间戳结尾，按名称排序即按时间排序；同一归档的 .gz 与未压缩文件算作一个
+        archives = sorted(glob.glob(glob.escape(self.path) + ".*"))
+        by_name: Dict[str, List[str]] = {}
+        for path in archives:
+            by_name.setdefault(path[:-3] if path.endswith(".gz") else path, []).append(path)
+        backup_count = self.owner.backup_count
+        stale_names = sorted(by_name)[:-backup_count] if backup_count else sorted(by_name)
+        for name in stale_names:
+            for path in by_name[name]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def close(self) -> None:
+        if self._file is not None:
+            try:
+                self._file.close()
+            except (IOError, OSError):
+                pass
+            self._file = None
+
 class FileLogger(LoggerInterface):
+    # 队列中的特殊标记：要求写入线程立即 flush
+    _FLUSH_NOW = object()
+
     def __init__(
-        self, log_file: str = "auto_check.log", console_level: LogLevel = LogLevel.INFO
+        self, log_file: str = "auto_check.log", console_level: LogLevel = LogLevel.INFO,
+        file_level: LogLevel = LogLevel.DEBUG, console: Optional[ConsoleCapabilities] = None
     ):
         # AppConstants.LOG_DIR 是 "logs"
         # self.log_file 将是 "logs/auto_check.log" (相对于项目根目录)
@@ -39,6 +176,11 @@ class FileLogger(LoggerInterface):
         self.log_file = os.path.join(AppConstants.LOG_DIR, log_file)
         self._setup_log_directory()
         self.console_level = console_level
+        self.file_level = file_level
+        # 控制台能力只在启动时检测一次；控制台不可用 (非 TTY 或 --silent) 时不参与级别判断
+        self.console = console if console is not None else get_console_capabilities()
+        self._console_output = self.console.output_enabled
+        self._min_enabled_value = min(console_level.value, file_level.value) if self._console_output else file_level.value
         self.color_map = {
             LogLevel.DEBUG: Fore.CYAN,
             LogLevel.INFO: Fore.GREEN,
@@ -54,6 +196,41 @@ class FileLogger(LoggerInterface):
             LogLevel.CRITICAL: "🚨",
         }
 
+        # 文件写入由单独的线程完成：log() 只负责入队，写入线程保持文件打开并批量 flush
+        self._queue: "queue.Queue[Any]" = queue.Queue() # 元素为 (目标文件, 日志行)
+        self._text_file = _RotatingLogFile(self.log_file, self)
+        self._events_file: Optional[_RotatingLogFile] = None # 结构化事件 (JSONL)，通过 enable_structured_log() 开启
+        self.component = AppConstants.APP_NAME
+        # 轮转设置，默认值来自 AppConstants，加载本地配置后可通过 configure_rotation() 修改
+        self.rotate_max_bytes = AppConstants.DEFAULT_LOG_ROTATE_MAX_BYTES
+        self.rotate_daily = AppConstants.DEFAULT_LOG_ROTATE_DAILY
+        self.backup_count = AppConstants.DEFAULT_LOG_BACKUP_COUNT
+        self.compress_backups = AppConstants.DEFAULT_LOG_COMPRESS_BACKUPS
+        self._closed = False
+        self._writer_thread: Optional[threading.Thread] = None
+        self._start_writer_thread()
+        atexit.register(self.close) # sys.exit() 等未经过正常关闭流程的退出也能写完剩余日志
+
+    def _start_writer_thread(self) -> None:
+        thread = threading.Thread(target=self._writer_loop, name="LogWriter", daemon=True)
+        try:
+            thread.start()
+            self._writer_thread = thread
+        except RuntimeError as e:
+            print(f"{Fore.YELLOW}启动日志写入线程失败，改为同步写入: {e}{Style.RESET_ALL}")
+
+    def configure_rotation(self, max_bytes: int, daily: bool, backup_count: int, compress: bool) -> None:
+        """设置日志轮转：超过 max_bytes (0 为不限) 或日期变化 (daily) 时，把当前文件改名归档，只保留最近 backup_count 个。"""
+        self.rotate_max_bytes = max(0, max_bytes)
+        self.rotate_daily = daily
+        self.backup_count = max(0, backup_count)
+        self.compress_backups = compress
+
+    def enable_structured_log(self, file_name: str) -> None:
+        """开启结构化事件日志：log_event() 的每个事件以一行 JSON 写入 LOG_DIR 下的 file_name。"""
+        if self._events_file is None:
+            self._events_file = _RotatingLogFile(os.path.join(AppConstants.LOG_DIR, file_name), self)
+
     def _setup_log_directory(self) -> None:
         # AppConstants.LOG_DIR 定义为 "logs"
         # 这个方法会在项目根目录下创建 "logs" 文件夹 (如果不存在)
@@ -66,7 +243,17 @@ class FileLogger(LoggerInterface):
                 print(f"创建日志目录失败 ({AppConstants.LOG_DIR}): {e}")
 
 
-    def log(self, message: str, level: LogLevel = LogLevel.INFO, exc_info: bool = False) -> None:
+    def is_enabled(self, level: LogLevel) -> bool:
+        return level.value >= self._min_enabled_value
+
+    def log(self, message: LogMessage, level: LogLevel = LogLevel.INFO, exc_info: bool = False) -> None:
+        if level.value < self._min_enabled_value:
+            return # 控制台和文件都不输出该级别，连消息都不必构建
+        if callable(message):
+            try:
+                message = str(message())
+            except Exception as e:
+                message = f"<构建日志消息失败: {e}>"
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry_message = message # 保存原始消息用于控制台
 
@@ -77,23 +264,92 @@ class FileLogger(LoggerInterface):
 
         log_entry_file = f"[{timestamp}] [{level.name}] {message}\n"
 
-        # 控制台输出逻辑
-        if level.value >= self.console_level.value:
-            color = self.color_map.get(level, Fore.WHITE)
+        # 控制台输出逻辑 (非 TTY 或 --silent 时整段跳过，不拼接颜色字符串)
+        if self._console_output and level.value >= self.console_level.value:
             icon = self.icon_map.get(level, "")
-
-            # 检查 stdout 是否是 TTY (终端) 以及是否需要静默输出
-            # "--silent" 的检查应该在更上层控制 console_level，这里简化
-            if sys.stdout.isatty() and "--silent" not in sys.argv:
-                # 之前的 \r\033[K 在多行日志或多线程日志下可能会导致显示混乱
-                # 直接打印通常更安全，让终端处理换行
+            # 之前的 \r\033[K 在多行日志或多线程日志下可能会导致显示混乱
+            # 直接打印通常更安全，让终端处理换行
+            if self.console.color:
+                color = self.color_map.get(level, Fore.WHITE)
                 print(f"{color}{icon} [{timestamp}] {log_entry_message}{Style.RESET_ALL}")
+            else:
+                print(f"{icon} [{timestamp}] {log_entry_message}")
+
+        if level.value < self.file_level.value:
+            return
+        self._enqueue(self._text_file, log_entry_file, flush_now=level.value >= LogLevel.ERROR.value) # 错误日志尽快落盘，便于排查崩溃
 
+    def log_event(self, event: str, level: LogLevel = LogLevel.INFO, **fields: Any) -> None:
+        events_file = self._events_file
+        if events_file is None or level.value < self.file_level.value:
+            return
+        record = {
+            "ts": datetime.now().isoformat(timespec="milliseconds"),
+            "level": level.name,
+            "component": fields.pop("component", self.component),
+            "event": event,
+        }
+        record.update((key, value) for key, value in fields.items() if value is not None)
         try:
-            with open(self.log_file, "a", encoding="utf-8") as f:
-                f.write(log_entry_file)
-        except IOError as e:
-            # 这是一个严重问题，如果日志都无法写入
-            print(
-                f"{Fore.RED}[{timestamp}] [CRITICAL_ERROR] 无法写入日志文件 {self.log_file}: {e}{Style.RESET_ALL}"
-            )
\ No newline at end of file
+            line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        except (TypeError, ValueError) as e:
+            line = json.dumps({"ts": record["ts"], "level": "ERROR", "component": record["component"], "event": event, "error": f"事件序列化失败: {e}"}, ensure_ascii=False) + "\n"
+        self._enqueue(events_file, line, flush_now=False)
+
+    def _enqueue(self, target: _RotatingLogFile, line: str, flush_now: bool) -> None:
+        if self._writer_thread is not None and not self._closed:
+            self._queue.put((target, line))
+            if flush_now:
+                self._queue.put(self._FLUSH_NOW)
+        else:
+            target.write_sync([line])
+
+    def _report_write_error(self, path: str, e: Exception) -> None:
+        # 这是一个严重问题，如果日志都无法写入
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(
+            f"{Fore.RED}[{timestamp}] [CRITICAL_ERROR] 无法写入日志文件 {path}: {e}{Style.RESET_ALL}"
+        )
+
+    def _write_pending(self, pending: List[Tuple[_RotatingLogFile, str]]) -> None:
+        by_target: Dict[_RotatingLogFile, List[str]] = {}
+        for target, line in pending:
+            by_target.setdefault(target, []).append(line)
+        for target, lines in by_target.items():
+            target.write(lines)
+
+    def _writer_loop(self) -> None:
+        flush_interval = AppConstants.LOG_FLUSH_INTERVAL_SECONDS
+        batch_size = AppConstants.LOG_FLUSH_BATCH_SIZE
+        pending: List[Tuple[_RotatingLogFile, str]] = []
+        batch_started_at = 0.0
+        while True:
+            # 有未写入的日志时最多等到本批次的 flush 时间点，否则一直阻塞到有新日志
+            timeout = max(0.0, batch_started_at + flush_interval - time.monotonic()) if pending else None
+            try:
+                entry = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                entry = self._FLUSH_NOW
+            if entry is None: # 关闭信号
+                break
+            if entry is not self._FLUSH_NOW:
+                if not pending:
+                    batch_started_at = time.monotonic()
+                pending.append(entry)
+            if entry is self._FLUSH_NOW or len(pending) >= batch_size or time.monotonic() - batch_started_at >= flush_interval:
+                self._write_pending(pending)
+                pending = []
+        self._write_pending(pending)
+        self._text_file.close()
+        if self._events_file is not None:
+            self._events_file.close()
+
+    def close(self) -> None:
+        """写完队列中剩余的日志并停止写入线程。之后的日志改为同步写入。"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_thread is not None:
+            self._queue.put(None)
+            self._writer_thread.join(timeout=AppConstants.LOG_CLOSE_TIMEOUT_SECONDS)
+            self._writer_thread = None
@@ -9,6 +9,7 @@ from .location_engine import LocationEngine
 from .qr_login_service import QRLoginSystem
 from .data_uploader import DataUploader
 from .sign_service import SignService
+from .sign_state_store import SignStateStore
 
 __all__ = [
     "DeviceManager",
@@ -16,4 +17,5 @@ __all__ = [
     "QRLoginSystem",
     "DataUploader",
     "SignService",
+    "SignStateStore",
 ]
\ No newline at end of file
@@ -136,19 +136,22 @@ class K8nInternalMessageNotifier(NotifierInterface):
         data_list.append((_PAYLOAD_KEYS["WX_TASK_DT"], wxtask_dt_str))
         data_list.append((_PAYLOAD_KEYS["VALID_DAYS"], kwargs.get("valid_days_str", "30"))) # 您示例中是 "3"
 
-        self.logger.log(f"K8nInternalMessageNotifier: 准备发送内部消息。URL: {url}", LogLevel.DEBUG)
-        log_headers = {k: (v[:30] + '...' if k.lower() == 'cookie' and len(v) > 30 else v) for k, v in headers.items()}
-        self.logger.log(f"K8nInternalMessageNotifier: Request Headers (部分): {log_headers}", LogLevel.DEBUG)
-        # 将 data_list 转换为字典进行日志记录可能更易读，但实际发送的是列表
-        self.logger.log(f"K8nInternalMessageNotifier: Request Payload (作为元组列表): {data_list}", LogLevel.DEBUG)
+        debug_enabled = self.logger.is_enabled(LogLevel.DEBUG)
+        if debug_enabled:
+            self.logger.log(f"K8nInternalMessageNotifier: 准备发送内部消息。URL: {url}", LogLevel.DEBUG)
+            log_headers = {k: (v[:30] + '...' if k.lower() == 'cookie' and len(v) > 30 else v) for k, v in headers.items()}
+            self.logger.log(f"K8nInternalMessageNotifier: Request Headers (部分): {log_headers}", LogLevel.DEBUG)
+            # 将 data_list 转换为字典进行日志记录可能更易读，但实际发送的是列表
+            self.logger.log(f"K8nInternalMessageNotifier: Request Payload (作为元组列表): {data_list}", LogLevel.DEBUG)
 
         try:
             # 当data是列表或元组时, requests会正确处理重复键名
             response = requests.post(url, headers=headers, data=data_list, timeout=15, allow_redirects=False)
 
-            self.logger.log(f"K8nInternalMessageNotifier: 响应状态码: {response.status_code}", LogLevel.DEBUG)
-            self.logger.log(f"K8nInternalMessageNotifier: 响应头: {response.headers}", LogLevel.DEBUG)
-            self.logger.log(f"K8nInternalMessageNotifier: 响应内容 (前500字符): {response.text[:500]}", LogLevel.DEBUG)
+            if debug_enabled:
+                self.logger.log(f"K8nInternalMessageNotifier: 响应状态码: {response.status_code}", LogLevel.DEBUG)
+                self.logger.log(f"K8nInternalMessageNotifier: 响应头: {response.headers}", LogLevel.DEBUG)
+                self.logger.log(f"K8nInternalMessageNotifier: 响应内容 (前500字符): {response.text[:500]}", LogLevel.DEBUG)
 
 
             if response.status_code == 302:
@@ -55,7 +55,7 @@ class QRLoginSystem:
                 response.raise_for_status()
                 self.session.cookies.clear()
                 self.session.cookies.update(temp_qr_session.cookies)
-                self.logger.log(f"k8n.cn为QR会话设置的Cookies已捕获: {temp_qr_session.cookies.get_dict()}", LogLevel.DEBUG)
+                self.logger.log(lambda: f"k8n.cn为QR会话设置的Cookies已捕获: {temp_qr_session.cookies.get_dict()}", LogLevel.DEBUG)
 
             if response.status_code == 200:
                 pattern = r'https://mp.weixin.qq.com/cgi-bin/showqrcode\?ticket=([a-zA-Z0-9_\-=@]+)'
@@ -65,7 +65,7 @@ class QRLoginSystem:
                     self.logger.log(f"成功获取二维码链接: {qr_code_url[:70]}...", LogLevel.INFO)
                     return qr_code_url
                 self.logger.log(f"未在页面响应中找到二维码链接。", LogLevel.ERROR)
-                self.logger.log(f"响应体(部分): {response.text[:1000]}", LogLevel.DEBUG)
+                self.logger.log(lambda: f"响应体(部分): {response.text[:1000]}", LogLevel.DEBUG)
             else:
                 self.logger.log(f"获取二维码链接请求失败，状态码: {response.status_code}", LogLevel.ERROR)
         except requests.RequestException as e:
@@ -201,7 +201,7 @@ class QRLoginSystem:
         gconfig_script_tag = soup.find("script", string=re.compile(r"var\s+gconfig\s*=\s*{"))
         if gconfig_script_tag and gconfig_script_tag.string:
             script_content = gconfig_script_tag.string 
-            self.logger.log(f"找到包含gconfig的script标签内容(部分): {script_content[:300]}", LogLevel.DEBUG)
+            self.logger.log(lambda: f"找到包含gconfig的script标签内容(部分): {script_content[:300]}", LogLevel.DEBUG)
 
             uid_match = re.search(r"uid\s*:\s*(\d+)", script_content)
             uname_match = re.search(r"uname\s*:\s*['\"](.*?)['\"]", script_content) 
@@ -303,7 +303,7 @@ class QRLoginSystem:
 
             if not user_info or not user_info.get("uid"):
                  self.logger.log("从服务器页面解析后，未能获得有效的用户信息(UID缺失)。", LogLevel.WARNING)
-                 self.logger.log(f"UID缺失时的HTML响应片段 (get_all_class_details):\n{response.text[:2000]}", LogLevel.DEBUG)
+                 self.logger.log(lambda: f"UID缺失时的HTML响应片段 (get_all_class_details):\n{response.text[:2000]}", LogLevel.DEBUG)
                  return {"status": "error", "message": "无法从服务器获取有效的用户信息 (UID 缺失)。", 
                          "user_info": user_info if user_info else {"uid":None, "uname":""}, 
                          "all_fetched_class_details": classes_info}
@@ -417,7 +417,7 @@ class QRLoginSystem:
         cookie_name_pattern_base = AppConstants.COOKIE_PATTERN.split("=",1)[0]
         if cookie_name_pattern_base not in full_cookie_str:
             self.logger.log(f"关键登录Cookie (如 '{cookie_name_pattern_base}=...') 在选择班级后未能正确序列化到Cookie字符串中!", LogLevel.CRITICAL)
-            self.logger.log(f"当前Session Cookies: {self.session.cookies.get_dict()}", LogLevel.DEBUG)
+            self.logger.log(lambda: f"当前Session Cookies: {self.session.cookies.get_dict()}", LogLevel.DEBUG)
             self.logger.log(f"序列化后的Cookie字符串: {full_cookie_str}", LogLevel.DEBUG)
             return {"status": "error", "message": f"关键登录Cookie '{cookie_name_pattern_base}' 在会话中丢失或未能序列化。",
                     "user_info": user_info, "all_fetched_class_details": classes_info}
@@ -0,0 +1,147 @@
+# app/services/sign_response_classifier.py
+import html
+import re
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.constants import AppConstants
+from app.logger_setup import LoggerInterface, LogLevel
+
+# 签到结果分类，顺序即优先级 (同一响应命中多个分类时取靠前的)
+SIGN_RESPONSE_PASSWORD = "password"
+SIGN_RESPONSE_ALREADY_SIGNED = "already_signed"
+SIGN_RESPONSE_SUCCESS = "success"
+SIGN_RESPONSE_NOT_IN_TIME = "not_in_time"
+SIGN_RESPONSE_OUT_OF_RANGE = "out_of_range"
+SIGN_RESPONSE_INVALID_TASK = "invalid_task"
+SIGN_RESPONSE_CATEGORIES = (
+    SIGN_RESPONSE_PASSWORD,
+    SIGN_RESPONSE_ALREADY_SIGNED,
+    SIGN_RESPONSE_SUCCESS,
+    SIGN_RESPONSE_NOT_IN_TIME,
+    SIGN_RESPONSE_OUT_OF_RANGE,
+    SIGN_RESPONSE_INVALID_TASK,
+)
+
+# 结果页中的标题/描述 div: <div id="title">、<div id="text"> 或 weui-msg__title / weui-msg__desc
+_RESULT_DIV_RE = re.compile(
+    r"<div\b[^>]*?(?:(?<![\w-])id\s*=\s*[\"'](?P<id>title|text)[\"']"
+    r"|(?<![\w-])class\s*=\s*[\"'][^\"']*\bweui-msg__(?P<cls>title|desc)\b[^\"']*[\"'])[^>]*>(?P<body>.*?)</div\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def extract_result_message_fast(html_response: str) -> Optional[str]:
+    """
+    不建 DOM 树，直接用正则取出签到结果页的标题和描述文字 (与 BeautifulSoup 路径结果一致)。
+
+    找不到标题/描述、或其中嵌套了 div 无法用正则可靠截取时返回 None，由调用方回退到完整解析。
+    """
+    found: Dict[str, str] = {}
+    for match in _RESULT_DIV_RE.finditer(html_response):
+        body = match.group("body")
+        if "<div" in body.lower():
+            return None
+        if match.group("id"):
+            kind, source = ("title" if match.group("id").lower() == "title" else "desc"), "id"
+        else:
+            kind, source = match.group("cls").lower(), "class"
+        found.setdefault(f"{kind}:{source}", body)
+
+    parts: List[str] = []
+    for kind in ("title", "desc"):
+        body = found.get(f"{kind}:id", found.get(f"{kind}:class"))
+        if body is None:
+            continue
+        text = html.unescape(_TAG_RE.sub("", body)).strip()
+        if text:
+            parts.append(text)
+    return " ".join(parts) if parts else None
+
+
+# 远程短语表中的该键下为正则 (需显式使用)；其余分类下的短语一律按普通文字匹配
+SIGN_RESPONSE_REGEX_KEY = "regex"
+
+
+def _is_valid_pattern(pattern: str) -> bool:
+    try:
+        re.compile(pattern)
+        return True
+    except re.error:
+        return False
+
+
+def _append_phrases(merged: Dict[str, List[str]], table: Mapping[str, Any], as_regex: bool, rejected: List[str]) -> None:
+    for category, phrases in table.items():
+        if category == SIGN_RESPONSE_REGEX_KEY and not as_regex:
+            continue
+        if category not in merged or not isinstance(phrases, (list, tuple)):
+            rejected.append(f"{category}: 未知分类或不是列表")
+            continue
+        for phrase in phrases:
+            if not isinstance(phrase, str) or not phrase:
+                rejected.append(f"{category}: {phrase!r} 不是非空字符串")
+                continue
+            if as_regex and not _is_valid_pattern(phrase):
+                rejected.append(f"{category}: 无法编译的正则 {phrase!r}")
+                continue
+            pattern = phrase if as_regex else re.escape(phrase)
+            if pattern not in merged[category]:
+                merged[category].append(pattern)
+
+
+def merge_phrase_tables(
+    base: Mapping[str, Iterable[str]], extra: Optional[Mapping[str, Any]], logger: Optional[LoggerInterface] = None
+) -> Dict[str, List[str]]:
+    """
+    在默认短语表的基础上追加远程配置中的短语。
+
+    远程短语按普通文字匹配 (会转义)，只有放在 "regex" 键下的才按正则使用，
+    例如 {"success": ["签到成功(已完成)"], "regex": {"already_signed": ["已签到.*次"]}}。
+    无效条目被忽略并记录警告。
+    """
+    merged = {category: list(base.get(category, ())) for category in SIGN_RESPONSE_CATEGORIES}
+    if not isinstance(extra, Mapping):
+        return merged
+    rejected: List[str] = []
+    _append_phrases(merged, extra, False, rejected)
+    regex_table = extra.get(SIGN_RESPONSE_REGEX_KEY)
+    if isinstance(regex_table, Mapping):
+        _append_phrases(merged, regex_table, True, rejected)
+    elif regex_table is not None:
+        rejected.append(f"{SIGN_RESPONSE_REGEX_KEY}: 不是分类到正则列表的映射")
+    if logger is not None:
+        for reason in rejected:
+            logger.log(f"远程签到响应短语被忽略 ({reason})。", LogLevel.WARNING)
+    return merged
+
+
+class SignResponseClassifier:
+    """
+    把签到响应文字归入结果分类。
+
+    短语表 (分类 -> 正则片段列表) 按分类各编译成一个正则，按 SIGN_RESPONSE_CATEGORIES 的优先级
+    依次搜索，第一个命中的分类即结果 (与逐个判断子串的写法结果相同，不受匹配位置重叠影响)。
+    """
+
+    def __init__(self, phrase_table: Mapping[str, Iterable[str]]):
+        self.patterns: List[Tuple[str, re.Pattern]] = []
+        for category in SIGN_RESPONSE_CATEGORIES:
+            phrases = [p for p in phrase_table.get(category, ()) if p]
+            if phrases:
+                self.patterns.append((category, re.compile("|".join(f"(?:{p})" for p in phrases), re.DOTALL)))
+
+    def classify(self, message: str) -> Optional[str]:
+        """返回命中的最高优先级分类，未命中任何短语时返回 None。"""
+        if not message:
+            return None
+        for category, pattern in self.patterns:
+            if pattern.search(message):
+                return category
+        return None
+
+
+def build_sign_response_classifier(
+    extra_phrases: Optional[Mapping[str, Any]] = None, logger: Optional[LoggerInterface] = None
+) -> SignResponseClassifier:
+    return SignResponseClassifier(merge_phrase_tables(AppConstants.SIGN_RESPONSE_PHRASES, extra_phrases, logger))
@@ -1,25 +1,65 @@
 # autocheckf/app/services/sign_service.py
+import asyncio
+import contextvars
+import hashlib
 import requests
 import re
 import time
 import json 
 import random
-from bs4 import BeautifulSoup, Tag # type: ignore
-from typing import Dict, Any, Optional, List, Set, TYPE_CHECKING 
+import threading
+from urllib.parse import urlparse
+from bs4 import Tag # type: ignore
+from typing import Dict, Any, Optional, List, Set, Tuple, TYPE_CHECKING 
 from datetime import datetime 
 
-from colorama import Fore, Style
+from colorama import Fore
+
+try:
+    import aiohttp # type: ignore
+except ImportError: # pragma: no cover
+    aiohttp = None # 异步执行模式为可选功能，未安装 aiohttp 时回退到线程模式
 
 from app.constants import AppConstants, SCRIPT_VERSION 
 from app.logger_setup import LoggerInterface, LogLevel
 from app.config.remote_manager import RemoteConfigManager
 from app.exceptions import LocationError
+from app.utils.http_utils import create_pooled_session
+from app.services.sign_response_classifier import (
+    SignResponseClassifier, build_sign_response_classifier, extract_result_message_fast,
+    SIGN_RESPONSE_PASSWORD, SIGN_RESPONSE_ALREADY_SIGNED, SIGN_RESPONSE_SUCCESS,
+    SIGN_RESPONSE_NOT_IN_TIME, SIGN_RESPONSE_OUT_OF_RANGE, SIGN_RESPONSE_INVALID_TASK,
+)
+from app.services.sign_state_store import (
+    SignStateStore, TaskStateSet, task_expiry_timestamp,
+    TASK_STATE_SIGNED, TASK_STATE_INVALID, TASK_STATE_NOTIFIED_SUCCESS, TASK_STATE_NOTIFIED_PASSWORD_FAILURE,
+)
+from app.utils.console_renderer import ConsoleRenderer, create_console_renderer
+from app.utils.html_utils import resolve_html_parser, make_soup, ParseStats, build_parse_filter, tag_has_class
 
 
 if TYPE_CHECKING: # pragma: no cover
     from app.services.notification import NotificationManager
 
 SignTaskDetails = Dict[str, Any]
+# 与上一次快照相比的变化: {"added": [任务], "status_changed": [(旧状态, 任务)], "removed": [任务ID], "initial": bool}
+TaskDiff = Dict[str, Any]
+
+ASYNC_HTTP_AVAILABLE: bool = aiohttp is not None
+
+PUNCH_GPS_INPUT_ID_PREFIXES = ("punch_gps_inrange_", "punch_gps_ranges_")
+
+
+def _is_punch_page_element(name: str, attrs: Dict[str, Any]) -> bool:
+    """签到页面中解析任务所需的元素: 签到卡片容器及 GPS 范围隐藏输入框。"""
+    if name == "div":
+        return tag_has_class(attrs.get("class"), "layui-col-xs6")
+    if name == "input":
+        return str(attrs.get("id", "")).startswith(PUNCH_GPS_INPUT_ID_PREFIXES)
+    return False
+
+
+PUNCH_PAGE_PARSE_FILTER = build_parse_filter(_is_punch_page_element)
 
 
 class SignService:
@@ -27,23 +67,63 @@ class SignService:
                  logger: LoggerInterface,
                  app_config: Dict[str, Any], 
                  remote_config_manager: RemoteConfigManager,
-                 notification_manager: 'NotificationManager' 
+                 notification_manager: 'NotificationManager',
+                 http_session: Optional[requests.Session] = None,
+                 renderer: Optional[ConsoleRenderer] = None,
+                 task_state_store: Optional[SignStateStore] = None
                  ):
         self.logger = logger
         self.base_config = app_config 
         self.remote_config_manager = remote_config_manager
         self.notification_manager = notification_manager
+        self.renderer: ConsoleRenderer = renderer or create_console_renderer() # 无头模式下为 NullRenderer
+        # Long-lived pooled session so polls reuse TCP connections to k8n.cn instead of reconnecting per request
+        self.http_session: requests.Session = http_session if http_session is not None else create_pooled_session()
+        self._async_session: Optional['aiohttp.ClientSession'] = None # Created lazily inside the async engine's event loop
         
-        self.signed_ids: Set[str] = set() # Tracks tasks confirmed as signed in this session
-        self.invalid_sign_ids: Set[str] = set() # Tracks tasks deemed permanently invalid (e.g., needs password, 404)
+        # Task outcomes survive restarts when a persistent store is passed in; otherwise they live in memory only
+        self.task_state_store: SignStateStore = task_state_store or SignStateStore(logger, None)
+        self.signed_ids = TaskStateSet(self.task_state_store, TASK_STATE_SIGNED) # Tasks confirmed as signed
+        self.invalid_sign_ids = TaskStateSet(self.task_state_store, TASK_STATE_INVALID) # Tasks deemed permanently invalid (e.g., needs password, 404)
         
         # Sets to track if a notification for a specific outcome has been sent for a task ID
-        self.notified_success_ids: Set[str] = set()
-        self.notified_password_failure_ids: Set[str] = set()
+        self.notified_success_ids = TaskStateSet(self.task_state_store, TASK_STATE_NOTIFIED_SUCCESS)
+        self.notified_password_failure_ids = TaskStateSet(self.task_state_store, TASK_STATE_NOTIFIED_PASSWORD_FAILURE)
         
         self.total_successful_sign_ins: int = int(self.base_config.get('total_successful_sign_ins', 0))
+        self._sign_response_lock = threading.Lock()
         self.current_dynamic_coords: Dict[str, str] = {}
         self.user_agent = self._generate_random_user_agent()
+        self.current_cycle: Optional[int] = None # Set by MainTaskRunner each sign cycle; tags structured log events
+
+        # Compiled phrase matcher for sign responses; rebuilt only when the remote phrase table changes
+        self._response_classifier: Optional[SignResponseClassifier] = None
+        self._response_phrases_source: Any = None # 编译分类器时使用的远程短语表对象 (快照不可变，按引用比较即可)
+
+        polling_cfg = self.base_config.get("polling") or {}
+        requested_parser = polling_cfg.get("html_parser", AppConstants.DEFAULT_HTML_PARSER)
+        self.html_parser: str = resolve_html_parser(requested_parser)
+        self.parse_stats = ParseStats()
+        self.restricted_parse: bool = bool(polling_cfg.get("restricted_parse", AppConstants.DEFAULT_RESTRICTED_PARSE))
+
+        # Per-class cache of the last punch page: class_id -> (body hash, parsed tasks)
+        self.page_cache_enabled: bool = bool(polling_cfg.get("page_cache", AppConstants.DEFAULT_PAGE_CACHE_ENABLED))
+        self._page_cache: Dict[str, Tuple[str, List[SignTaskDetails]]] = {}
+        self.unchanged_class_ids: Set[str] = set()
+
+        # Last task list per class (class_id -> {task_id: task}) and the diff produced by the latest fetch
+        self._task_snapshots: Dict[str, Dict[str, SignTaskDetails]] = {}
+        self.last_task_diffs: Dict[str, TaskDiff] = {}
+
+        # Conditional GET state: validators per class, support per host (None = unknown)
+        self.conditional_get_enabled: bool = self.page_cache_enabled and bool(polling_cfg.get("conditional_get", AppConstants.DEFAULT_CONDITIONAL_GET_ENABLED))
+        self._page_validators: Dict[str, Dict[str, Optional[str]]] = {}
+        self._conditional_get_hosts: Dict[str, Optional[bool]] = {}
+        self._conditional_get_misses: Dict[str, int] = {}
+        self._conditional_get_lock = threading.Lock()
+        if requested_parser not in ("auto", self.html_parser):
+            self.logger.log(f"SignService: HTML 解析后端 '{requested_parser}' 不可用，已回退到 '{self.html_parser}'。", LogLevel.WARNING)
+        self.logger.log(f"SignService: 使用 HTML 解析后端: {self.html_parser}", LogLevel.DEBUG)
 
     def set_current_coordinates(self, coords: Dict[str, str]):
         self.current_dynamic_coords = coords
@@ -52,6 +132,24 @@ class SignService:
     def get_total_successful_sign_ins(self) -> int:
         return self.total_successful_sign_ins
 
+    def get_parse_stats(self) -> Dict[str, Any]:
+        stats = self.parse_stats.snapshot()
+        stats["parser"] = self.html_parser
+        return stats
+
+    def mark_task(self, task_set: TaskStateSet, class_id: str, sign_id: str, outcome: str) -> None:
+        """把任务记入 task_set，过期时间取自最近一次检索到的该任务的结束时间。"""
+        task = self._task_snapshots.get(class_id, {}).get(sign_id)
+        task_set.add(sign_id, class_id, outcome, task_expiry_timestamp(task))
+
+    def close(self) -> None:
+        self.task_state_store.close()
+        try:
+            self.http_session.close()
+            self.logger.log("SignService: HTTP 会话已关闭。", LogLevel.DEBUG)
+        except Exception as e_close:
+            self.logger.log(f"SignService: 关闭 HTTP 会话时出错: {e_close}", LogLevel.WARNING)
+
     def _build_headers(self, current_class_id: str) -> Dict[str, str]:
         referer_url = f'http://k8n.cn/student/course/{current_class_id}/punchs' if current_class_id and current_class_id.isdigit() else 'http://k8n.cn/student/'
         return {
@@ -102,158 +200,370 @@ class SignService:
                 net_type=active_pool["net_types"][0] if active_pool["net_types"] else "WIFI"
             )
 
+    def _log_fetch_event(self, class_id: str, started_at: float, tasks: Optional[List[SignTaskDetails]], engine: str) -> None:
+        self.logger.log_event(
+            "fetch_tasks", LogLevel.INFO if tasks is not None else LogLevel.WARNING,
+            component="SignService", cycle=self.current_cycle, class_id=class_id, engine=engine,
+            duration_ms=round((time.monotonic() - started_at) * 1000, 1),
+            ok=tasks is not None, task_count=len(tasks) if tasks is not None else None,
+            unchanged=self.is_page_unchanged(class_id) if tasks is not None else None
+        )
+
+    def _log_sign_event(self, class_id: str, sign_id: str, started_at: float, handled: bool, engine: str) -> None:
+        self.logger.log_event(
+            "sign_attempt", LogLevel.INFO if handled else LogLevel.WARNING,
+            component="SignService", cycle=self.current_cycle, class_id=class_id, task_id=sign_id, engine=engine,
+            duration_ms=round((time.monotonic() - started_at) * 1000, 1),
+            handled=handled, signed=sign_id in self.signed_ids, invalid=sign_id in self.invalid_sign_ids
+        )
+
     def fetch_sign_task_details(self, class_id_to_fetch: str) -> Optional[List[SignTaskDetails]]:
+        started_at = time.monotonic()
+        tasks = self._fetch_sign_task_details(class_id_to_fetch)
+        self._log_fetch_event(class_id_to_fetch, started_at, tasks, "threaded")
+        return tasks
+
+    def _fetch_sign_task_details(self, class_id_to_fetch: str) -> Optional[List[SignTaskDetails]]:
         if not class_id_to_fetch or not class_id_to_fetch.isdigit():
             self.logger.log(f"无效的班级ID '{class_id_to_fetch}' 传递给 fetch_sign_task_details。", LogLevel.ERROR)
             return None
         url = f'http://k8n.cn/student/course/{class_id_to_fetch}/punchs'
         headers = self._build_headers(class_id_to_fetch)
-        self.logger.log(f"班级 {class_id_to_fetch}: 获取详细签到任务列表 URL: {url}", LogLevel.DEBUG)
+        conditional_headers = self._get_conditional_headers(url, class_id_to_fetch)
+        headers.update(conditional_headers)
+        self.logger.log(lambda: f"班级 {class_id_to_fetch}: 获取详细签到任务列表 URL: {url}", LogLevel.DEBUG)
         try:
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self.http_session.get(url, headers=headers, timeout=15)
+            if response.status_code == 304 and conditional_headers:
+                return self._handle_not_modified(url, class_id_to_fetch)
             response.raise_for_status()
-            soup = BeautifulSoup(response.text, "html.parser")
-            tasks: List[SignTaskDetails] = []
-            card_containers = soup.find_all("div", class_="layui-col-xs6") 
-            if not card_containers:
-                self.logger.log(f"班级 {class_id_to_fetch}: 未找到 'layui-col-xs6' (签到卡片容器) 元素。", LogLevel.DEBUG)
-                if "请先加入班级或等待老师开启上课点名" in response.text: self.logger.log(f"班级 {class_id_to_fetch}: 页面提示未加入班级或无签到任务。", LogLevel.INFO)
-                return []
-            for card_container_div in card_containers:
-                card_main_div = card_container_div.find("div", class_="card")
-                card_body = card_container_div.find("div", class_="card-body", id=re.compile(r"punchcard_(\d+)"))
-                if not card_body or not card_main_div: continue
-                
-                task_id_match = re.search(r"punchcard_(\d+)", card_body.get("id", ""))
-                if not task_id_match: continue
-                task_id = task_id_match.group(1)
-
-                subtitle_tag = card_body.find("div", class_="subtitle")
-                task_title_on_card = subtitle_tag.text.strip() if subtitle_tag else "未知类型签到"
-
-                raw_onclick = card_main_div.get("onclick", "")
-                
-                status_tag = card_body.find("span", class_=re.compile(r"layui-badge\s+(layui-bg-danger|layui-bg-green|layui-bg-orange)"))
-                task_status = status_tag.text.strip() if status_tag else "未知状态"
-                if status_tag: 
-                    if "layui-bg-green" in status_tag.get("class", []): task_status = "已签"
-                    elif "layui-bg-danger" in status_tag.get("class", []): task_status = "未签"
-                    elif "layui-bg-orange" in status_tag.get("class", []): task_status = "未开始" 
-                
-                activity_name_parts = []
-                end_time_text = None
-                countdown_seconds = None
-                
-                title_divs = card_body.find_all("div", class_="title")
-                for title_div in title_divs:
-                    title_text = title_div.text.strip()
-                    if "结束" in title_text and ("后" in title_text or re.match(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}结束', title_text)): 
-                        end_time_text = title_text
-                        countdown_span = title_div.find("span", class_="countdown", attrs={"ct": True})
-                        if countdown_span and countdown_span.get("ct", "").isdigit(): 
-                            countdown_seconds = int(countdown_span["ct"])
-                    elif "已开始" == title_text: 
-                        if task_status == "未知状态" and "layui-bg-danger" in card_main_div.get("style",""): task_status = "未签"
-                    elif "已结束" == title_text: task_status = "已结束"
-                    elif "未开始" == title_text or "考勤未开始" in title_text: task_status = "未开始"
-                    else: 
-                        if title_text: activity_name_parts.append(title_text)
-                
-                activity_name_str = " ".join(activity_name_parts) if activity_name_parts else task_title_on_card
-
-                task_type = "unknown"
-                photo_hint_text = None
-                requires_password_flag = False
-                if "punch_gps_photo" in raw_onclick:
-                    task_type = "photo_gps"
-                    hint_match = re.search(r"punch_gps_photo\(\s*\d+\s*,\s*['\"](.*?)['\"]\)", raw_onclick)
-                    if hint_match: photo_hint_text = hint_match.group(1)
-                elif "punch_gps" in raw_onclick: task_type = "gps"
-                elif "scanqr()" in raw_onclick or "扫码" in task_title_on_card: task_type = "qr"
-                elif "密码" in task_title_on_card: task_type = "password"; requires_password_flag = True
-                elif "点名" in task_title_on_card: task_type = "roll_call"
-
-                is_gps_limited_range = None
-                gps_ranges_data = None
-                if task_type in ["gps", "photo_gps"]:
-                    inrange_input = soup.find("input", id=f"punch_gps_inrange_{task_id}")
-                    if inrange_input and inrange_input.get("value") is not None:
-                        is_gps_limited_range = (inrange_input.get("value") == "1")
-                    
-                    ranges_input = soup.find("input", id=f"punch_gps_ranges_{task_id}")
-                    if ranges_input and ranges_input.get("value"):
-                        try:
-                            parsed_ranges = json.loads(ranges_input.get("value"))
-                            if isinstance(parsed_ranges, list) and \
-                               all(isinstance(item, list) and len(item) == 3 for item in parsed_ranges) and \
-                               all(isinstance(coord, str) for item in parsed_ranges for coord in item[:2]) and \
-                               all(isinstance(item[2], (int, float, str)) or str(item[2]).isdigit() for item in parsed_ranges):
-                                gps_ranges_data = parsed_ranges
-                            else: self.logger.log(f"任务ID {task_id}: GPS范围数据格式不符合预期: {parsed_ranges}", LogLevel.WARNING)
-                        except json.JSONDecodeError: 
-                            self.logger.log(f"任务ID {task_id}: 解析GPS范围JSON数据失败: '{ranges_input.get('value')}'", LogLevel.WARNING)
-                    
-                    if is_gps_limited_range and not gps_ranges_data:
-                        self.logger.log(f"任务ID {task_id}: 标记为范围限制但GPS范围数据缺失或无效，将按无限制处理。", LogLevel.WARNING)
-                        is_gps_limited_range = False 
-
-                task_detail: SignTaskDetails = {
-                    "id": task_id, 
-                    "type": task_type, 
-                    "status": task_status,
-                    "title": task_title_on_card, 
-                    "activity_name": activity_name_str,
-                    "end_time_text": end_time_text, 
-                    "countdown_seconds": countdown_seconds,
-                    "is_gps_limited_range": is_gps_limited_range, 
-                    "gps_ranges": gps_ranges_data, 
-                    "photo_hint": photo_hint_text, 
-                    "requires_password": requires_password_flag, 
-                    "raw_onclick": raw_onclick,
-                    "raw_card_html": str(card_main_div)
-                }
-                tasks.append(task_detail)
-
-            if not tasks and card_containers:
-                 self.logger.log(f"班级 {class_id_to_fetch}: 找到 {len(card_containers)} 个签到卡片容器，但未能解析出任何任务详情。", LogLevel.WARNING)
-            
-            if tasks: self.logger.log(f"班级 {class_id_to_fetch}: 成功解析到 {len(tasks)} 个签到任务的详细信息。", LogLevel.INFO)
-            else: self.logger.log(f"班级 {class_id_to_fetch}: 未解析到任何签到任务的详细信息。", LogLevel.INFO)
+            tasks = self._parse_sign_task_page_cached(class_id_to_fetch, response.text)
+            self._record_validators(url, class_id_to_fetch, response.headers, bool(conditional_headers))
             return tasks
         except requests.RequestException as e:
             self.logger.log(f"班级 {class_id_to_fetch}: 获取详细签到任务列表失败 (网络请求): {e}", LogLevel.ERROR)
-            if e.response is not None: self.logger.log(f"班级 {class_id_to_fetch}: 响应内容(部分): {e.response.text[:200]}", LogLevel.DEBUG)
+            if e.response is not None: self.logger.log(lambda: f"班级 {class_id_to_fetch}: 响应内容(部分): {e.response.text[:200]}", LogLevel.DEBUG)
             return None
         except Exception as e_fetch_detail:
             self.logger.log(f"班级 {class_id_to_fetch}: 获取详细签到任务列表时发生内部错误: {e_fetch_detail}", LogLevel.ERROR, exc_info=True)
             return None
 
-    def attempt_sign(self, sign_id: str, class_id_for_sign: str) -> bool:
-        if not self.current_dynamic_coords or not self.current_dynamic_coords.get("lat") or not self.current_dynamic_coords.get("lng"):
+    async def fetch_sign_task_details_async(self, class_id_to_fetch: str) -> Optional[List[SignTaskDetails]]:
+        """fetch_sign_task_details 的协程版本，使用 aiohttp 会话，解析逻辑与同步版本共用。"""
+        started_at = time.monotonic()
+        tasks = await self._fetch_sign_task_details_async(class_id_to_fetch)
+        self._log_fetch_event(class_id_to_fetch, started_at, tasks, "async")
+        return tasks
+
+    async def _fetch_sign_task_details_async(self, class_id_to_fetch: str) -> Optional[List[SignTaskDetails]]:
+        if not class_id_to_fetch or not class_id_to_fetch.isdigit():
+            self.logger.log(f"无效的班级ID '{class_id_to_fetch}' 传递给 fetch_sign_task_details_async。", LogLevel.ERROR)
+            return None
+        url = f'http://k8n.cn/student/course/{class_id_to_fetch}/punchs'
+        headers = self._build_headers(class_id_to_fetch)
+        conditional_headers = self._get_conditional_headers(url, class_id_to_fetch)
+        headers.update(conditional_headers)
+        self.logger.log(lambda: f"班级 {class_id_to_fetch}: (async) 获取详细签到任务列表 URL: {url}", LogLevel.DEBUG)
+        try:
+            session = self._get_async_session()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=15)) as response:
+                status_code = response.status
+                response_headers = response.headers
+                response_text = "" if status_code == 304 else await response.text()
+            if status_code == 304 and conditional_headers:
+                return self._handle_not_modified(url, class_id_to_fetch)
+            if status_code >= 400:
+                self.logger.log(f"班级 {class_id_to_fetch}: 获取详细签到任务列表失败 (网络请求): HTTP {status_code}", LogLevel.ERROR)
+                self.logger.log(lambda: f"班级 {class_id_to_fetch}: 响应内容(部分): {response_text[:200]}", LogLevel.DEBUG)
+                return None
+            tasks = self._parse_sign_task_page_cached(class_id_to_fetch, response_text)
+            self._record_validators(url, class_id_to_fetch, response_headers, bool(conditional_headers))
+            return tasks
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.logger.log(f"班级 {class_id_to_fetch}: 获取详细签到任务列表失败 (网络请求): {type(e).__name__}: {e}", LogLevel.ERROR)
+            return None
+        except Exception as e_fetch_detail:
+            self.logger.log(f"班级 {class_id_to_fetch}: 获取详细签到任务列表时发生内部错误: {e_fetch_detail}", LogLevel.ERROR, exc_info=True)
+            return None
+
+    def is_page_unchanged(self, class_id: str) -> bool:
+        """最近一次获取的签到页面内容是否与上一次完全相同 (命中内容哈希缓存)。"""
+        return class_id in self.unchanged_class_ids
+
+    def _get_conditional_headers(self, url: str, class_id: str) -> Dict[str, str]:
+        """为已缓存的班级页面构造 If-None-Match / If-Modified-Since 请求头；主机不支持时返回空字典。"""
+        if not self.conditional_get_enabled or class_id not in self._page_cache:
+            return {}
+        host = urlparse(url).netloc
+        if self._conditional_get_hosts.get(host) is False:
+            return {}
+        validators = self._page_validators.get(class_id) or {}
+        conditional_headers: Dict[str, str] = {}
+        if validators.get("etag"): conditional_headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"): conditional_headers["If-Modified-Since"] = validators["last_modified"]
+        return conditional_headers
+
+    def _handle_not_modified(self, url: str, class_id: str) -> List[SignTaskDetails]:
+        host = urlparse(url).netloc
+        with self._conditional_get_lock:
+            if self._conditional_get_hosts.get(host) is not True:
+                self.logger.log(f"SignService: 主机 {host} 支持条件请求 (304 Not Modified)。", LogLevel.DEBUG)
+            self._conditional_get_hosts[host] = True
+            self._conditional_get_misses[host] = 0
+        self.unchanged_class_ids.add(class_id)
+        self.logger.log(lambda: f"班级 {class_id}: 签到页面未修改 (304)，复用上次解析结果。", LogLevel.DEBUG)
+        self._update_task_snapshot(class_id, self._page_cache[class_id][1])
+        return list(self._page_cache[class_id][1])
+
+    def _record_validators(self, url: str, class_id: str, response_headers: Any, sent_conditional: bool) -> None:
+        """
+        记录响应中的 ETag / Last-Modified 供下次请求使用。
+
+        主机持续不返回校验字段，或带着校验字段请求却仍返回内容相同的 200 响应时，
+        计为一次未命中；连续未命中达到上限后对该主机关闭条件请求。
+        """
+        if not self.conditional_get_enabled or not self.page_cache_enabled:
+            return
+        host = urlparse(url).netloc
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._conditional_get_lock:
+            if self._conditional_get_hosts.get(host) is False:
+                return
+            if etag or last_modified:
+                self._page_validators[class_id] = {"etag": etag, "last_modified": last_modified}
+            is_miss = not (etag or last_modified) or (sent_conditional and self.is_page_unchanged(class_id))
+            if not is_miss:
+                return
+            if self._conditional_get_hosts.get(host) is True:
+                return # 已确认支持，偶发的未命中不影响
+            misses = self._conditional_get_misses.get(host, 0) + 1
+            self._conditional_get_misses[host] = misses
+            if misses >= AppConstants.CONDITIONAL_GET_MAX_MISSES:
+                self._conditional_get_hosts[host] = False
+                self._page_validators.clear()
+                self.logger.log(f"SignService: 主机 {host} 不支持条件请求 (ETag/Last-Modified)，已对其关闭。", LogLevel.INFO)
+
+    def _parse_sign_task_page_cached(self, class_id_to_fetch: str, page_html: str) -> List[SignTaskDetails]:
+        if not self.page_cache_enabled:
+            tasks = self._parse_sign_task_page(class_id_to_fetch, page_html)
+            self._update_task_snapshot(class_id_to_fetch, tasks)
+            return tasks
+
+        page_hash = hashlib.blake2b(page_html.encode("utf-8"), digest_size=16).hexdigest()
+        cached_entry = self._page_cache.get(class_id_to_fetch)
+        if cached_entry is not None and cached_entry[0] == page_hash:
+            self.unchanged_class_ids.add(class_id_to_fetch)
+            self.logger.log(lambda: f"班级 {class_id_to_fetch}: 签到页面内容未变化，复用上次解析结果。", LogLevel.DEBUG)
+            self._update_task_snapshot(class_id_to_fetch, cached_entry[1])
+            return list(cached_entry[1])
+
+        tasks = self._parse_sign_task_page(class_id_to_fetch, page_html)
+        self._page_cache[class_id_to_fetch] = (page_hash, tasks)
+        self.unchanged_class_ids.discard(class_id_to_fetch)
+        self._update_task_snapshot(class_id_to_fetch, tasks)
+        return list(tasks)
+
+    def get_task_diff(self, class_id: str) -> Optional[TaskDiff]:
+        """返回该班级最近一次获取相对于上一次获取的任务变化；尚未成功获取过时返回 None。"""
+        return self.last_task_diffs.get(class_id)
+
+    def _update_task_snapshot(self, class_id: str, tasks: List[SignTaskDetails]) -> None:
+        previous_snapshot = self._task_snapshots.get(class_id)
+        current_snapshot = {task['id']: task for task in tasks}
+        if previous_snapshot is None:
+            task_diff: TaskDiff = {"added": list(tasks), "status_changed": [], "removed": [], "initial": True}
+        else:
+            task_diff = {
+                "added": [task for task in tasks if task['id'] not in previous_snapshot],
+                "status_changed": [(previous_snapshot[task['id']]['status'], task) for task in tasks
+                                   if task['id'] in previous_snapshot and previous_snapshot[task['id']]['status'] != task['status']],
+                "removed": [task_id for task_id in previous_snapshot if task_id not in current_snapshot],
+                "initial": False
+            }
+        self._task_snapshots[class_id] = current_snapshot
+        self.last_task_diffs[class_id] = task_diff
+
+    def _parse_sign_task_page(self, class_id_to_fetch: str, page_html: str) -> List[SignTaskDetails]:
+        if self.restricted_parse:
+            soup = make_soup(page_html, self.html_parser, self.parse_stats, parse_only=PUNCH_PAGE_PARSE_FILTER)
+        else:
+            soup = make_soup(page_html, self.html_parser, self.parse_stats)
+        tasks: List[SignTaskDetails] = []
+        card_containers = soup.find_all("div", class_="layui-col-xs6") 
+        if not card_containers:
+            self.logger.log(lambda: f"班级 {class_id_to_fetch}: 未找到 'layui-col-xs6' (签到卡片容器) 元素。", LogLevel.DEBUG)
+            if "请先加入班级或等待老师开启上课点名" in page_html: self.logger.log(f"班级 {class_id_to_fetch}: 页面提示未加入班级或无签到任务。", LogLevel.INFO)
+            return []
+        gps_inputs_by_task = self._index_punch_gps_inputs(soup)
+        for card_container_div in card_containers:
+            card_main_div = card_container_div.find("div", class_="card")
+            card_body = card_container_div.find("div", class_="card-body", id=re.compile(r"punchcard_(\d+)"))
+            if not card_body or not card_main_div: continue
+            
+            task_id_match = re.search(r"punchcard_(\d+)", card_body.get("id", ""))
+            if not task_id_match: continue
+            task_id = task_id_match.group(1)
+
+            subtitle_tag = card_body.find("div", class_="subtitle")
+            task_title_on_card = subtitle_tag.text.strip() if subtitle_tag else "未知类型签到"
+
+            raw_onclick = card_main_div.get("onclick", "")
+            
+            status_tag = card_body.find("span", class_=re.compile(r"layui-badge\s+(layui-bg-danger|layui-bg-green|layui-bg-orange)"))
+            task_status = status_tag.text.strip() if status_tag else "未知状态"
+            if status_tag: 
+                if "layui-bg-green" in status_tag.get("class", []): task_status = "已签"
+                elif "layui-bg-danger" in status_tag.get("class", []): task_status = "未签"
+                elif "layui-bg-orange" in status_tag.get("class", []): task_status = "未开始" 
+            
+            activity_name_parts = []
+            end_time_text = None
+            countdown_seconds = None
+            
+            title_divs = card_body.find_all("div", class_="title")
+            for title_div in title_divs:
+                title_text = title_div.text.strip()
+                if "结束" in title_text and ("后" in title_text or re.match(r'\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}结束', title_text)): 
+                    end_time_text = title_text
+                    countdown_span = title_div.find("span", class_="countdown", attrs={"ct": True})
+                    if countdown_span and countdown_span.get("ct", "").isdigit(): 
+                        countdown_seconds = int(countdown_span["ct"])
+                elif "已开始" == title_text: 
+                    if task_status == "未知状态" and "layui-bg-danger" in card_main_div.get("style",""): task_status = "未签"
+                elif "已结束" == title_text: task_status = "已结束"
+                elif "未开始" == title_text or "考勤未开始" in title_text: task_status = "未开始"
+                else: 
+                    if title_text: activity_name_parts.append(title_text)
+            
+            activity_name_str = " ".join(activity_name_parts) if activity_name_parts else task_title_on_card
+
+            task_type = "unknown"
+            photo_hint_text = None
+            requires_password_flag = False
+            if "punch_gps_photo" in raw_onclick:
+                task_type = "photo_gps"
+                hint_match = re.search(r"punch_gps_photo\(\s*\d+\s*,\s*['\"](.*?)['\"]\)", raw_onclick)
+                if hint_match: photo_hint_text = hint_match.group(1)
+            elif "punch_gps" in raw_onclick: task_type = "gps"
+            elif "scanqr()" in raw_onclick or "扫码" in task_title_on_card: task_type = "qr"
+            elif "密码" in task_title_on_card: task_type = "password"; requires_password_flag = True
+            elif "点名" in task_title_on_card: task_type = "roll_call"
+
+            is_gps_limited_range = None
+            gps_ranges_data = None
+            if task_type in ["gps", "photo_gps"]:
+                task_gps_inputs = gps_inputs_by_task.get(task_id, {})
+                inrange_input = task_gps_inputs.get("punch_gps_inrange_")
+                if inrange_input and inrange_input.get("value") is not None:
+                    is_gps_limited_range = (inrange_input.get("value") == "1")
+                
+                ranges_input = task_gps_inputs.get("punch_gps_ranges_")
+                if ranges_input and ranges_input.get("value"):
+                    try:
+                        parsed_ranges = json.loads(ranges_input.get("value"))
+                        if isinstance(parsed_ranges, list) and \
+                           all(isinstance(item, list) and len(item) == 3 for item in parsed_ranges) and \
+                           all(isinstance(coord, str) for item in parsed_ranges for coord in item[:2]) and \
+                           all(isinstance(item[2], (int, float, str)) or str(item[2]).isdigit() for item in parsed_ranges):
+                            gps_ranges_data = parsed_ranges
+                        else: self.logger.log(f"任务ID {task_id}: GPS范围数据格式不符合预期: {parsed_ranges}", LogLevel.WARNING)
+                    except json.JSONDecodeError: 
+                        self.logger.log(f"任务ID {task_id}: 解析GPS范围JSON数据失败: '{ranges_input.get('value')}'", LogLevel.WARNING)
+                
+                if is_gps_limited_range and not gps_ranges_data:
+                    self.logger.log(f"任务ID {task_id}: 标记为范围限制但GPS范围数据缺失或无效，将按无限制处理。", LogLevel.WARNING)
+                    is_gps_limited_range = False 
+
+            task_detail: SignTaskDetails = {
+                "id": task_id, 
+                "type": task_type, 
+                "status": task_status,
+                "title": task_title_on_card, 
+                "activity_name": activity_name_str,
+                "end_time_text": end_time_text, 
+                "countdown_seconds": countdown_seconds,
+                "is_gps_limited_range": is_gps_limited_range, 
+                "gps_ranges": gps_ranges_data, 
+                "photo_hint": photo_hint_text, 
+                "requires_password": requires_password_flag, 
+                "raw_onclick": raw_onclick,
+                "raw_card_html": str(card_main_div)
+            }
+            tasks.append(task_detail)
+
+        if not tasks and card_containers:
+             self.logger.log(f"班级 {class_id_to_fetch}: 找到 {len(card_containers)} 个签到卡片容器，但未能解析出任何任务详情。", LogLevel.WARNING)
+        
+        if tasks: self.logger.log(f"班级 {class_id_to_fetch}: 成功解析到 {len(tasks)} 个签到任务的详细信息。", LogLevel.INFO)
+        else: self.logger.log(f"班级 {class_id_to_fetch}: 未解析到任何签到任务的详细信息。", LogLevel.INFO)
+        return tasks
+
+    @staticmethod
+    def _index_punch_gps_inputs(soup: Any) -> Dict[str, Dict[str, Tag]]:
+        """一次遍历建立 {任务ID: {id前缀: input标签}} 索引，避免每个 GPS 任务各自全文档查找。"""
+        gps_inputs_by_task: Dict[str, Dict[str, Tag]] = {}
+        for input_tag in soup.find_all("input", id=True):
+            input_id = input_tag.get("id", "")
+            for prefix in PUNCH_GPS_INPUT_ID_PREFIXES:
+                if input_id.startswith(prefix):
+                    # 与原先的 soup.find 一致，同一 id 重复出现时以第一个为准
+                    gps_inputs_by_task.setdefault(input_id[len(prefix):], {}).setdefault(prefix, input_tag)
+                    break
+        return gps_inputs_by_task
+
+    def _build_sign_request(self, sign_id: str, class_id_for_sign: str, coords: Optional[Dict[str, str]] = None) -> Optional[Tuple[str, Dict[str, str], Dict[str, str]]]:
+        coords = coords or self.current_dynamic_coords
+        if not coords or not coords.get("lat") or not coords.get("lng"):
             self.logger.log(f"班级 {class_id_for_sign}: 尝试签到ID {sign_id} 失败：坐标无效或未设置。", LogLevel.ERROR)
-            self._print_formatted_sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：内部坐标未设置")
-            return False
+            self.renderer.sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：内部坐标未设置")
+            return None
         
         url = f'{self.base_config.get("base_k8n_url", "http://k8n.cn")}/student/punchs/course/{class_id_for_sign}/{sign_id}'
         payload = {
             "id": sign_id, 
-            "lat": self.current_dynamic_coords["lat"], 
-            "lng": self.current_dynamic_coords["lng"],
-            "acc": self.current_dynamic_coords.get("acc", str(AppConstants.DEFAULT_ACCURACY)),
+            "lat": coords["lat"], 
+            "lng": coords["lng"],
+            "acc": coords.get("acc", str(AppConstants.DEFAULT_ACCURACY)),
             "res": "s46grRvFJukcJc3CFnqHcKQLxAvxJYJ-Uh8bsD1YcXiVMN-MoqkVmZPDzpUhTMyf", 
             "gps_addr": "" 
         }
-        headers = self._build_headers(class_id_for_sign)
+        self.logger.log(f"班级 {class_id_for_sign}: 尝试签到ID {sign_id} 使用坐标: {coords}", LogLevel.INFO)
+        return url, payload, self._build_headers(class_id_for_sign)
+
+    def _handle_sign_http_error(self, status_code: int, response_text: str, sign_id: str, class_id_for_sign: str) -> Optional[bool]:
+        """处理签到请求的 HTTP 错误状态码。返回 None 表示可重试，否则为 attempt_sign 的最终返回值。"""
+        self.logger.log(lambda: f"班级 {class_id_for_sign}: 错误响应(部分): {response_text[:250]}", LogLevel.DEBUG)
+        if status_code in [401, 403]:
+            self.logger.log(f"请求错误({status_code})，Cookie可能无效或已过期。", LogLevel.CRITICAL)
+            self.renderer.sign_status("🚫", Fore.RED, class_id_for_sign, sign_id, "签到失败：认证错误 (Cookie无效?)")
+            return False 
+        elif status_code == 404:
+            self.logger.log(f"请求错误(404)，签到任务 {sign_id} 可能不存在或已结束。", LogLevel.WARNING)
+            self.mark_task(self.invalid_sign_ids, class_id_for_sign, sign_id, "not_found")
+            self.renderer.sign_status("🚫", Fore.MAGENTA, class_id_for_sign, sign_id, "签到失败：任务未找到 (404)")
+            return True 
+        return None
+
+    def attempt_sign(self, sign_id: str, class_id_for_sign: str, coords: Optional[Dict[str, str]] = None) -> bool:
+        started_at = time.monotonic()
+        handled = self._attempt_sign(sign_id, class_id_for_sign, coords)
+        self._log_sign_event(class_id_for_sign, sign_id, started_at, handled, "threaded")
+        return handled
+
+    def _attempt_sign(self, sign_id: str, class_id_for_sign: str, coords: Optional[Dict[str, str]] = None) -> bool:
+        sign_request = self._build_sign_request(sign_id, class_id_for_sign, coords)
+        if sign_request is None:
+            return False
+        url, payload, headers = sign_request
         max_retries = 2 
         is_handled = False
 
-        self.logger.log(f"班级 {class_id_for_sign}: 尝试签到ID {sign_id} 使用坐标: {self.current_dynamic_coords}", LogLevel.INFO)
-        
         for attempt in range(1, max_retries + 1):
             if attempt > 1: 
-                self.logger.log(f"班级 {class_id_for_sign}: 重试签到ID {sign_id} (尝试 {attempt}/{max_retries})", LogLevel.DEBUG)
+                self.logger.log(lambda: f"班级 {class_id_for_sign}: 重试签到ID {sign_id} (尝试 {attempt}/{max_retries})", LogLevel.DEBUG)
             try:
-                response = requests.post(url, headers=headers, data=payload, timeout=20)
+                response = self.http_session.post(url, headers=headers, data=payload, timeout=20)
                 response.raise_for_status()
                 
                 if not response.text.strip():
@@ -263,7 +573,7 @@ class SignService:
                         continue
                     else:
                         self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 多次响应为空。", LogLevel.ERROR)
-                        self._print_formatted_sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：服务器响应为空")
+                        self.renderer.sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：服务器响应为空")
                         break 
                 
                 is_handled = self._handle_sign_response(response.text, sign_id, class_id_for_sign)
@@ -272,26 +582,19 @@ class SignService:
             except requests.exceptions.Timeout: 
                 self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 超时 (尝试 {attempt})。", LogLevel.WARNING)
                 if attempt == max_retries:
-                    self._print_formatted_sign_status("⏱️", Fore.YELLOW, class_id_for_sign, sign_id, "签到失败：请求超时")
+                    self.renderer.sign_status("⏱️", Fore.YELLOW, class_id_for_sign, sign_id, "签到失败：请求超时")
             except requests.exceptions.RequestException as e_req:
                 self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 请求错误 (尝试 {attempt}): {e_req}", LogLevel.ERROR)
                 if e_req.response is not None:
-                    self.logger.log(f"班级 {class_id_for_sign}: 错误响应(部分): {e_req.response.text[:250]}", LogLevel.DEBUG)
-                    if e_req.response.status_code in [401, 403]:
-                        self.logger.log(f"请求错误({e_req.response.status_code})，Cookie可能无效或已过期。", LogLevel.CRITICAL)
-                        self._print_formatted_sign_status("🚫", Fore.RED, class_id_for_sign, sign_id, "签到失败：认证错误 (Cookie无效?)")
-                        return False 
-                    elif e_req.response.status_code == 404:
-                        self.logger.log(f"请求错误(404)，签到任务 {sign_id} 可能不存在或已结束。", LogLevel.WARNING)
-                        self.invalid_sign_ids.add(sign_id)
-                        self._print_formatted_sign_status("🚫", Fore.MAGENTA, class_id_for_sign, sign_id, "签到失败：任务未找到 (404)")
-                        return True 
+                    error_outcome = self._handle_sign_http_error(e_req.response.status_code, e_req.response.text, sign_id, class_id_for_sign)
+                    if error_outcome is not None:
+                        return error_outcome
                 if attempt == max_retries and not is_handled:
-                    self._print_formatted_sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：网络请求错误")
+                    self.renderer.sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：网络请求错误")
             except Exception as e_inner: 
                 self.logger.log(f"班级 {class_id_for_sign}: 处理ID {sign_id} 时未知错误 (尝试 {attempt}): {e_inner}", LogLevel.ERROR, exc_info=True)
                 if attempt == max_retries:
-                    self._print_formatted_sign_status("💥", Fore.RED, class_id_for_sign, sign_id, "签到失败：发生内部错误")
+                    self.renderer.sign_status("💥", Fore.RED, class_id_for_sign, sign_id, "签到失败：发生内部错误")
                 return False 
             
             if attempt < max_retries:
@@ -301,29 +604,105 @@ class SignService:
             self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} {max_retries} 次尝试后仍未成功处理。", LogLevel.ERROR)
         return is_handled
 
-    def _print_formatted_sign_status(self, status_icon: str, status_color: Any, class_id: str, sign_id: str, message: str, details: Optional[str] = None):
-        main_color = status_color 
-        line_width = 80 
-        header = f" {status_icon} 签到任务状态 [班级ID: {class_id} | 任务ID: {sign_id}] "
-        
-        print(f"{main_color}{Style.BRIGHT}┌{'─' * (line_width - 2)}┐{Style.RESET_ALL}")
-        print(f"{main_color}{Style.BRIGHT}│{header.ljust(line_width - 2)}│{Style.RESET_ALL}")
-        print(f"{main_color}{Style.BRIGHT}├{'─' * (line_width - 2)}┤{Style.RESET_ALL}")
-        
-        msg_line = f"│  消息: {message}"
-        print(f"{main_color}{msg_line.ljust(line_width + len(main_color) + len(Style.RESET_ALL) -1 )}│{Style.RESET_ALL}")
-
+    async def attempt_sign_async(self, sign_id: str, class_id_for_sign: str, coords: Optional[Dict[str, str]] = None) -> bool:
+        """attempt_sign 的协程版本。坐标需显式传入，因为多个班级的协程会在同一事件循环中交错执行。"""
+        started_at = time.monotonic()
+        handled = await self._attempt_sign_async(sign_id, class_id_for_sign, coords)
+        self._log_sign_event(class_id_for_sign, sign_id, started_at, handled, "async")
+        return handled
 
-        if details:
-            details_single_line = details.replace("\n", " ").replace("\r", "")
-            max_detail_len = line_width - 12 
-            display_details = (details_single_line[:max_detail_len-3] + "...") if len(details_single_line) > max_detail_len else details_single_line
-            detail_line = f"│  详情: {display_details}"
-            print(f"{main_color}{detail_line.ljust(line_width + len(main_color) + len(Style.RESET_ALL)-1)}│{Style.RESET_ALL}")
-        print(f"{main_color}{Style.BRIGHT}└{'─' * (line_width - 2)}┘{Style.RESET_ALL}")
+    async def _attempt_sign_async(self, sign_id: str, class_id_for_sign: str, coords: Optional[Dict[str, str]] = None) -> bool:
+        sign_request = self._build_sign_request(sign_id, class_id_for_sign, coords)
+        if sign_request is None:
+            return False
+        url, payload, headers = sign_request
+        max_retries = 2 
 
-    def _handle_sign_response(self, html_response: str, sign_id: str, class_id_context: str) -> bool:
-        soup = BeautifulSoup(html_response, "html.parser")
+        for attempt in range(1, max_retries + 1):
+            if attempt > 1: 
+                self.logger.log(lambda: f"班级 {class_id_for_sign}: (async) 重试签到ID {sign_id} (尝试 {attempt}/{max_retries})", LogLevel.DEBUG)
+            try:
+                session = self._get_async_session()
+                async with session.post(url, headers=headers, data=payload, timeout=aiohttp.ClientTimeout(total=20)) as response:
+                    response_text = await response.text()
+                    status_code = response.status
+
+                if status_code >= 400:
+                    self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 请求错误 (尝试 {attempt}): HTTP {status_code}", LogLevel.ERROR)
+                    error_outcome = self._handle_sign_http_error(status_code, response_text, sign_id, class_id_for_sign)
+                    if error_outcome is not None:
+                        return error_outcome
+                    if attempt == max_retries:
+                        self.renderer.sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：网络请求错误")
+                elif not response_text.strip():
+                    self.logger.log(f"班级 {class_id_for_sign}: 签到ID {sign_id} 响应为空 (尝试 {attempt})。", LogLevel.WARNING)
+                    if attempt == max_retries:
+                        self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 多次响应为空。", LogLevel.ERROR)
+                        self.renderer.sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：服务器响应为空")
+                        break
+                else:
+                    # 解析响应、写入任务状态和发送通知都是阻塞操作，放到线程池中执行，不阻塞其他班级的协程；
+                    # 在当前上下文的副本中运行，使控制台输出仍进入该班级的输出缓冲区
+                    return await asyncio.get_running_loop().run_in_executor(
+                        None, contextvars.copy_context().run, self._handle_sign_response_locked, response_text, sign_id, class_id_for_sign
+                    )
+
+            except asyncio.TimeoutError: 
+                self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 超时 (尝试 {attempt})。", LogLevel.WARNING)
+                if attempt == max_retries:
+                    self.renderer.sign_status("⏱️", Fore.YELLOW, class_id_for_sign, sign_id, "签到失败：请求超时")
+            except aiohttp.ClientError as e_req:
+                self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} 请求错误 (尝试 {attempt}): {e_req}", LogLevel.ERROR)
+                if attempt == max_retries:
+                    self.renderer.sign_status("⚠️", Fore.RED, class_id_for_sign, sign_id, "签到失败：网络请求错误")
+            except Exception as e_inner: 
+                self.logger.log(f"班级 {class_id_for_sign}: 处理ID {sign_id} 时未知错误 (尝试 {attempt}): {e_inner}", LogLevel.ERROR, exc_info=True)
+                if attempt == max_retries:
+                    self.renderer.sign_status("💥", Fore.RED, class_id_for_sign, sign_id, "签到失败：发生内部错误")
+                return False 
+            
+            if attempt < max_retries:
+                await asyncio.sleep(2 * attempt)
+        
+        self.logger.log(f"班级 {class_id_for_sign}: ID {sign_id} {max_retries} 次尝试后仍未成功处理。", LogLevel.ERROR)
+        return False
+
+    def _get_async_session(self) -> 'aiohttp.ClientSession':
+        """在当前运行的事件循环中惰性创建 aiohttp 会话，连接池参数与同步会话的 network 配置一致。"""
+        if self._async_session is None or self._async_session.closed:
+            network_cfg = self.base_config.get("network") or {}
+            pool_maxsize = int(network_cfg.get("pool_maxsize", AppConstants.DEFAULT_HTTP_POOL_MAXSIZE))
+            pool_connections = int(network_cfg.get("pool_connections", AppConstants.DEFAULT_HTTP_POOL_CONNECTIONS))
+            connector = aiohttp.TCPConnector(
+                limit=pool_maxsize * pool_connections,
+                limit_per_host=pool_maxsize,
+                force_close=not network_cfg.get("keep_alive", AppConstants.DEFAULT_HTTP_KEEP_ALIVE)
+            )
+            self._async_session = aiohttp.ClientSession(connector=connector)
+            self.logger.log(f"SignService: aiohttp 会话已创建 (每主机连接: {pool_maxsize})。", LogLevel.DEBUG)
+        return self._async_session
+
+    async def close_async_session(self) -> None:
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+            self.logger.log("SignService: aiohttp 会话已关闭。", LogLevel.DEBUG)
+        self._async_session = None
+
+    def _get_response_classifier(self) -> SignResponseClassifier:
+        extra_phrases = self.remote_config_manager.get_setting("sign_response_phrases", {}) if self.remote_config_manager else {}
+        if self._response_classifier is None or extra_phrases is not self._response_phrases_source:
+            self._response_classifier = build_sign_response_classifier(extra_phrases, self.logger)
+            self._response_phrases_source = extra_phrases
+            self.logger.log("SignService: 签到响应分类短语表已编译。", LogLevel.DEBUG)
+        return self._response_classifier
+
+    def _extract_sign_result_message(self, html_response: str) -> str:
+        # Fast path: pull the title/desc divs out with a regex; build the soup only when they are missing or nested
+        result_message_raw = extract_result_message_fast(html_response)
+        if result_message_raw:
+            return result_message_raw
+
+        soup = make_soup(html_response, self.html_parser, self.parse_stats)
         title_tag = soup.find("div", id="title") or soup.find("div", class_="weui-msg__title")
         desc_tag = soup.find("div", id="text") or soup.find("div", class_="weui-msg__desc")
         
@@ -334,6 +713,16 @@ class SignService:
             body_text_tags = soup.find_all(["p", "h1", "h2", "h3", "div"], class_=lambda x: not x or ("button" not in str(x).lower() and "icon" not in str(x).lower()))
             candidate_messages = [tag.text.strip() for tag in body_text_tags if tag.text and tag.text.strip()]
             result_message_raw = ". ".join(list(dict.fromkeys(candidate_messages[:3]))) if candidate_messages else "未能解析签到响应HTML"
+        return result_message_raw
+
+    def _handle_sign_response_locked(self, html_response: str, sign_id: str, class_id_context: str) -> bool:
+        """异步模式下多个班级的响应可能在线程池中同时处理，串行执行以保护计数和“是否已通知”的判断。"""
+        with self._sign_response_lock:
+            return self._handle_sign_response(html_response, sign_id, class_id_context)
+
+    def _handle_sign_response(self, html_response: str, sign_id: str, class_id_context: str) -> bool:
+        result_message_raw = self._extract_sign_result_message(html_response)
+        response_category = self._get_response_classifier().classify(result_message_raw)
         
         self.logger.log(f"班级 {class_id_context} - 签到ID {sign_id} 响应原文: '{result_message_raw}'", LogLevel.INFO)
 
@@ -356,23 +745,23 @@ class SignService:
             "status_message": result_message_raw, 
         }
 
-        if "密码错误" in result_message_raw or "请输入密码" in result_message_raw:
-            self.invalid_sign_ids.add(sign_id) # Mark as permanently invalid
+        if response_category == SIGN_RESPONSE_PASSWORD:
+            self.mark_task(self.invalid_sign_ids, class_id_context, sign_id, response_category) # Mark as permanently invalid
             is_handled_definitively = True
             event_type = "SIGN_IN_FAILURE_PASSWORD"
             event_context["details"] = "该签到需要密码，脚本不支持。"
             console_status_icon = "🔑"; console_status_color = Fore.RED; console_message = "失败：需要密码"
             if sign_id not in self.notified_password_failure_ids:
                 should_send_notify = True
-                self.notified_password_failure_ids.add(sign_id)
+                self.mark_task(self.notified_password_failure_ids, class_id_context, sign_id, response_category)
 
-        elif "已签到过啦" in result_message_raw or "您已签到" in result_message_raw or "签过啦" in result_message_raw or ("打卡成功" in result_message_raw and "重复" in result_message_raw):
-            if sign_id not in self.signed_ids: # If not previously known as signed in this session
-                self.signed_ids.add(sign_id)
+        elif response_category == SIGN_RESPONSE_ALREADY_SIGNED:
+            if sign_id not in self.signed_ids: # If not previously known as signed (this session or a previous run)
+                self.mark_task(self.signed_ids, class_id_context, sign_id, response_category)
                 self.total_successful_sign_ins += 1
                 if sign_id not in self.notified_success_ids: # Send notification only on first confirmation
                     should_send_notify = True
-                    self.notified_success_ids.add(sign_id)
+                    self.mark_task(self.notified_success_ids, class_id_context, sign_id, response_category)
                     event_type = "SIGN_IN_ALREADY_DONE" # Or SIGN_IN_SUCCESS if preferred for this case
             is_handled_definitively = True
             console_status_icon = "👍"; console_status_color = Fore.CYAN
@@ -382,28 +771,28 @@ class SignService:
                  console_message = "成功 (先前已签到)" # More positive console message for first confirm
                  console_status_color = Fore.GREEN
 
-        elif "成功" in result_message_raw: 
+        elif response_category == SIGN_RESPONSE_SUCCESS:
             if sign_id not in self.signed_ids:
-                self.signed_ids.add(sign_id)
+                self.mark_task(self.signed_ids, class_id_context, sign_id, response_category)
                 self.total_successful_sign_ins += 1
             is_handled_definitively = True
             event_type = "SIGN_IN_SUCCESS"
             console_status_icon = "🎉"; console_status_color = Fore.GREEN; console_message = "签到成功！"
             if sign_id not in self.notified_success_ids:
                 should_send_notify = True
-                self.notified_success_ids.add(sign_id)
+                self.mark_task(self.notified_success_ids, class_id_context, sign_id, response_category)
         
         # For other cases, should_send_notify remains False by default
-        elif "不在签到时间" in result_message_raw or "还未开始" in result_message_raw or "已结束" in result_message_raw or "考勤未开始" in result_message_raw:
+        elif response_category == SIGN_RESPONSE_NOT_IN_TIME:
             is_handled_definitively = False 
             console_status_icon = "⏱️"; console_status_color = Fore.YELLOW; console_message = "状态：非签到时间/未开始/已结束"
             console_details = result_message_raw 
-        elif "不在签到范围" in result_message_raw or "距离太远" in result_message_raw:
+        elif response_category == SIGN_RESPONSE_OUT_OF_RANGE:
             is_handled_definitively = False 
             console_status_icon = "🗺️"; console_status_color = Fore.RED; console_message = "失败：不在签到范围"
             console_details = result_message_raw
-        elif "不存在" in result_message_raw or "参数错误" in result_message_raw or "无效的参数" in result_message_raw:
-            self.invalid_sign_ids.add(sign_id)
+        elif response_category == SIGN_RESPONSE_INVALID_TASK:
+            self.mark_task(self.invalid_sign_ids, class_id_context, sign_id, response_category)
             is_handled_definitively = True
             console_status_icon = "🚫"; console_status_color = Fore.MAGENTA; console_message = "失败：任务无效/不存在"
             console_details = result_message_raw
@@ -412,7 +801,7 @@ class SignService:
             console_status_icon = "❔"; console_status_color = Fore.CYAN; console_message = "结果未知"
             console_details = result_message_raw
 
-        self._print_formatted_sign_status(console_status_icon, console_status_color, class_id_context, sign_id, console_message, console_details)
+        self.renderer.sign_status(console_status_icon, console_status_color, class_id_context, sign_id, console_message, console_details)
         
         if should_send_notify and self.notification_manager and self.notification_manager.has_active_notifiers():
             event_context["event_type"] = event_type 
@@ -0,0 +1,187 @@
+# app/services/sign_state_store.py
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from app.constants import AppConstants
+from app.logger_setup import LoggerInterface, LogLevel
+
+# 持久化的任务状态种类，对应 SignService 中的同名集合
+TASK_STATE_SIGNED = "signed"
+TASK_STATE_INVALID = "invalid"
+TASK_STATE_NOTIFIED_SUCCESS = "notified_success"
+TASK_STATE_NOTIFIED_PASSWORD_FAILURE = "notified_password_failure"
+
+_END_TIME_RE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?)\s*结束")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS task_state (
+    user_id     TEXT NOT NULL,
+    kind        TEXT NOT NULL,
+    class_id    TEXT NOT NULL,
+    task_id     TEXT NOT NULL,
+    outcome     TEXT,
+    recorded_at REAL NOT NULL,
+    expires_at  REAL NOT NULL,
+    PRIMARY KEY (user_id, kind, class_id, task_id)
+)
+"""
+
+
+def task_expiry_timestamp(task: Optional[Mapping[str, Any]], now: Optional[float] = None) -> float:
+    """
+    任务状态的过期时间 (Unix 时间戳)：任务结束时间 (已过去时取当前时间) 加上 SIGN_STATE_EXPIRY_GRACE_SECONDS。
+
+    优先解析 end_time_text 中的绝对时间，其次用倒计时秒数估算；都没有时保留 SIGN_STATE_DEFAULT_TTL_SECONDS。
+    """
+    now = time.time() if now is None else now
+    if task:
+        match = _END_TIME_RE.search(task.get("end_time_text") or "")
+        if match:
+            time_format = "%Y-%m-%d %H:%M:%S" if match.group(1).count(":") == 2 else "%Y-%m-%d %H:%M"
+            try:
+                end_at = datetime.strptime(match.group(1), time_format).timestamp()
+                return max(end_at, now) + AppConstants.SIGN_STATE_EXPIRY_GRACE_SECONDS
+            except ValueError:
+                pass
+        countdown_seconds = task.get("countdown_seconds")
+        if isinstance(countdown_seconds, int) and countdown_seconds >= 0:
+            return now + countdown_seconds + AppConstants.SIGN_STATE_EXPIRY_GRACE_SECONDS
+    return now + AppConstants.SIGN_STATE_DEFAULT_TTL_SECONDS
+
+
+class SignStateStore:
+    """
+    已签到 / 无效 / 已通知的任务ID，按 (用户, 种类, 班级, 任务) 保存在 SQLite 中，重启后仍然有效。
+
+    第一次访问时才打开数据库并载入未过期的记录 (同时清除已过期的)，之后的查询只读内存，过期的记录视为不存在；
+    每次新增记录立即写入一行，并每隔 SIGN_STATE_PURGE_INTERVAL_SECONDS 从内存和数据库中清除过期记录。
+    db_path 为 None 或数据库不可用时只保存在内存中。
+    """
+
+    def __init__(self, logger: LoggerInterface, db_path: Optional[str], user_id: str = ""):
+        self.logger = logger
+        self.db_path = db_path
+        self.user_id = str(user_id or "")
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        self._entries: Dict[str, Dict[str, Tuple[str, float]]] = {} # kind -> {task_id: (class_id, expires_at)}
+        self._last_purge_at: float = time.time()
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                if self.db_path:
+                    self._open_and_load()
+            finally:
+                self._loaded = True # 载入完成 (或失败) 后才跳过加载检查
+
+    def _open_and_load(self) -> None:
+        try:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False) # type: ignore[arg-type]
+            conn.execute(_SCHEMA)
+            purged = conn.execute("DELETE FROM task_state WHERE expires_at <= ?", (time.time(),)).rowcount
+            rows = conn.execute(
+                "SELECT kind, class_id, task_id, expires_at FROM task_state WHERE user_id = ?", (self.user_id,)
+            ).fetchall()
+            conn.commit()
+        except sqlite3.Error as e:
+            self.logger.log(f"SignStateStore: 无法打开任务状态数据库 {self.db_path}: {e}，本次运行仅在内存中记录。", LogLevel.WARNING)
+            return
+        self._conn = conn
+        for kind, class_id, task_id, expires_at in rows:
+            self._entries.setdefault(kind, {})[task_id] = (class_id, expires_at)
+        self.logger.log(f"SignStateStore: 已载入 {len(rows)} 条任务状态 (清除过期 {purged} 条)。", LogLevel.DEBUG)
+
+    def contains(self, kind: str, task_id: str) -> bool:
+        self._ensure_loaded()
+        with self._lock:
+            entry = self._entries.get(kind, {}).get(task_id)
+        return entry is not None and entry[1] > time.time()
+
+    def task_ids(self, kind: str) -> Tuple[str, ...]:
+        self._ensure_loaded()
+        now = time.time()
+        with self._lock:
+            return tuple(task_id for task_id, (_, expires_at) in self._entries.get(kind, {}).items() if expires_at > now)
+
+    def _purge_expired(self, now: float) -> None:
+        """从内存和数据库中清除已过期的记录 (调用方持有 _lock)。"""
+        self._last_purge_at = now
+        purged = 0
+        for entries in self._entries.values():
+            expired_ids = [task_id for task_id, (_, expires_at) in entries.items() if expires_at <= now]
+            for task_id in expired_ids:
+                del entries[task_id]
+            purged += len(expired_ids)
+        if self._conn is not None:
+            try:
+                self._conn.execute("DELETE FROM task_state WHERE expires_at <= ?", (now,))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.log(f"SignStateStore: 清除过期任务状态失败: {e}", LogLevel.WARNING)
+        if purged:
+            self.logger.log(f"SignStateStore: 已清除 {purged} 条过期任务状态。", LogLevel.DEBUG)
+
+    def record(self, kind: str, task_id: str, class_id: str = "", outcome: Optional[str] = None, expires_at: Optional[float] = None) -> None:
+        self._ensure_loaded()
+        now = time.time()
+        expires_at = expires_at if expires_at is not None else now + AppConstants.SIGN_STATE_DEFAULT_TTL_SECONDS
+        with self._lock:
+            if now - self._last_purge_at >= AppConstants.SIGN_STATE_PURGE_INTERVAL_SECONDS:
+                self._purge_expired(now)
+            self._entries.setdefault(kind, {})[task_id] = (class_id, expires_at)
+            if self._conn is None:
+                return
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO task_state (user_id, kind, class_id, task_id, outcome, recorded_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.user_id, kind, class_id or "", task_id, outcome, now, expires_at)
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                self.logger.log(f"SignStateStore: 写入任务状态失败 ({kind}, {task_id}): {e}", LogLevel.WARNING)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.close()
+                except sqlite3.Error:
+                    pass
+                self._conn = None
+
+
+class TaskStateSet:
+    """SignStateStore 中某一种类的集合视图，支持 in / 迭代 / len，add 时可附带班级和结果。"""
+
+    def __init__(self, store: SignStateStore, kind: str):
+        self._store = store
+        self._kind = kind
+
+    def __contains__(self, task_id: object) -> bool:
+        return isinstance(task_id, str) and self._store.contains(self._kind, task_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._store.task_ids(self._kind))
+
+    def __len__(self) -> int:
+        return len(self._store.task_ids(self._kind))
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def __repr__(self) -> str:
+        return f"TaskStateSet({self._kind!r}, {set(self)!r})"
+
+    def add(self, task_id: str, class_id: str = "", outcome: Optional[str] = None, expires_at: Optional[float] = None) -> None:
+        self._store.record(self._kind, task_id, class_id, outcome, expires_at)
@@ -6,8 +6,10 @@
 
 from .background_job_manager import BackgroundJobManager
 from .main_task_runner import MainTaskRunner
+from .polling_scheduler import AdaptivePollScheduler
 
 __all__ = [
     "BackgroundJobManager",
     "MainTaskRunner",
+    "AdaptivePollScheduler",
 ]
\ No newline at end of file
@@ -1,113 +1,219 @@
 # app/tasks/background_job_manager.py
+import heapq
+import itertools
+import math
+import queue
 import threading
 import time
-import random # 可以用于给后台任务一个小的初始随机延迟
-from typing import List, Callable, Tuple, Any # Any 可能不需要
+import random # 用于给任务执行时间加入随机抖动，避免多个任务同时触发
+from typing import Callable, List, Optional, Tuple
 
+from app.constants import AppConstants
 from app.logger_setup import LoggerInterface, LogLevel
+from app.utils.wait_utils import CancellableWait
+
+MISSED_RUN_POLICIES = ("skip", "catch_up")
+
+
+class ScheduledJob:
+    """单个后台任务的调度信息。"""
+
+    def __init__(self, task: Callable[[], None], interval_seconds: int, job_name: str,
+                 jitter_seconds: float, missed_run_policy: str, max_runtime_seconds: Optional[float],
+                 first_run_delay_seconds: float = 0.0):
+        self.task = task
+        self.interval_seconds = interval_seconds
+        self.job_name = job_name
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.missed_run_policy = missed_run_policy
+        self.max_runtime_seconds = max_runtime_seconds
+        self.first_run_delay_seconds = max(0.0, first_run_delay_seconds)
+        self.next_run_at: float = 0.0        # 计划执行时间 (time.monotonic)，不含抖动
+        self.is_running: bool = False
+        self.run_started_at: Optional[float] = None
+        self.overrun_reported: bool = False
+
 
 class BackgroundJobManager:
-    def __init__(self, logger: LoggerInterface, application_run_event: threading.Event): # <--- 确认这里有 application_run_event
+    """
+    后台定时任务管理器。
+
+    所有任务共用一个调度线程：按下次执行时间维护一个最小堆，到期的任务交给少量 daemon 工作线程执行。
+    支持随机抖动、错过执行时的跳过/补跑策略、最长运行时间告警，以及同一任务不重叠执行。
+    """
+
+    def __init__(self, logger: LoggerInterface, application_run_event: threading.Event,
+                 max_workers: int = AppConstants.DEFAULT_BG_JOB_MAX_WORKERS):
         self.logger = logger
         self.application_run_event = application_run_event # 保存事件引用
-        self.jobs: List[Tuple[Callable[[], None], int, str]] = []
+        self.max_workers = max(1, max_workers)
+        self.jobs: List[ScheduledJob] = []
         self.threads: List[threading.Thread] = []
 
-    def add_job(self, task: Callable[[], None], interval_seconds: int, job_name: str):
-        """添加一个后台任务到任务列表。"""
+        self._heap: List[Tuple[float, int, ScheduledJob]] = [] # (实际执行时间, 序号, 任务)
+        self._heap_lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._scheduler_wait = CancellableWait(application_run_event)
+        self._job_queue: "queue.Queue[Optional[ScheduledJob]]" = queue.Queue()
+        self._stopped = False
+
+    def add_job(self, task: Callable[[], None], interval_seconds: int, job_name: str,
+                jitter_seconds: float = AppConstants.DEFAULT_BG_JOB_JITTER_SECONDS,
+                missed_run_policy: str = "skip",
+                max_runtime_seconds: Optional[float] = None,
+                first_run_delay_seconds: float = 0.0):
+        """添加一个后台任务。start_jobs() 之后添加的任务会立即加入调度；first_run_delay_seconds 推迟首次执行。"""
         if interval_seconds <= 0:
             self.logger.log(f"后台任务 '{job_name}' 的间隔时间必须为正数，无法添加。", LogLevel.WARNING)
             return
-        self.jobs.append((task, interval_seconds, job_name))
+        if missed_run_policy not in MISSED_RUN_POLICIES:
+            self.logger.log(f"后台任务 '{job_name}' 的错过执行策略 '{missed_run_policy}' 无效，使用 'skip'。", LogLevel.WARNING)
+            missed_run_policy = "skip"
+        job = ScheduledJob(task, interval_seconds, job_name, jitter_seconds, missed_run_policy, max_runtime_seconds, first_run_delay_seconds)
+        self.jobs.append(job)
         self.logger.log(f"后台任务 '{job_name}' 已添加到队列 (间隔: {interval_seconds}s)。", LogLevel.DEBUG)
-
-
-    def _run_job(self, task: Callable[[], None], interval_seconds: int, job_name: str):
-        """单个后台任务的执行循环，由单独的线程运行。"""
-        self.logger.log(
-            f"后台任务 '{job_name}' (间隔: {interval_seconds}s) 线程已启动。",
-            LogLevel.DEBUG,
-        )
-        
-        # 可以选择添加一个小的随机初始延迟，避免所有后台任务同时启动
-        # time.sleep(random.uniform(0.5, 3.0))
-
-        while self.application_run_event.is_set(): # 使用 self.application_run_event
-            try:
-                # 在执行任务前再次检查事件状态
-                if not self.application_run_event.is_set():
-                    self.logger.log(f"后台任务 '{job_name}' 检测到应用停止信号（任务执行前），即将退出。", LogLevel.DEBUG)
-                    break
-                
-                self.logger.log(f"后台任务 '{job_name}': 准备执行...", LogLevel.DEBUG)
-                task() # 执行实际任务
-                self.logger.log(f"后台任务 '{job_name}': 本轮执行完毕。", LogLevel.DEBUG)
-
-            except Exception as e:
-                self.logger.log(f"后台任务 '{job_name}' 在执行时发生错误: {e}", LogLevel.ERROR, exc_info=True)
-
-            # 等待下一个执行周期
-            # self.logger.log(f"后台任务 '{job_name}' 将在 {interval_seconds} 秒后再次执行。", LogLevel.DEBUG) # 这条日志可能过于频繁
-            for i in range(interval_seconds):
-                if not self.application_run_event.is_set(): # 在等待的每一秒都检查事件
-                    self.logger.log(f"后台任务 '{job_name}' 在等待期间检测到应用停止信号，即将退出。", LogLevel.DEBUG)
-                    break # 跳出等待循环
-                time.sleep(1)
-            
-            if not self.application_run_event.is_set(): # 再次检查，确保能跳出主 while 循环
-                 break
-
-        self.logger.log(
-            f"后台任务 '{job_name}' 线程已停止。", LogLevel.INFO # 线程停止是INFO级别
-        )
+        if self.threads:
+            self._schedule(job, time.monotonic() + job.first_run_delay_seconds)
+            self._scheduler_wait.wake()
 
     def start_jobs(self):
-        """启动所有已添加的后台任务，每个任务在自己的线程中运行。"""
+        """启动调度线程，已添加的任务立即 (或在各自的首次延迟后) 执行一次，之后按各自间隔执行。"""
         if not self.jobs:
             self.logger.log("没有已配置的后台任务需要启动。", LogLevel.INFO)
             return
-        
+
         if not self.application_run_event.is_set():
             self.logger.log("应用程序未处于运行状态，无法启动后台任务。", LogLevel.WARNING)
             return
 
-        self.threads = [] # 清空旧的线程列表（如果允许重复调用start_jobs的话）
-        for task, interval, name in self.jobs:
-            thread = threading.Thread(
-                target=self._run_job, args=(task, interval, name), daemon=True
-            )
-            self.threads.append(thread)
-            try:
+        if self.threads:
+            self.logger.log("后台任务调度线程已在运行，忽略重复启动。", LogLevel.DEBUG)
+            return
+
+        self._stopped = False
+        now = time.monotonic()
+        for job in self.jobs:
+            self._schedule(job, now + job.first_run_delay_seconds)
+
+        worker_count = min(self.max_workers, len(self.jobs))
+        new_threads = [threading.Thread(target=self._scheduler_loop, name="BgJobScheduler", daemon=True)]
+        new_threads += [threading.Thread(target=self._worker_loop, name=f"BgJobWorker-{i + 1}", daemon=True) for i in range(worker_count)]
+        try:
+            for thread in new_threads:
                 thread.start()
-            except RuntimeError as e: # 例如，如果线程已启动
-                self.logger.log(f"启动后台任务线程 '{name}' 失败: {e}", LogLevel.ERROR)
+            self.threads = new_threads
+            self.logger.log(f"后台任务调度线程已启动 ({len(self.jobs)} 个任务, 工作线程上限: {self.max_workers})。", LogLevel.INFO)
+        except RuntimeError as e:
+            self.logger.log(f"启动后台任务调度线程失败: {e}", LogLevel.ERROR)
 
-        if self.threads:
-             self.logger.log(f"{len(self.threads)} 个后台任务线程已成功启动。", LogLevel.INFO)
+    def _schedule(self, job: ScheduledJob, next_run_at: float, not_before: float = 0.0) -> None:
+        job.next_run_at = next_run_at
+        run_at = max(next_run_at + (random.uniform(0, job.jitter_seconds) if job.jitter_seconds else 0.0), not_before)
+        with self._heap_lock:
+            heapq.heappush(self._heap, (run_at, next(self._sequence), job))
+
+    def _compute_next_run(self, job: ScheduledJob, now: float) -> float:
+        next_run_at = job.next_run_at + job.interval_seconds
+        if next_run_at <= now and job.missed_run_policy == "skip":
+            # 跳过所有已错过的执行点，对齐到下一个未来的执行点
+            missed_intervals = math.floor((now - next_run_at) / job.interval_seconds) + 1
+            skipped_at = next_run_at
+            next_run_at += missed_intervals * job.interval_seconds
+            self.logger.log(f"后台任务 '{job.job_name}' 错过 {missed_intervals} 次执行 (自 {now - skipped_at:.0f}s 前)，已跳过。", LogLevel.DEBUG)
+        return next_run_at
+
+    def _scheduler_loop(self):
+        self.logger.log("后台任务调度线程开始运行。", LogLevel.DEBUG)
+        while self.application_run_event.is_set() and not self._stopped:
+            now = time.monotonic()
+            self._check_overruns(now)
+            due_jobs: List[ScheduledJob] = []
+            with self._heap_lock:
+                while self._heap and self._heap[0][0] <= now:
+                    due_jobs.append(heapq.heappop(self._heap)[2])
+                next_wake_in = (self._heap[0][0] - now) if self._heap else None
+
+            for job in due_jobs:
+                self._dispatch(job, now)
+
+            if due_jobs:
+                continue # 重新计算堆顶 (补跑策略下任务可能已再次到期)
+            wait_seconds = next_wake_in if next_wake_in is not None else AppConstants.DEFAULT_BG_JOB_IDLE_WAIT_SECONDS
+            if self._has_running_jobs_with_limit():
+                wait_seconds = min(wait_seconds, 1.0) # 有设置了最长运行时间的任务在执行时，及时检查超时
+            self._scheduler_wait.wait(wait_seconds)
+
+        self.logger.log("后台任务调度线程已停止。", LogLevel.INFO)
+
+    def _dispatch(self, job: ScheduledJob, now: float) -> None:
+        if not self.application_run_event.is_set() or self._stopped:
+            return
+        if job.is_running:
+            # 上一轮尚未结束，不重叠执行：skip 策略直接放弃本轮，catch_up 策略稍后重试本轮
+            if job.missed_run_policy == "catch_up":
+                self._schedule(job, job.next_run_at, not_before=now + 1.0)
+                return
+            self.logger.log(f"后台任务 '{job.job_name}' 上一轮仍在执行，跳过本轮。", LogLevel.DEBUG)
         else:
-             self.logger.log("没有后台任务线程被成功启动。", LogLevel.WARNING)
+            job.is_running = True
+            job.run_started_at = time.monotonic()
+            job.overrun_reported = False
+            self._job_queue.put(job)
+        self._schedule(job, self._compute_next_run(job, now))
+
+    def _worker_loop(self):
+        while True:
+            job = self._job_queue.get()
+            if job is None: # 停止信号
+                break
+            try:
+                self._run_job(job)
+            finally:
+                job.is_running = False
+
+    def _run_job(self, job: ScheduledJob):
+        """在工作线程中执行单个任务一次。"""
+        if not self.application_run_event.is_set():
+            self.logger.log(f"后台任务 '{job.job_name}' 检测到应用停止信号（任务执行前），跳过。", LogLevel.DEBUG)
+            return
+        try:
+            self.logger.log(f"后台任务 '{job.job_name}': 准备执行...", LogLevel.DEBUG)
+            job.task() # 执行实际任务
+            duration = time.monotonic() - (job.run_started_at or time.monotonic())
+            self.logger.log(f"后台任务 '{job.job_name}': 本轮执行完毕 (耗时 {duration:.2f}s)。", LogLevel.DEBUG)
+        except Exception as e:
+            self.logger.log(f"后台任务 '{job.job_name}' 在执行时发生错误: {e}", LogLevel.ERROR, exc_info=True)
 
+    def _has_running_jobs_with_limit(self) -> bool:
+        return any(job.max_runtime_seconds and job.is_running for job in self.jobs)
+
+    def _check_overruns(self, now: float) -> None:
+        """Python 线程无法被强制终止，超过最长运行时间的任务只记录告警，并依靠不重叠执行避免堆积。"""
+        for job in self.jobs:
+            if not job.max_runtime_seconds or job.overrun_reported or job.run_started_at is None:
+                continue
+            if not job.is_running:
+                continue
+            if now - job.run_started_at > job.max_runtime_seconds:
+                job.overrun_reported = True
+                self.logger.log(f"后台任务 '{job.job_name}' 已运行 {now - job.run_started_at:.0f}s，超过最长运行时间 {job.max_runtime_seconds:.0f}s。", LogLevel.WARNING)
 
     def stop_jobs(self):
         """
         请求停止所有后台任务。
-        主要是通过清除 application_run_event 来实现。
-        由于线程是daemon，它们会随主程序退出。
-        这个方法主要用于显式地记录停止意图和清理。
+        主要是通过清除 application_run_event 来实现；调度线程和工作线程都是 daemon，
+        正在执行的任务不会被等待。
         """
         self.logger.log("AppOrchestrator 请求停止所有后台任务...", LogLevel.INFO)
+        self._stopped = True
         if self.application_run_event.is_set():
             self.application_run_event.clear() # 这是主要的停止机制
-        
-        # daemon线程不需要显式join来让主程序退出，但如果想确保它们完成当前循环（如果它们不检查event那么频繁）
-        # 或者想记录它们确实退出了，可以join一下。
-        # for thread in self.threads:
-        #     if thread.is_alive():
-        #         self.logger.log(f"等待后台线程 {thread.name} 结束...", LogLevel.DEBUG)
-        #         thread.join(timeout=2.0) # 给2秒钟结束
-        #         if thread.is_alive():
-        #             self.logger.log(f"后台线程 {thread.name} 在超时后仍未结束。", LogLevel.WARNING)
-        
+        self._scheduler_wait.wake()
+        for _ in self.threads[1:]:
+            self._job_queue.put(None) # 每个工作线程一个停止信号
+
         self.logger.log("所有后台任务已被通知停止。", LogLevel.INFO)
         self.jobs = [] # 可以选择清空任务列表
-        self.threads = [] # 清空线程引用
\ No newline at end of file
+        self.threads = [] # 清空线程引用
+        with self._heap_lock:
+            self._heap = []
@@ -1,18 +1,26 @@
 # autocheckf/app/tasks/main_task_runner.py
-import sys
+import asyncio
+import math
 import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime
 from typing import Dict, Any, Optional, List, Set 
 from copy import deepcopy
 
-from colorama import Fore, Style # type: ignore
+from colorama import Fore # type: ignore
 
 from app.logger_setup import LoggerInterface, LogLevel
 from app.constants import AppConstants
 from app.config.remote_manager import RemoteConfigManager
-from app.services.sign_service import SignService, SignTaskDetails
+from app.config.remote_snapshot import DeviceAccessDecision
+from app.services.sign_service import SignService, SignTaskDetails, TaskDiff, ASYNC_HTTP_AVAILABLE
 from app.services.location_engine import LocationEngine, LocationError
+from app.tasks.polling_scheduler import AdaptivePollScheduler
+from app.utils.wait_utils import CancellableWait
+from app.utils.console_renderer import (
+    BufferingRenderer, ConsoleOutputBuffer, ConsoleRenderer, capture_console_output, create_console_renderer,
+)
 from app.exceptions import ServiceAccessError
 
 DataUploader = Any 
@@ -27,7 +35,8 @@ class MainTaskRunner:
                  sign_service: SignService,
                  location_engine: Optional[LocationEngine],
                  data_uploader_instance: Optional[DataUploader],
-                 device_id: str
+                 device_id: str,
+                 renderer: Optional[ConsoleRenderer] = None
                  ):
         self.logger = logger
         self.base_config = app_config
@@ -37,6 +46,7 @@ class MainTaskRunner:
         self.location_engine = location_engine
         self.data_uploader_instance = data_uploader_instance
         self.device_id = device_id
+        self.renderer: ConsoleRenderer = renderer or create_console_renderer()
 
         self.current_dynamic_coords: Dict[str, str] = {} 
         self.should_randomize: bool = False
@@ -52,7 +62,30 @@ class MainTaskRunner:
         self.is_exit_pending_confirmation: bool = False
         self._runtime_exit_after_sign: Optional[bool] = None
 
-        self.logger.log("MainTaskRunner 初始化完毕。", LogLevel.DEBUG)
+        self.execution_mode: str = self._resolve_execution_mode()
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        if self.execution_mode == "async":
+            # 异步模式下各班级的输出先缓冲，再按配置顺序输出 (见 _run_classes_async)
+            self.renderer = BufferingRenderer(self.renderer)
+            self.sign_service.renderer = BufferingRenderer(self.sign_service.renderer)
+        # 线程模式下并发获取班级任务的线程池，跨周期复用，close() 时关闭
+        fetch_concurrency = self._get_fetch_concurrency()
+        self._fetch_executor: Optional[ThreadPoolExecutor] = (
+            ThreadPoolExecutor(max_workers=fetch_concurrency, thread_name_prefix="ClassFetch")
+            if self.execution_mode == "threaded" and fetch_concurrency > 1 else None
+        )
+        self._cycle_wait = CancellableWait(application_run_event) # 周期间等待，可被立即签到请求或退出信号提前唤醒
+        self._immediate_cycle_requested: bool = False
+        self._settled_class_ids: Set[str] = set() # 上次处理后已无待处理任务的班级
+        self._class_ids_with_signed_tasks: Set[str] = set() # 最近一次检索中有已签到任务的班级
+        self.poll_scheduler: Optional[AdaptivePollScheduler] = self._create_poll_scheduler()
+        # 访问控制决定由 RemoteConfigManager 在配置刷新时计算并推送，主循环只读取这一引用
+        self._access_decision: DeviceAccessDecision = remote_config_manager.watch_device_access(
+            device_id, self._on_access_decision_changed
+        )
+        self._access_decision = remote_config_manager.get_access_decision() or self._access_decision # 注册期间若恰好有更新，以最新的为准
+
+        self.logger.log(f"MainTaskRunner 初始化完毕 (执行模式: {self.execution_mode})。", LogLevel.DEBUG)
 
     def get_runtime_exit_after_sign(self) -> bool:
         if self._runtime_exit_after_sign is None:
@@ -116,26 +149,25 @@ class MainTaskRunner:
             self._use_fixed_coordinates()
             return False
 
+    def _on_access_decision_changed(self, decision: DeviceAccessDecision) -> None:
+        """远程配置刷新后访问决定发生变化时由 RemoteConfigManager 调用 (在获取配置的线程中)。"""
+        self._access_decision = decision
+        if not decision.allowed:
+            self.logger.log(f"MainTaskRunner: 远程配置更新后访问被拒绝 ({decision.reason})，主循环将退出。", LogLevel.WARNING)
+            self._cycle_wait.wake() # 让主循环立即检查并退出，而不是等到下一周期
+
     def _should_application_run(self) -> bool:
         if not self.application_run_event.is_set(): return False 
         if self._user_requested_stop_flag: return False
-        try:
-            if self.remote_config_manager.is_globally_disabled():
-                disable_message = self.remote_config_manager.get_global_disable_message()
-                self.logger.log(f"MainTaskRunner: 全局禁用已激活: '{disable_message}'.", LogLevel.CRITICAL)
-                self._request_program_exit(f"全局禁用: {disable_message}", 1, is_error_exit=True)
-                raise ServiceAccessError(f"全局禁用: {disable_message}") 
-            
-            if not self.remote_config_manager.is_device_allowed(self.device_id):
-                message_template = self.remote_config_manager.get_device_block_message_template()
-                block_message = message_template.format(device_id=self.device_id)
-                self.logger.log(f"MainTaskRunner: 设备 {self.device_id} 被禁用: '{block_message}'.", LogLevel.CRITICAL)
-                self._request_program_exit(f"设备被禁用: {block_message}", 1, is_error_exit=True)
-                raise ServiceAccessError(f"设备被禁用: {block_message}")
-        except ServiceAccessError as sae: 
-            raise sae
-        except Exception as e: 
-            self.logger.log(f"MainTaskRunner: 检查远程访问控制时发生错误: {e}", LogLevel.ERROR, exc_info=True)
+        decision = self._access_decision
+        if decision.reason == DeviceAccessDecision.GLOBAL_DISABLE:
+            self.logger.log(f"MainTaskRunner: 全局禁用已激活: '{decision.message}'.", LogLevel.CRITICAL)
+            self._request_program_exit(f"全局禁用: {decision.message}", 1, is_error_exit=True)
+            raise ServiceAccessError(f"全局禁用: {decision.message}") 
+        if decision.reason == DeviceAccessDecision.DEVICE_BLOCKED:
+            self.logger.log(f"MainTaskRunner: 设备 {self.device_id} 被禁用: '{decision.message}'.", LogLevel.CRITICAL)
+            self._request_program_exit(f"设备被禁用: {decision.message}", 1, is_error_exit=True)
+            raise ServiceAccessError(f"设备被禁用: {decision.message}")
         return True
 
     def run_loop(self) -> None:
@@ -155,7 +187,9 @@ class MainTaskRunner:
                             self._wait_for_next_cycle()
                             continue
                     
-                    self._execute_sign_cycle()
+                    force_all_classes = self._immediate_cycle_requested
+                    self._immediate_cycle_requested = False
+                    self._execute_sign_cycle(force_all_classes=force_all_classes)
                     self._last_wait_message_time = None
                 else: 
                     self._log_waiting_for_time_range()
@@ -209,16 +243,10 @@ class MainTaskRunner:
             msg = (f"⏳ 当前时间 {now.strftime('%H:%M:%S')} 不在运行时间段 "
                    f"({self.base_config.get('start_time', 'N/A')}-{self.base_config.get('end_time', 'N/A')}) 内，等待中...")
             self.logger.log(msg, LogLevel.INFO) 
-            if sys.stdout.isatty():
-                 print(f"{Fore.YELLOW}{msg}{Style.RESET_ALL}")
+            self.renderer.message(msg, Fore.YELLOW)
             self._last_wait_message_time = now
 
     def _print_class_processing_summary(self, class_id: str, cycle_num: int, results: Dict[str, Any], class_details: Optional[Dict[str,str]] = None):
-        found_count = len(results.get('sign_ids_found', []))
-        processed_count = len(results.get('sign_ids_processed', []))
-        skipped_count = len(results.get('sign_ids_skipped', []))
-        error_msg = results.get('error')
-
         display_name = class_id
         if class_details and class_details.get('name'):
             display_name = class_details['name']
@@ -226,17 +254,30 @@ class MainTaskRunner:
                 display_name += f" (ID: {class_id}, 码: {class_details['code']})"
             else:
                  display_name += f" (ID: {class_id})"
-        
-        print(f"{Style.BRIGHT}{Fore.BLUE}├─📊 班级处理小结 [{display_name} | 全局周期: #{cycle_num}] {Style.RESET_ALL}")
-        print(f"{Fore.BLUE}│  发现任务: {Style.BRIGHT}{Fore.CYAN}{found_count}{Style.RESET_ALL}{Fore.BLUE} 个")
-        print(f"{Fore.BLUE}│  成功处理/已签: {Style.BRIGHT}{Fore.GREEN}{processed_count}{Style.RESET_ALL}{Fore.BLUE} 个")
-        print(f"{Fore.BLUE}│  跳过/无效/失败: {Style.BRIGHT}{Fore.YELLOW if skipped_count > 0 else Fore.CYAN}{skipped_count}{Style.RESET_ALL}{Fore.BLUE} 个")
-        if error_msg:
-            console_error_msg = (error_msg[:100] + '...') if len(error_msg) > 100 else error_msg
-            print(f"{Fore.RED}│  错误: {console_error_msg}{Style.RESET_ALL}")
-        print(f"{Style.BRIGHT}{Fore.BLUE}└──────────────────────────────────────────────────────────────────{Style.RESET_ALL}")
-
-    def _execute_sign_cycle(self) -> None:
+        self.renderer.class_summary(display_name, cycle_num, len(results.get('sign_ids_found', [])),
+                                    len(results.get('sign_ids_processed', [])), len(results.get('sign_ids_skipped', [])),
+                                    results.get('error'))
+
+    def _print_cycle_header(self, start_header_text: str, class_ids_to_poll: List[str]) -> None:
+        user_info = self.base_config.get("user_info", {})
+        coord_mode = '动态随机 (基于学校)' if self.should_randomize and self.base_config.get("selected_school") else '固定配置'
+        self.renderer.cycle_header(start_header_text, user_info.get("uname", "N/A"), user_info.get("uid", "N/A"),
+                                   self.base_config.get("remark", "N/A"), len(self.base_config.get("class_ids", [])),
+                                   len(class_ids_to_poll), coord_mode, self.current_dynamic_coords)
+
+    def _print_cycle_footer(self, end_header_text: str, total_tasks_found_in_cycle: int, successful_tasks_processed_in_cycle: int) -> None:
+        self.renderer.cycle_footer(end_header_text, total_tasks_found_in_cycle, successful_tasks_processed_in_cycle,
+                                   self.sign_service.get_total_successful_sign_ins())
+
+    def _execute_sign_cycle(self, force_all_classes: bool = False) -> None:
+        configured_class_ids = self.base_config.get("class_ids", [])
+        class_ids_to_poll = list(configured_class_ids)
+        if self.poll_scheduler is not None and not force_all_classes:
+            class_ids_to_poll = self.poll_scheduler.due_classes(configured_class_ids)
+            if configured_class_ids and not class_ids_to_poll:
+                self.logger.log("MainTaskRunner: 自适应轮询 - 当前没有到期的班级，跳过本次检索。", LogLevel.DEBUG)
+                return
+
         if self.should_randomize:
             if not self._regenerate_dynamic_coordinates(): 
                 self.logger.log("MainTaskRunner: 签到周期开始时动态通用坐标生成失败。", LogLevel.WARNING)
@@ -259,34 +300,17 @@ class MainTaskRunner:
 
         self.sign_cycle_count += 1
         overall_cycle_num = self.sign_cycle_count
+        self.sign_service.current_cycle = overall_cycle_num
         self.current_cycle_start = datetime.now()
         self.successfully_signed_class_ids_this_cycle.clear()
 
-        user_info = self.base_config.get("user_info", {})
-        uname = user_info.get("uname", "N/A")
-        uid = user_info.get("uid", "N/A")
-        remark = self.base_config.get("remark", "N/A")
-        num_classes_monitored = len(self.base_config.get("class_ids", []))
-        coord_mode = '动态随机 (基于学校)' if self.should_randomize and self.base_config.get("selected_school") else '固定配置'
-        
         start_header_text = f"签到周期 #{overall_cycle_num} ({self.current_cycle_start.strftime('%Y-%m-%d %H:%M:%S')}) 开始"
         self.logger.log(start_header_text, LogLevel.INFO) 
-
-        print(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'=' * 80}{Style.RESET_ALL}")
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}🚀 {start_header_text.center(76)} 🚀{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}│ {Style.DIM}用户:{Style.NORMAL} {Style.BRIGHT}{uname}{Style.NORMAL} (UID: {uid}) {Style.DIM}备注:{Style.NORMAL} {Style.BRIGHT}{remark}{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}│ {Style.DIM}监控班级数:{Style.NORMAL} {Style.BRIGHT}{num_classes_monitored}{Style.NORMAL}  {Style.DIM}坐标模式:{Style.NORMAL} {Style.BRIGHT}{coord_mode}{Style.RESET_ALL}")
-        if self.current_dynamic_coords:
-            coord_str = f"Lat: {self.current_dynamic_coords.get('lat', 'N/A')}, Lng: {self.current_dynamic_coords.get('lng', 'N/A')}, Acc: {self.current_dynamic_coords.get('acc', 'N/A')}"
-            print(f"{Fore.CYAN}│ {Style.DIM}当前坐标基准:{Style.NORMAL} {Style.BRIGHT}{coord_str}{Style.RESET_ALL}")
-        else:
-            print(f"{Fore.CYAN}│ {Style.DIM}当前坐标基准:{Style.NORMAL} {Fore.RED}{Style.BRIGHT}未设置或无效{Style.RESET_ALL}")
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'-' * 80}{Style.RESET_ALL}")
+        self._print_cycle_header(start_header_text, class_ids_to_poll)
         
         if self.current_dynamic_coords :
-             self.logger.log(f"本周期通用坐标基准: {self.current_dynamic_coords}", LogLevel.DEBUG)
+             self.logger.log(lambda: f"本周期通用坐标基准: {self.current_dynamic_coords}", LogLevel.DEBUG)
 
-        configured_class_ids = self.base_config.get("class_ids", [])
         all_fetched_class_details_list = self.base_config.get("all_fetched_class_details", []) or []
         details_map = {str(d.get("id")): d for d in all_fetched_class_details_list if isinstance(d, dict) and d.get("id")}
 
@@ -299,205 +323,51 @@ class MainTaskRunner:
                 "sign_ids_processed": [], "sign_ids_skipped": [], "error": "No Class IDs configured"
             }
             self._record_cycle_result()
-            print(f"{Fore.YELLOW}⚠️  配置中未找到班级ID，无法执行签到。{Style.RESET_ALL}")
-            print(f"{Fore.MAGENTA}{Style.BRIGHT}{'=' * 80}{Style.RESET_ALL}")
+            self.renderer.no_class_ids()
             return
 
         any_success_in_this_overall_cycle = False
         total_tasks_found_in_cycle = 0 
         successful_tasks_processed_in_cycle = 0
 
-        for class_id_to_process in configured_class_ids:
-            if not self.application_run_event.is_set(): break 
-            
-            class_detail_for_display = details_map.get(str(class_id_to_process))
-            class_display_name = class_id_to_process 
-            if class_detail_for_display and class_detail_for_display.get('name'):
-                class_display_name = class_detail_for_display['name']
-            
-            self.logger.log(f"--- 开始处理班级: {class_display_name} (ID: {class_id_to_process}, 全局周期 #{overall_cycle_num}) ---", LogLevel.INFO)
-            print(f"\n{Fore.BLUE}🔹 处理班级: {Style.BRIGHT}{class_display_name}{Style.NORMAL} (ID: {class_id_to_process}) ...{Style.RESET_ALL}")
-
-            class_cycle_had_success = False 
-            self.current_cycle_results = {
-                "cycle_num": overall_cycle_num, 
-                "class_id_processed_in_sub_cycle": class_id_to_process,
-                "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                "sign_ids_found": [], "sign_ids_processed": [], "sign_ids_skipped": [], "error": None
-            }
-            try:
-                sign_tasks_details: Optional[List[SignTaskDetails]] = self.sign_service.fetch_sign_task_details(class_id_to_process)
-
-                if sign_tasks_details is None:
-                    raise LocationError(f"获取班级 {class_display_name} 详细签到任务列表失败 (null returned)。")
-                
-                current_class_tasks_found = [task['id'] for task in sign_tasks_details]
-                self.current_cycle_results["sign_ids_found"] = current_class_tasks_found
-                total_tasks_found_in_cycle += len(current_class_tasks_found)
-
-
-                if not sign_tasks_details:
-                    self.logger.log(f"班级 {class_display_name}: 🔍 未发现新的签到任务。", LogLevel.INFO)
-                    print(f"{Fore.BLUE}│  🔍 {Style.NORMAL}班级 {class_display_name}: 未发现新的签到任务。{Style.RESET_ALL}")
-                else:
-                    self.logger.log(f"班级 {class_display_name}: 🔍 发现 {len(sign_tasks_details)} 个签到任务。", LogLevel.INFO)
-                    print(f"{Fore.BLUE}│  🔍 {Style.NORMAL}班级 {class_display_name}: 发现 {len(sign_tasks_details)} 个签到任务:{Style.RESET_ALL}")
-                    for idx, task_item in enumerate(sign_tasks_details):
-                        type_color = Fore.CYAN 
-                        parsed_type_str = str(task_item.get('type', 'unknown')).replace('_', ' ').title() # e.g. "Photo Gps"
-                        card_title_str = str(task_item.get('title', 'N/A')) # Original title from card
-
-                        if task_item['type'] == 'qr': type_color = Fore.YELLOW
-                        elif task_item['type'] == 'photo_gps': type_color = Fore.MAGENTA
-                        elif task_item['type'] == 'password': type_color = Fore.RED
-                        
-                        status_color = Fore.GREEN if task_item['status'] == '已签' else Fore.RED if task_item['status'] == '未签' else Fore.WHITE
-                        
-                        # Optimized display for type
-                        type_display = f"{type_color}{Style.BRIGHT}{parsed_type_str}{Style.NORMAL}"
-                        if card_title_str.lower() != parsed_type_str.lower() and card_title_str != "未知类型签到":
-                             type_display += f"{Style.RESET_ALL}{Fore.BLUE} (卡片标题: {Style.BRIGHT}{card_title_str}{Style.NORMAL})"
-
-
-                        print(f"{Fore.BLUE}│    {idx+1}. ID: {Style.BRIGHT}{task_item['id']}{Style.NORMAL}, "
-                              f"类型: {type_display}{Style.RESET_ALL}{Fore.BLUE}, "
-                              f"状态: {status_color}{Style.BRIGHT}{task_item['status']}{Style.NORMAL}{Style.RESET_ALL}{Fore.BLUE}, "
-                              f"结束: {Style.BRIGHT}{task_item.get('end_time_text', 'N/A')}{Style.RESET_ALL}")
-                        if task_item.get('photo_hint'):
-                            print(f"{Fore.BLUE}│       拍照提示: {Fore.LIGHTBLACK_EX}{task_item['photo_hint']}{Style.RESET_ALL}")
-                        if task_item.get('is_gps_limited_range'):
-                            gps_ranges_str = str(task_item.get('gps_ranges'))
-                            display_gps_ranges = (gps_ranges_str[:70] + '...') if len(gps_ranges_str) > 70 else gps_ranges_str
-                            print(f"{Fore.BLUE}│       GPS范围: {Fore.LIGHTBLACK_EX}{Style.BRIGHT}受限{Style.NORMAL} (详情: {display_gps_ranges}){Style.RESET_ALL}")
-                        elif task_item.get('is_gps_limited_range') is False:
-                             print(f"{Fore.BLUE}│       GPS范围: {Fore.LIGHTBLACK_EX}{Style.BRIGHT}无限制{Style.RESET_ALL}")
-                
-                for task in sign_tasks_details:
-                    sign_id_task = task['id']
-                    if not self.application_run_event.is_set(): break
+        if self.execution_mode == "async":
+            all_class_results = self._run_classes_async(class_ids_to_poll, overall_cycle_num, details_map)
+        else:
+            all_class_results = self._run_classes_threaded(class_ids_to_poll, overall_cycle_num, details_map)
 
-                    coords_for_this_attempt = self.current_dynamic_coords 
-                    
-                    if task['type'] in ['gps', 'photo_gps'] and task.get('is_gps_limited_range') and task.get('gps_ranges'):
-                        try:
-                            gps_info_list = task['gps_ranges'] 
-                            if gps_info_list and isinstance(gps_info_list[0], list) and len(gps_info_list[0]) == 3:
-                                target_gps_params = gps_info_list[0] 
-                                base_lat_str, base_lng_str, radius_m_any = str(target_gps_params[0]), str(target_gps_params[1]), target_gps_params[2]
-                                
-                                base_lat_f = float(base_lat_str)
-                                base_lng_f = float(base_lng_str)
-                                radius_m_f = float(str(radius_m_any))
-
-                                effective_max_offset = min(radius_m_f * 0.3, AppConstants.MAX_RANDOM_OFFSET_METERS, 30.0) 
-                                effective_max_offset = max(effective_max_offset, 1.0)
-
-                                if self.location_engine: 
-                                    offset_lat, offset_lng = self.location_engine._add_random_offset(base_lat_f, base_lng_f, effective_max_offset) # type: ignore
-                                    coords_for_this_attempt = {
-                                        "lat": f"{offset_lat:.6f}", "lng": f"{offset_lng:.6f}",
-                                        "acc": str(AppConstants.DEFAULT_ACCURACY) 
-                                    }
-                                    self.logger.log(f"任务ID {sign_id_task}: 使用任务提供GPS基点 ({base_lat_f:.5f}, {base_lng_f:.5f}, R={radius_m_f}m, OffsetMax={effective_max_offset:.1f}m) 生成签到坐标: {coords_for_this_attempt}", LogLevel.INFO)
-                                else: 
-                                    self.logger.log(f"任务ID {sign_id_task}: LocationEngine不可用，将使用原始任务GPS基点 (无偏移)。", LogLevel.WARNING)
-                                    coords_for_this_attempt = {"lat": f"{base_lat_f:.6f}", "lng": f"{base_lng_f:.6f}", "acc": str(AppConstants.DEFAULT_ACCURACY)}
-                            else:
-                                self.logger.log(f"任务ID {sign_id_task}: GPS范围数据格式不正确: {task.get('gps_ranges')}。将使用周期默认坐标。", LogLevel.WARNING)
-                        except (ValueError, TypeError, IndexError) as e_parse_gps:
-                            self.logger.log(f"任务ID {sign_id_task}: 解析任务提供的GPS范围数据时出错: {e_parse_gps}。将使用周期默认坐标。", LogLevel.WARNING)
-                    
-                    if not coords_for_this_attempt: 
-                        self.logger.log(f"任务ID {sign_id_task}: 无法确定签到坐标！之前已设置周期通用坐标: {self.current_dynamic_coords}", LogLevel.ERROR)
-                        coords_for_this_attempt = self.current_dynamic_coords
-                        if not coords_for_this_attempt: 
-                            self.logger.log(f"任务ID {sign_id_task}: 通用周期坐标也无效，无法签到！", LogLevel.CRITICAL)
-                            if sign_id_task not in self.current_cycle_results["sign_ids_skipped"]: self.current_cycle_results["sign_ids_skipped"].append(sign_id_task)
-                            self.current_cycle_results["error"] = (self.current_cycle_results.get("error") or "") + f"; Task {sign_id_task} skipped, no valid coordinates"
-                            continue 
-                    
-                    self.sign_service.set_current_coordinates(coords_for_this_attempt)
-
-                    if task['status'] == '已签':
-                        if sign_id_task not in self.sign_service.signed_ids: self.sign_service.signed_ids.add(sign_id_task) 
-                        if sign_id_task not in self.current_cycle_results["sign_ids_processed"]: self.current_cycle_results["sign_ids_processed"].append(sign_id_task)
-                        any_success_in_this_overall_cycle = True; class_cycle_had_success = True
-                        successful_tasks_processed_in_cycle +=1 
-                        self.sign_service._print_formatted_sign_status("👍", Fore.CYAN, class_id_to_process, sign_id_task, f"状态确认：已签到过 ({task.get('title','N/A')})") # Use task.get('title')
-                        continue
-
-                    if sign_id_task in self.sign_service.invalid_sign_ids:
-                        if sign_id_task not in self.current_cycle_results["sign_ids_skipped"]: self.current_cycle_results["sign_ids_skipped"].append(sign_id_task)
-                        self.sign_service._print_formatted_sign_status("🚫", Fore.MAGENTA, class_id_to_process, sign_id_task, "跳过：任务先前已标记为无效")
-                        continue
-                    
-                    if task['type'] == 'password' and task.get('requires_password'):
-                        self.logger.log(f"班级 {class_display_name}: ⏭️ 跳过密码签到任务ID: {sign_id_task}", LogLevel.WARNING)
-                        self.sign_service._print_formatted_sign_status("🔑", Fore.RED, class_id_to_process, sign_id_task, "跳过：密码签到", "脚本不支持自动输入密码。")
-                        self.sign_service.invalid_sign_ids.add(sign_id_task) 
-                        if sign_id_task not in self.current_cycle_results["sign_ids_skipped"]: self.current_cycle_results["sign_ids_skipped"].append(sign_id_task)
-                        continue
-                    
-                    if task['type'] == 'roll_call' and not task.get('raw_onclick'): 
-                        self.logger.log(f"班级 {class_display_name}: ℹ️ 识别为教师手动点名任务ID: {sign_id_task}，脚本无法操作。", LogLevel.INFO)
-                        self.sign_service._print_formatted_sign_status("📝", Fore.CYAN, class_id_to_process, sign_id_task, "教师点名", "此类型签到需教师操作。")
-                        if sign_id_task not in self.current_cycle_results["sign_ids_skipped"]: self.current_cycle_results["sign_ids_skipped"].append(sign_id_task)
-                        continue
-                    
-                    self.logger.log(f"班级 {class_display_name}: 尝试处理签到任务ID: {sign_id_task} (类型: {task['type']}, 标题: {task.get('title','N/A')}) 使用坐标: {coords_for_this_attempt}", LogLevel.DEBUG)
-                    is_definitively_handled_by_attempt = self.sign_service.attempt_sign(sign_id_task, class_id_to_process)
-                    
-                    if sign_id_task in self.sign_service.signed_ids: 
-                        if sign_id_task not in self.current_cycle_results["sign_ids_processed"]:
-                             self.current_cycle_results["sign_ids_processed"].append(sign_id_task)
-                        any_success_in_this_overall_cycle = True; class_cycle_had_success = True
-                        successful_tasks_processed_in_cycle +=1 
-                    elif sign_id_task in self.sign_service.invalid_sign_ids: 
-                        if sign_id_task not in self.current_cycle_results["sign_ids_skipped"]:
-                             self.current_cycle_results["sign_ids_skipped"].append(sign_id_task)
-                    elif not is_definitively_handled_by_attempt: 
-                        if sign_id_task not in self.current_cycle_results["sign_ids_skipped"]:
-                             self.current_cycle_results["sign_ids_skipped"].append(sign_id_task)
-            
-            except (LocationError, Exception) as e_class_proc:
-                error_msg_class = f"班级 {class_display_name} 处理时发生错误: {type(e_class_proc).__name__}: {str(e_class_proc)}"
-                self.logger.log(f"❌ {error_msg_class}", LogLevel.ERROR, exc_info=True)
-                print(f"{Fore.RED}│  ❌ 班级 {class_display_name} 处理错误: {str(e_class_proc)[:100]}{Style.RESET_ALL}")
-                if self.current_cycle_results: self.current_cycle_results["error"] = error_msg_class
-            finally:
-                if self.current_cycle_results: 
-                    self._record_cycle_result()
-                    self._print_class_processing_summary(class_id_to_process, overall_cycle_num, self.current_cycle_results, class_detail_for_display)
-                
-                summary_lines_for_log = [f"--- 班级ID: {class_id_to_process} 处理完毕 (全局周期 #{overall_cycle_num}) 日志小结 ---",
-                           f"  子周期开始(日志): {self.current_cycle_results.get('start_time', 'N/A') if self.current_cycle_results else 'N/A'}",
-                           f"  发现任务(日志): {len(self.current_cycle_results.get('sign_ids_found',[])) if self.current_cycle_results else 'N/A'} 个",
-                           f"  成功签到/已签(日志): {len(self.current_cycle_results.get('sign_ids_processed',[])) if self.current_cycle_results else 'N/A'} 个",
-                           f"  跳过/无效/失败(日志): {len(self.current_cycle_results.get('sign_ids_skipped',[])) if self.current_cycle_results else 'N/A'} 个"]
-                if self.current_cycle_results and self.current_cycle_results.get("error"): 
-                    summary_lines_for_log.append(f"  - ❌ 错误(日志): {self.current_cycle_results['error']}")
-                self.logger.log("\n".join(summary_lines_for_log), LogLevel.DEBUG) 
-            
-            if class_cycle_had_success:
+        for class_id_to_process, class_results in zip(class_ids_to_poll, all_class_results):
+            total_tasks_found_in_cycle += len(class_results.get("sign_ids_found", []))
+            successful_tasks_processed_in_cycle += len(class_results.get("sign_ids_processed", []))
+            if class_results.get("sign_ids_processed"):
+                any_success_in_this_overall_cycle = True
                 self.successfully_signed_class_ids_this_cycle.add(class_id_to_process)
+                self._class_ids_with_signed_tasks.add(class_id_to_process)
+            else:
+                self._class_ids_with_signed_tasks.discard(class_id_to_process)
+            self.logger.log_event(
+                "class_processed", LogLevel.INFO if not class_results.get("error") else LogLevel.WARNING,
+                component="MainTaskRunner", cycle=overall_cycle_num, class_id=class_id_to_process,
+                tasks_found=len(class_results.get("sign_ids_found", [])),
+                tasks_processed=len(class_results.get("sign_ids_processed", [])),
+                tasks_skipped=len(class_results.get("sign_ids_skipped", [])),
+                error=class_results.get("error")
+            )
+        # 自适应轮询时本周期未检索的班级沿用其最近一次检索的签到结果，供“所有班级”退出模式判断
+        signed_class_ids_for_exit_check = self.successfully_signed_class_ids_this_cycle | (
+            self._class_ids_with_signed_tasks - set(class_ids_to_poll))
         
         overall_duration = (datetime.now() - (self.current_cycle_start or datetime.now())).total_seconds()
         
         end_header_text = f"签到周期 #{overall_cycle_num} 全部处理完毕 (耗时: {overall_duration:.2f}s)"
         self.logger.log(end_header_text, LogLevel.INFO)
+        self.logger.log_event(
+            "sign_cycle", component="MainTaskRunner", cycle=overall_cycle_num,
+            duration_ms=round(overall_duration * 1000, 1), execution_mode=self.execution_mode,
+            classes_polled=len(class_ids_to_poll), tasks_found=total_tasks_found_in_cycle,
+            tasks_processed=successful_tasks_processed_in_cycle
+        )
 
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'-' * 80}{Style.RESET_ALL}")
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}🏁 {end_header_text.center(76)} 🏁{Style.RESET_ALL}")
-        
-        if total_tasks_found_in_cycle > 0:
-            success_rate = (successful_tasks_processed_in_cycle / total_tasks_found_in_cycle) * 100
-            print(f"{Fore.CYAN}│ {Style.DIM}本周期小结:{Style.NORMAL} 共发现 {Style.BRIGHT}{total_tasks_found_in_cycle}{Style.NORMAL} 个任务，成功处理/确认 {Style.BRIGHT}{Fore.GREEN}{successful_tasks_processed_in_cycle}{Style.NORMAL}{Fore.CYAN} 个 (成功率: {success_rate:.1f}%)。{Style.RESET_ALL}")
-        else:
-            print(f"{Fore.CYAN}│ {Style.DIM}本周期小结:{Style.NORMAL} 未发现可处理的签到任务。{Style.RESET_ALL}")
-        
-        total_signed_ever = self.sign_service.get_total_successful_sign_ins()
-        print(f"{Fore.CYAN}│ {Style.DIM}累计成功签到 (自启动或记录):{Style.NORMAL} {Style.BRIGHT}{Fore.GREEN}{total_signed_ever}{Style.RESET_ALL}")
-        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'=' * 80}{Style.RESET_ALL}\n")
+        self._print_cycle_footer(end_header_text, total_tasks_found_in_cycle, successful_tasks_processed_in_cycle)
         
         exit_after_sign_runtime = self.get_runtime_exit_after_sign()
         if exit_after_sign_runtime:
@@ -509,7 +379,7 @@ class MainTaskRunner:
             elif exit_mode_cfg == "all":
                 if not configured_class_ids: 
                     ready_to_exit_prog = True; exit_reason = "未配置班级，符合“所有班级”退出条件"
-                elif set(configured_class_ids).issubset(self.successfully_signed_class_ids_this_cycle):
+                elif set(configured_class_ids).issubset(signed_class_ids_for_exit_check):
                     ready_to_exit_prog = True; exit_reason = "检测到所有配置班级均成功签到"
             
             if ready_to_exit_prog:
@@ -517,27 +387,453 @@ class MainTaskRunner:
                 self.is_exit_pending_confirmation = True 
                 self._request_program_exit(f"{exit_reason} (模式: {exit_mode_cfg})，符合退出条件。", 0)
 
+    def _run_classes_threaded(self, class_ids: List[str], overall_cycle_num: int, details_map: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+        prefetched_tasks_by_class = self._fetch_all_class_tasks(class_ids)
+        all_class_results: List[Dict[str, Any]] = []
+        for class_id_to_process in class_ids:
+            if not self.application_run_event.is_set(): break 
+            all_class_results.append(self._process_class(
+                class_id_to_process, overall_cycle_num,
+                details_map.get(str(class_id_to_process)),
+                prefetched_tasks_by_class.get(class_id_to_process)
+            ))
+        return all_class_results
+
+    def _fetch_all_class_tasks(self, class_ids: List[str]) -> Dict[str, Any]:
+        """
+        并发获取所有班级的签到任务列表。
+
+        返回 {班级ID: 任务列表 | None | Exception}，由调用方按配置顺序逐个处理，
+        因此控制台输出和周期结果的记录顺序与串行获取时一致。
+        """
+        executor = self._fetch_executor
+        if executor is None or len(class_ids) <= 1:
+            fetched: Dict[str, Any] = {}
+            for class_id in class_ids:
+                if not self.application_run_event.is_set(): break
+                try:
+                    fetched[class_id] = self.sign_service.fetch_sign_task_details(class_id)
+                except Exception as e_fetch:
+                    fetched[class_id] = e_fetch
+            return fetched
+
+        self.logger.log(lambda: f"MainTaskRunner: 并发获取 {len(class_ids)} 个班级的签到任务 (并发数: {min(self._get_fetch_concurrency(), len(class_ids))})。", LogLevel.DEBUG)
+        fetch_start = time.monotonic()
+        futures: Dict[str, Future] = {}
+        try:
+            for class_id in class_ids:
+                if not self.application_run_event.is_set(): break
+                futures[class_id] = executor.submit(self.sign_service.fetch_sign_task_details, class_id)
+            # 分段等待，应用停止时不再等待剩余的获取 (与串行获取在班级之间检查停止信号一致)
+            pending = set(futures.values())
+            while pending and self.application_run_event.is_set():
+                _, pending = wait(pending, timeout=AppConstants.FETCH_STOP_CHECK_INTERVAL_SECONDS, return_when=FIRST_COMPLETED)
+        finally:
+            if not self.application_run_event.is_set():
+                for future in futures.values():
+                    future.cancel() # 尚未开始的获取直接取消；正在进行的获取在后台结束，结果被丢弃
+        fetched = {}
+        for class_id, future in futures.items():
+            if not future.done() or future.cancelled():
+                continue # 应用停止时未完成的班级不返回结果
+            try:
+                fetched[class_id] = future.result()
+            except Exception as e_fetch:
+                fetched[class_id] = e_fetch
+        if not self.application_run_event.is_set():
+            self.logger.log(f"MainTaskRunner: 应用停止，已放弃 {len(class_ids) - len(fetched)} 个班级的签到任务获取。", LogLevel.DEBUG)
+            return fetched
+        self.logger.log(lambda: f"MainTaskRunner: 全部班级签到任务获取完毕 (耗时: {time.monotonic() - fetch_start:.2f}s)。", LogLevel.DEBUG)
+        return fetched
+
+    def _create_poll_scheduler(self) -> Optional[AdaptivePollScheduler]:
+        polling_cfg = self.base_config.get("polling") or {}
+        if not polling_cfg.get("adaptive", AppConstants.DEFAULT_ADAPTIVE_POLLING):
+            return None
+        scheduler = AdaptivePollScheduler(
+            base_interval=self.base_config.get("time", AppConstants.DEFAULT_SEARCH_INTERVAL),
+            min_interval=polling_cfg.get("min_interval_seconds", AppConstants.DEFAULT_ADAPTIVE_MIN_INTERVAL_SECONDS),
+            max_interval=polling_cfg.get("max_interval_seconds", AppConstants.DEFAULT_ADAPTIVE_MAX_INTERVAL_SECONDS),
+            backoff_factor=polling_cfg.get("backoff_factor", AppConstants.DEFAULT_ADAPTIVE_BACKOFF_FACTOR),
+            near_window=polling_cfg.get("near_window_seconds", AppConstants.DEFAULT_ADAPTIVE_NEAR_WINDOW_SECONDS)
+        )
+        self.logger.log(f"MainTaskRunner: 已启用自适应轮询 (间隔 {scheduler.min_interval:.0f}s ~ {scheduler.max_interval:.0f}s)。", LogLevel.INFO)
+        return scheduler
+
+    def _get_fetch_concurrency(self) -> int:
+        polling_cfg = self.base_config.get("polling") or {}
+        try:
+            return max(1, int(polling_cfg.get("fetch_concurrency", AppConstants.DEFAULT_FETCH_CONCURRENCY)))
+        except (TypeError, ValueError):
+            return AppConstants.DEFAULT_FETCH_CONCURRENCY
+
+    def _new_class_results(self, class_id_to_process: str, overall_cycle_num: int) -> Dict[str, Any]:
+        return {
+            "cycle_num": overall_cycle_num, 
+            "class_id_processed_in_sub_cycle": class_id_to_process,
+            "start_time": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "sign_ids_found": [], "sign_ids_processed": [], "sign_ids_skipped": [], "error": None
+        }
+
+    @staticmethod
+    def _get_class_display_name(class_id_to_process: str, class_detail_for_display: Optional[Dict[str, str]]) -> str:
+        if class_detail_for_display and class_detail_for_display.get('name'):
+            return class_detail_for_display['name']
+        return class_id_to_process
+
+    def _log_class_start(self, class_id_to_process: str, class_display_name: str, overall_cycle_num: int) -> None:
+        self.logger.log(f"--- 开始处理班级: {class_display_name} (ID: {class_id_to_process}, 全局周期 #{overall_cycle_num}) ---", LogLevel.INFO)
+        self.renderer.class_start(class_id_to_process, class_display_name)
+
+    def _display_class_tasks(self, class_display_name: str, sign_tasks_details: List[SignTaskDetails]) -> None:
+        if not sign_tasks_details:
+            self.logger.log(f"班级 {class_display_name}: 🔍 未发现新的签到任务。", LogLevel.INFO)
+        else:
+            self.logger.log(f"班级 {class_display_name}: 🔍 发现 {len(sign_tasks_details)} 个签到任务。", LogLevel.INFO)
+        self.renderer.class_tasks(class_display_name, sign_tasks_details)
+
+    def _display_task_diff(self, class_display_name: str, sign_tasks_details: List[SignTaskDetails], task_diff: Optional[TaskDiff]) -> None:
+        """只展示相对上一周期的变化 (新增、状态变化、移除)；首次获取时展示完整列表。"""
+        if task_diff is None or task_diff.get("initial"):
+            self._display_class_tasks(class_display_name, sign_tasks_details)
+            return
+        added, status_changed, removed = task_diff["added"], task_diff["status_changed"], task_diff["removed"]
+        if not (added or status_changed or removed):
+            self.logger.log(lambda: f"班级 {class_display_name}: 签到任务无变化 (共 {len(sign_tasks_details)} 个)。", LogLevel.DEBUG)
+        else:
+            self.logger.log(f"班级 {class_display_name}: 🔍 任务变化 - 新增 {len(added)} 个, 状态变化 {len(status_changed)} 个, 移除 {len(removed)} 个。", LogLevel.INFO)
+            for old_status, task_item in status_changed:
+                self.logger.log(f"班级 {class_display_name}: 任务ID {task_item['id']} 状态变化: {old_status} → {task_item['status']}", LogLevel.INFO)
+            for removed_task_id in removed:
+                self.logger.log(f"班级 {class_display_name}: 任务ID {removed_task_id} 已从签到列表移除。", LogLevel.INFO)
+        self.renderer.class_task_diff(class_display_name, len(sign_tasks_details), added, status_changed, removed)
+
+    def _prepare_task_attempt(self, task: SignTaskDetails, class_id_to_process: str, class_display_name: str, class_results: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        """
+        对单个任务做签到前检查并确定本次签到使用的坐标。
+        返回 None 表示该任务无需 (或无法) 签到，相关记录已写入 class_results。
+        """
+        sign_id_task = task['id']
+        coords_for_this_attempt = self.current_dynamic_coords 
+        
+        if task['type'] in ['gps', 'photo_gps'] and task.get('is_gps_limited_range') and task.get('gps_ranges'):
+            try:
+                gps_info_list = task['gps_ranges'] 
+                if gps_info_list and isinstance(gps_info_list[0], list) and len(gps_info_list[0]) == 3:
+                    target_gps_params = gps_info_list[0] 
+                    base_lat_str, base_lng_str, radius_m_any = str(target_gps_params[0]), str(target_gps_params[1]), target_gps_params[2]
+                    
+                    base_lat_f = float(base_lat_str)
+                    base_lng_f = float(base_lng_str)
+                    radius_m_f = float(str(radius_m_any))
+
+                    effective_max_offset = min(radius_m_f * 0.3, AppConstants.MAX_RANDOM_OFFSET_METERS, 30.0) 
+                    effective_max_offset = max(effective_max_offset, 1.0)
+
+                    if self.location_engine: 
+                        offset_lat, offset_lng = self.location_engine._add_random_offset(base_lat_f, base_lng_f, effective_max_offset) # type: ignore
+                        coords_for_this_attempt = {
+                            "lat": f"{offset_lat:.6f}", "lng": f"{offset_lng:.6f}",
+                            "acc": str(AppConstants.DEFAULT_ACCURACY) 
+                        }
+                        self.logger.log(f"任务ID {sign_id_task}: 使用任务提供GPS基点 ({base_lat_f:.5f}, {base_lng_f:.5f}, R={radius_m_f}m, OffsetMax={effective_max_offset:.1f}m) 生成签到坐标: {coords_for_this_attempt}", LogLevel.INFO)
+                    else: 
+                        self.logger.log(f"任务ID {sign_id_task}: LocationEngine不可用，将使用原始任务GPS基点 (无偏移)。", LogLevel.WARNING)
+                        coords_for_this_attempt = {"lat": f"{base_lat_f:.6f}", "lng": f"{base_lng_f:.6f}", "acc": str(AppConstants.DEFAULT_ACCURACY)}
+                else:
+                    self.logger.log(f"任务ID {sign_id_task}: GPS范围数据格式不正确: {task.get('gps_ranges')}。将使用周期默认坐标。", LogLevel.WARNING)
+            except (ValueError, TypeError, IndexError) as e_parse_gps:
+                self.logger.log(f"任务ID {sign_id_task}: 解析任务提供的GPS范围数据时出错: {e_parse_gps}。将使用周期默认坐标。", LogLevel.WARNING)
+        
+        if not coords_for_this_attempt: 
+            self.logger.log(f"任务ID {sign_id_task}: 无法确定签到坐标！之前已设置周期通用坐标: {self.current_dynamic_coords}", LogLevel.ERROR)
+            coords_for_this_attempt = self.current_dynamic_coords
+            if not coords_for_this_attempt: 
+                self.logger.log(f"任务ID {sign_id_task}: 通用周期坐标也无效，无法签到！", LogLevel.CRITICAL)
+                if sign_id_task not in class_results["sign_ids_skipped"]: class_results["sign_ids_skipped"].append(sign_id_task)
+                class_results["error"] = (class_results.get("error") or "") + f"; Task {sign_id_task} skipped, no valid coordinates"
+                return None
+
+        if task['status'] == '已签':
+            if sign_id_task not in self.sign_service.signed_ids: self.sign_service.mark_task(self.sign_service.signed_ids, class_id_to_process, sign_id_task, "status_signed") 
+            if sign_id_task not in class_results["sign_ids_processed"]: class_results["sign_ids_processed"].append(sign_id_task)
+            self.renderer.sign_status("👍", Fore.CYAN, class_id_to_process, sign_id_task, f"状态确认：已签到过 ({task.get('title','N/A')})") # Use task.get('title')
+            return None
+
+        if sign_id_task in self.sign_service.invalid_sign_ids:
+            if sign_id_task not in class_results["sign_ids_skipped"]: class_results["sign_ids_skipped"].append(sign_id_task)
+            self.renderer.sign_status("🚫", Fore.MAGENTA, class_id_to_process, sign_id_task, "跳过：任务先前已标记为无效")
+            return None
+        
+        if task['type'] == 'password' and task.get('requires_password'):
+            self.logger.log(f"班级 {class_display_name}: ⏭️ 跳过密码签到任务ID: {sign_id_task}", LogLevel.WARNING)
+            self.renderer.sign_status("🔑", Fore.RED, class_id_to_process, sign_id_task, "跳过：密码签到", "脚本不支持自动输入密码。")
+            self.sign_service.mark_task(self.sign_service.invalid_sign_ids, class_id_to_process, sign_id_task, "password_task") 
+            if sign_id_task not in class_results["sign_ids_skipped"]: class_results["sign_ids_skipped"].append(sign_id_task)
+            return None
+        
+        if task['type'] == 'roll_call' and not task.get('raw_onclick'): 
+            self.logger.log(f"班级 {class_display_name}: ℹ️ 识别为教师手动点名任务ID: {sign_id_task}，脚本无法操作。", LogLevel.INFO)
+            self.renderer.sign_status("📝", Fore.CYAN, class_id_to_process, sign_id_task, "教师点名", "此类型签到需教师操作。")
+            if sign_id_task not in class_results["sign_ids_skipped"]: class_results["sign_ids_skipped"].append(sign_id_task)
+            return None
+        
+        self.logger.log(lambda: f"班级 {class_display_name}: 尝试处理签到任务ID: {sign_id_task} (类型: {task['type']}, 标题: {task.get('title','N/A')}) 使用坐标: {coords_for_this_attempt}", LogLevel.DEBUG)
+        return coords_for_this_attempt
+
+    def _record_attempt_outcome(self, sign_id_task: str, is_definitively_handled_by_attempt: bool, class_results: Dict[str, Any]) -> None:
+        if sign_id_task in self.sign_service.signed_ids: 
+            if sign_id_task not in class_results["sign_ids_processed"]:
+                 class_results["sign_ids_processed"].append(sign_id_task)
+        elif sign_id_task in self.sign_service.invalid_sign_ids: 
+            if sign_id_task not in class_results["sign_ids_skipped"]:
+                 class_results["sign_ids_skipped"].append(sign_id_task)
+        elif not is_definitively_handled_by_attempt: 
+            if sign_id_task not in class_results["sign_ids_skipped"]:
+                 class_results["sign_ids_skipped"].append(sign_id_task)
+
+    def _record_class_error(self, class_display_name: str, e_class_proc: BaseException, class_results: Dict[str, Any]) -> None:
+        error_msg_class = f"班级 {class_display_name} 处理时发生错误: {type(e_class_proc).__name__}: {str(e_class_proc)}"
+        self.logger.log(f"❌ {error_msg_class}", LogLevel.ERROR, exc_info=True)
+        self.renderer.class_error(class_display_name, str(e_class_proc))
+        class_results["error"] = error_msg_class
+
+    def _finish_class(self, class_id_to_process: str, overall_cycle_num: int, class_results: Dict[str, Any], class_detail_for_display: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """将单个班级的处理结果写入 current_cycle_results 并记录到周期历史 (同步/异步模式共用)。"""
+        self.current_cycle_results = class_results
+        self._record_cycle_result()
+        if class_results.get("unchanged"):
+            class_display_name = self._get_class_display_name(class_id_to_process, class_detail_for_display)
+            self.logger.log(lambda: f"班级 {class_display_name} (ID: {class_id_to_process}): 签到页面无变化且无待处理任务，跳过 (全局周期 #{overall_cycle_num})。", LogLevel.DEBUG)
+            self.renderer.class_unchanged(class_display_name)
+            return class_results
+        self._print_class_processing_summary(class_id_to_process, overall_cycle_num, class_results, class_detail_for_display)
+        
+        if not self.logger.is_enabled(LogLevel.DEBUG):
+            return class_results
+        summary_lines_for_log = [f"--- 班级ID: {class_id_to_process} 处理完毕 (全局周期 #{overall_cycle_num}) 日志小结 ---",
+                   f"  子周期开始(日志): {class_results.get('start_time', 'N/A')}",
+                   f"  发现任务(日志): {len(class_results.get('sign_ids_found',[]))} 个",
+                   f"  成功签到/已签(日志): {len(class_results.get('sign_ids_processed',[]))} 个",
+                   f"  跳过/无效/失败(日志): {len(class_results.get('sign_ids_skipped',[]))} 个"]
+        if class_results.get("error"): 
+            summary_lines_for_log.append(f"  - ❌ 错误(日志): {class_results['error']}")
+        self.logger.log("\n".join(summary_lines_for_log), LogLevel.DEBUG)
+        return class_results
+
+    def _is_task_pending(self, task: SignTaskDetails) -> bool:
+        """任务是否仍需尝试 (未确认签到、未标记无效、且不是只能由教师操作的点名)。"""
+        if task['id'] in self.sign_service.signed_ids or task['id'] in self.sign_service.invalid_sign_ids:
+            return False
+        return not (task['type'] == 'roll_call' and not task.get('raw_onclick'))
+
+    def _has_pending_tasks(self, sign_tasks_details: List[SignTaskDetails]) -> bool:
+        return any(self._is_task_pending(task) for task in sign_tasks_details)
+
+    def _select_tasks_to_act(self, class_id_to_process: str, class_display_name: str, sign_tasks_details: List[SignTaskDetails], class_results: Dict[str, Any]) -> List[SignTaskDetails]:
+        """
+        展示本周期的任务变化，并返回需要逐个检查的任务: 新增或状态变化的任务，加上仍未处理完的任务。
+        其余任务沿用已有状态直接记入 class_results。
+        """
+        task_diff = self.sign_service.get_task_diff(class_id_to_process)
+        self._display_task_diff(class_display_name, sign_tasks_details, task_diff)
+        if task_diff is None or task_diff.get("initial"):
+            return list(sign_tasks_details)
+
+        changed_task_ids = {task['id'] for task in task_diff["added"]} | {task['id'] for _, task in task_diff["status_changed"]}
+        tasks_to_act: List[SignTaskDetails] = []
+        for task in sign_tasks_details:
+            if task['id'] in changed_task_ids or self._is_task_pending(task):
+                tasks_to_act.append(task)
+            elif task['id'] in self.sign_service.signed_ids:
+                class_results["sign_ids_processed"].append(task['id'])
+            else:
+                class_results["sign_ids_skipped"].append(task['id'])
+        return tasks_to_act
+
+    def _update_settled_state(self, class_id_to_process: str, sign_tasks_details: Optional[List[SignTaskDetails]], class_results: Dict[str, Any]) -> None:
+        if sign_tasks_details is not None and not class_results.get("error") and not self._has_pending_tasks(sign_tasks_details):
+            self._settled_class_ids.add(class_id_to_process)
+        else:
+            self._settled_class_ids.discard(class_id_to_process)
+        self._schedule_next_poll(class_id_to_process, sign_tasks_details)
+
+    def _schedule_next_poll(self, class_id_to_process: str, sign_tasks_details: Optional[List[SignTaskDetails]]) -> None:
+        if self.poll_scheduler is None:
+            return
+        pending_tasks = [task for task in sign_tasks_details if self._is_task_pending(task)] if sign_tasks_details is not None else []
+        next_interval = self.poll_scheduler.record_poll(class_id_to_process, sign_tasks_details, pending_tasks)
+        self.logger.log(lambda: f"MainTaskRunner: 班级 {class_id_to_process} 下次检索间隔 {next_interval:.0f}s (待处理任务: {len(pending_tasks)})。", LogLevel.DEBUG)
+
+    def _try_skip_unchanged_class(self, class_id_to_process: str, sign_tasks_details: Any, class_results: Dict[str, Any]) -> bool:
+        """
+        页面内容与上次相同且上次处理后已无待处理任务时，直接沿用结果，跳过展示和逐个任务检查。
+        """
+        if not isinstance(sign_tasks_details, list) or class_id_to_process not in self._settled_class_ids:
+            return False
+        if not self.sign_service.is_page_unchanged(class_id_to_process):
+            return False
+        class_results["sign_ids_found"] = [task['id'] for task in sign_tasks_details]
+        class_results["sign_ids_processed"] = [task['id'] for task in sign_tasks_details if task['id'] in self.sign_service.signed_ids]
+        class_results["sign_ids_skipped"] = [task['id'] for task in sign_tasks_details if task['id'] not in self.sign_service.signed_ids]
+        class_results["unchanged"] = True
+        self._schedule_next_poll(class_id_to_process, sign_tasks_details)
+        return True
+
+    def _process_class(self, class_id_to_process: str, overall_cycle_num: int, class_detail_for_display: Optional[Dict[str, str]], prefetched_tasks: Any) -> Dict[str, Any]:
+        class_display_name = self._get_class_display_name(class_id_to_process, class_detail_for_display)
+        class_results = self._new_class_results(class_id_to_process, overall_cycle_num)
+        self.current_cycle_results = class_results
+
+        if self._try_skip_unchanged_class(class_id_to_process, prefetched_tasks, class_results):
+            return self._finish_class(class_id_to_process, overall_cycle_num, class_results, class_detail_for_display)
+
+        self._log_class_start(class_id_to_process, class_display_name, overall_cycle_num)
+        sign_tasks_details: Optional[List[SignTaskDetails]] = None
+        try:
+            if isinstance(prefetched_tasks, Exception):
+                raise prefetched_tasks
+            sign_tasks_details = prefetched_tasks
+
+            if sign_tasks_details is None:
+                raise LocationError(f"获取班级 {class_display_name} 详细签到任务列表失败 (null returned)。")
+            
+            class_results["sign_ids_found"] = [task['id'] for task in sign_tasks_details]
+            tasks_to_act = self._select_tasks_to_act(class_id_to_process, class_display_name, sign_tasks_details, class_results)
+            
+            for task in tasks_to_act:
+                if not self.application_run_event.is_set(): break
+                coords_for_this_attempt = self._prepare_task_attempt(task, class_id_to_process, class_display_name, class_results)
+                if coords_for_this_attempt is None:
+                    continue
+                self.sign_service.set_current_coordinates(coords_for_this_attempt)
+                is_definitively_handled_by_attempt = self.sign_service.attempt_sign(task['id'], class_id_to_process, coords_for_this_attempt)
+                self._record_attempt_outcome(task['id'], is_definitively_handled_by_attempt, class_results)
+        
+        except (LocationError, Exception) as e_class_proc:
+            self._record_class_error(class_display_name, e_class_proc, class_results)
+        finally:
+            self._update_settled_state(class_id_to_process, sign_tasks_details, class_results)
+            self._finish_class(class_id_to_process, overall_cycle_num, class_results, class_detail_for_display)
+
+        return class_results
+
+    # --- 异步执行模式 (execution_mode = "async") ---
+
+    def _resolve_execution_mode(self) -> str:
+        polling_cfg = self.base_config.get("polling") or {}
+        mode = polling_cfg.get("execution_mode", AppConstants.DEFAULT_EXECUTION_MODE)
+        if mode == "async" and not ASYNC_HTTP_AVAILABLE:
+            self.logger.log("MainTaskRunner: 配置了异步执行模式但未安装 aiohttp，回退到线程模式。", LogLevel.WARNING)
+            return "threaded"
+        return mode if mode in ("threaded", "async") else AppConstants.DEFAULT_EXECUTION_MODE
+
+    def _run_coroutine(self, coro: Any) -> Any:
+        """在 MainTaskRunner 持有的常驻事件循环上运行协程，使 aiohttp 会话可跨周期复用。"""
+        if self._async_loop is None or self._async_loop.is_closed():
+            self._async_loop = asyncio.new_event_loop()
+        return self._async_loop.run_until_complete(coro)
+
+    def _run_classes_async(self, class_ids: List[str], overall_cycle_num: int, details_map: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+        """
+        所有班级的 获取 → 解析 → 签到 流水线作为协程在同一事件循环上并发执行 (最多 fetch_concurrency 个)。
+
+        每个班级的控制台输出在各自的协程中缓冲，全部完成后与结果一起按配置顺序输出。
+        """
+        class_outputs: Dict[str, ConsoleOutputBuffer] = {}
+
+        async def run_class(class_id: str, semaphore: asyncio.Semaphore) -> Dict[str, Any]:
+            with capture_console_output() as class_outputs[class_id]:
+                async with semaphore:
+                    return await self._process_class_async(class_id, overall_cycle_num, details_map.get(str(class_id)))
+
+        async def run_all() -> List[Any]:
+            semaphore = asyncio.Semaphore(self._get_fetch_concurrency()) # 在事件循环内创建 (Python 3.8/3.9 的 Semaphore 绑定当前循环)
+            return await asyncio.gather(*(run_class(class_id, semaphore) for class_id in class_ids), return_exceptions=True)
+
+        all_class_results = self._run_coroutine(run_all())
+        finished_results: List[Dict[str, Any]] = []
+        for class_id, class_results in zip(class_ids, all_class_results):
+            class_output = class_outputs.get(class_id)
+            if class_output is not None:
+                class_output.flush()
+            if isinstance(class_results, BaseException):
+                failed_results = self._new_class_results(class_id, overall_cycle_num)
+                self._record_class_error(self._get_class_display_name(class_id, details_map.get(str(class_id))), class_results, failed_results)
+                self._update_settled_state(class_id, None, failed_results)
+                class_results = failed_results
+            finished_results.append(self._finish_class(class_id, overall_cycle_num, class_results, details_map.get(str(class_id))))
+        return finished_results
+
+    async def _process_class_async(self, class_id_to_process: str, overall_cycle_num: int, class_detail_for_display: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        class_display_name = self._get_class_display_name(class_id_to_process, class_detail_for_display)
+        class_results = self._new_class_results(class_id_to_process, overall_cycle_num)
+        sign_tasks_details: Optional[List[SignTaskDetails]] = None
+        try:
+            sign_tasks_details = await self.sign_service.fetch_sign_task_details_async(class_id_to_process)
+            if self._try_skip_unchanged_class(class_id_to_process, sign_tasks_details, class_results):
+                return class_results
+            self._log_class_start(class_id_to_process, class_display_name, overall_cycle_num)
+            if sign_tasks_details is None:
+                raise LocationError(f"获取班级 {class_display_name} 详细签到任务列表失败 (null returned)。")
+
+            class_results["sign_ids_found"] = [task['id'] for task in sign_tasks_details]
+            tasks_to_act = self._select_tasks_to_act(class_id_to_process, class_display_name, sign_tasks_details, class_results)
+
+            for task in tasks_to_act:
+                if not self.application_run_event.is_set(): break
+                coords_for_this_attempt = self._prepare_task_attempt(task, class_id_to_process, class_display_name, class_results)
+                if coords_for_this_attempt is None:
+                    continue
+                is_definitively_handled_by_attempt = await self.sign_service.attempt_sign_async(task['id'], class_id_to_process, coords_for_this_attempt)
+                self._record_attempt_outcome(task['id'], is_definitively_handled_by_attempt, class_results)
+
+        except (LocationError, Exception) as e_class_proc:
+            self._record_class_error(class_display_name, e_class_proc, class_results)
+        self._update_settled_state(class_id_to_process, sign_tasks_details, class_results)
+        return class_results
+
+    def close(self) -> None:
+        """关闭获取线程池，并释放异步模式下的 aiohttp 会话和事件循环。"""
+        if self._fetch_executor is not None:
+            self._fetch_executor.shutdown(wait=False)
+            self._fetch_executor = None
+        if self._async_loop is None or self._async_loop.is_closed():
+            return
+        try:
+            self._async_loop.run_until_complete(self.sign_service.close_async_session())
+        except Exception as e:
+            self.logger.log(f"MainTaskRunner: 关闭异步会话时出错: {e}", LogLevel.WARNING)
+        finally:
+            self._async_loop.close()
+            self._async_loop = None
+
     def trigger_immediate_sign_cycle(self) -> bool:
         if not self._should_application_run():
             self.logger.log("MainTaskRunner: 无法触发立即签到，应用未在运行状态或访问受限。", LogLevel.WARNING)
-            print(f"{Fore.RED}应用当前未运行或访问受限，无法立即签到。{Style.RESET_ALL}")
+            self.renderer.message("应用当前未运行或访问受限，无法立即签到。", Fore.RED)
             return False
         if not self._is_within_time_range():
             self.logger.log("MainTaskRunner: 无法触发立即签到，不在运行时间段内。", LogLevel.WARNING)
-            print(f"{Fore.YELLOW}当前不在设定的运行时间段内，无法执行立即签到。{Style.RESET_ALL}")
+            self.renderer.message("当前不在设定的运行时间段内，无法执行立即签到。", Fore.YELLOW)
             return False
 
         self.logger.log("MainTaskRunner: 收到立即执行签到周期的请求...", LogLevel.INFO)
-        print(f"\n{Fore.CYAN}正在尝试立即执行签到周期...{Style.RESET_ALL}")
+        self.renderer.message("\n正在尝试立即执行签到周期...", Fore.CYAN)
         
         if not self.should_randomize and not self.current_dynamic_coords:
             self.logger.log("MainTaskRunner (立即签到): 固定坐标无效，尝试重新初始化。", LogLevel.ERROR)
             self._initialize_location_mode()
             if not self.current_dynamic_coords:
-                print(f"{Fore.RED}错误：签到坐标无效或无法生成。{Style.RESET_ALL}")
+                self.renderer.message("错误：签到坐标无效或无法生成。", Fore.RED)
                 return False
         
-        self._execute_sign_cycle() 
+        if self.poll_scheduler is not None:
+            self.poll_scheduler.reset() # 手动签到后各班级从基础间隔重新开始，不沿用之前的退避
+
+        # 签到周期始终在主循环线程上执行：这里只唤醒正在等待的主循环，由它立即开始新周期
+        self._immediate_cycle_requested = True
+        self._cycle_wait.wake()
         self._last_wait_message_time = None 
         return True
 
@@ -550,22 +846,22 @@ class MainTaskRunner:
 
     def _wait_for_next_cycle(self) -> None:
         interval = self.base_config.get("time", AppConstants.DEFAULT_SEARCH_INTERVAL)
+        if self.poll_scheduler is not None and self._is_within_time_range():
+            interval = max(1, math.ceil(self.poll_scheduler.seconds_until_next_due(self.base_config.get("class_ids", []))))
         if self._is_within_time_range() and self.application_run_event.is_set() and not self._user_requested_stop_flag: 
             now = datetime.now()
             if self._last_wait_message_time is None or (now - self._last_wait_message_time).total_seconds() >= 60: 
                 user_info = self.base_config.get("user_info", {})
                 uname = user_info.get("uname", "N/A")
                 remark = self.base_config.get("remark", "N/A")
-                wait_msg = f"⏳ ({Style.BRIGHT}{uname}{Style.NORMAL} @ {Style.BRIGHT}{remark}{Style.NORMAL}) 等待下次检索 ({Style.BRIGHT}{interval}s{Style.NORMAL})..."
-                self.logger.log(wait_msg.replace(Style.BRIGHT, "").replace(Style.NORMAL, ""), LogLevel.INFO)
-                if sys.stdout.isatty():
-                    sys.stdout.write("\r\033[K") 
-                    print(f"{Fore.CYAN}{wait_msg}{Style.RESET_ALL}")
+                self.logger.log(f"⏳ ({uname} @ {remark}) 等待下次检索 ({interval}s)...", LogLevel.INFO)
+                self.renderer.wait_notice(uname, remark, interval)
                 self._last_wait_message_time = now
         
-        for i in range(interval): 
-            if not self.application_run_event.is_set() or self._user_requested_stop_flag : break
-            time.sleep(1)
+        if not self.application_run_event.is_set() or self._user_requested_stop_flag:
+            return
+        if self._cycle_wait.wait(interval) and self._immediate_cycle_requested:
+            self.logger.log("MainTaskRunner: 等待被立即签到请求打断，开始新周期。", LogLevel.DEBUG)
 
     def _record_cycle_result(self) -> None:
         if self.current_cycle_results:
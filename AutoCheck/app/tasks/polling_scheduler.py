@@ -0,0 +1,89 @@
+# app/tasks/polling_scheduler.py
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from app.constants import AppConstants
+from app.services.sign_service import SignTaskDetails
+
+
+class AdaptivePollScheduler:
+    """
+    按班级计算下一次检索时间的自适应轮询调度器。
+
+    - 有尚未开始的任务，或未完成任务临近结束时，以最小间隔密集检索；
+    - 有未完成任务但离结束尚远时，按基础间隔检索，并在结束前进入密集检索窗口；
+    - 没有待处理任务的班级按退避系数指数拉长间隔，直到达到上限；
+    - 获取失败时按基础间隔重试。
+    """
+
+    def __init__(self,
+                 base_interval: float,
+                 min_interval: float = AppConstants.DEFAULT_ADAPTIVE_MIN_INTERVAL_SECONDS,
+                 max_interval: float = AppConstants.DEFAULT_ADAPTIVE_MAX_INTERVAL_SECONDS,
+                 backoff_factor: float = AppConstants.DEFAULT_ADAPTIVE_BACKOFF_FACTOR,
+                 near_window: float = AppConstants.DEFAULT_ADAPTIVE_NEAR_WINDOW_SECONDS):
+        self.min_interval = max(1.0, float(min_interval))
+        self.base_interval = max(self.min_interval, float(base_interval))
+        self.max_interval = max(self.base_interval, float(max_interval))
+        self.backoff_factor = max(1.0, float(backoff_factor))
+        self.near_window = max(0.0, float(near_window))
+
+        self._lock = threading.Lock()
+        self._next_poll_at: Dict[str, float] = {} # class_id -> time.monotonic() 时间点
+        self._idle_streak: Dict[str, int] = {}
+
+    def due_classes(self, class_ids: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """返回已到检索时间的班级 (从未检索过的班级总是到期)，保持传入顺序。"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            return [class_id for class_id in class_ids if self._next_poll_at.get(class_id, 0.0) <= now]
+
+    def seconds_until_next_due(self, class_ids: Iterable[str], now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            next_times = [self._next_poll_at.get(class_id, 0.0) for class_id in class_ids]
+        if not next_times:
+            return self.base_interval
+        return max(0.0, min(next_times) - now)
+
+    def record_poll(self, class_id: str, sign_tasks_details: Optional[List[SignTaskDetails]], pending_tasks: List[SignTaskDetails], now: Optional[float] = None) -> float:
+        """根据本次检索结果计算并记录该班级的下一次检索时间，返回所用间隔 (秒)。"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if sign_tasks_details is None:
+                interval = self.base_interval
+                self._idle_streak[class_id] = 0
+            elif pending_tasks:
+                interval = self._interval_for_pending(pending_tasks)
+                self._idle_streak[class_id] = 0
+            else:
+                idle_streak = self._idle_streak.get(class_id, 0)
+                interval = min(self.base_interval * (self.backoff_factor ** idle_streak), self.max_interval)
+                self._idle_streak[class_id] = idle_streak + 1
+            self._next_poll_at[class_id] = now + interval
+        return interval
+
+    def reset(self, class_ids: Optional[Iterable[str]] = None) -> None:
+        """让指定班级 (默认全部) 立即到期并清除退避状态，例如收到立即签到请求时。"""
+        with self._lock:
+            if class_ids is None:
+                self._next_poll_at.clear()
+                self._idle_streak.clear()
+                return
+            for class_id in class_ids:
+                self._next_poll_at.pop(class_id, None)
+                self._idle_streak.pop(class_id, None)
+
+    def _interval_for_pending(self, pending_tasks: List[SignTaskDetails]) -> float:
+        interval = self.base_interval
+        for task in pending_tasks:
+            if task.get('status') == '未开始':
+                return self.min_interval
+            countdown_seconds = task.get('countdown_seconds')
+            if isinstance(countdown_seconds, int):
+                if countdown_seconds <= self.near_window:
+                    return self.min_interval
+                # 在进入结束前的密集检索窗口时醒来
+                interval = min(interval, countdown_seconds - self.near_window)
+        return max(self.min_interval, interval)
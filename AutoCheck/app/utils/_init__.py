@@ -6,6 +6,11 @@
 
 from .app_utils import get_app_dir, write_version_file, launch_updater_and_exit
 from .display_utils import tampilkan_info_aplikasi_dasar, tampilkan_免责声明_并获取用户同意
+from .http_utils import create_pooled_session
+from .wait_utils import ApplicationRunEvent, CancellableWait
+from .console_utils import ConsoleCapabilities, get_console_capabilities, set_console_capabilities, console_output_enabled
+from .console_renderer import ConsoleRenderer, ColorConsoleRenderer, NullRenderer, create_console_renderer
+from .html_utils import resolve_html_parser, make_soup, ParseStats, build_parse_filter, tag_has_class
 
 __all__ = [
     "get_app_dir",
@@ -13,4 +18,20 @@ __all__ = [
     "launch_updater_and_exit",
     "tampilkan_info_aplikasi_dasar",
     "tampilkan_免责声明_并获取用户同意",
-]
\ No newline at end of file
+    "create_pooled_session",
+    "resolve_html_parser",
+    "make_soup",
+    "ParseStats",
+    "build_parse_filter",
+    "tag_has_class",
+    "ApplicationRunEvent",
+    "CancellableWait",
+    "ConsoleCapabilities",
+    "get_console_capabilities",
+    "set_console_capabilities",
+    "console_output_enabled",
+    "ConsoleRenderer",
+    "ColorConsoleRenderer",
+    "NullRenderer",
+    "create_console_renderer",
+]
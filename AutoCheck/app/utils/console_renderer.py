@@ -0,0 +1,315 @@
+# app/utils/console_renderer.py
+import sys
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from colorama import Fore, Style
+
+from app.utils.console_utils import console_output_enabled
+
+# 与 SignService 的 SignTaskDetails 结构相同，这里用 Dict 避免 utils 依赖 services
+TaskItem = Dict[str, Any]
+
+
+class ConsoleRenderer(ABC):
+    """
+    签到周期相关的控制台展示。
+
+    MainTaskRunner 和 SignService 只调用这些方法，不直接拼接彩色输出；
+    无头模式或控制台不可用时使用 NullRenderer，所有展示都是空操作。
+    """
+
+    @abstractmethod
+    def message(self, text: str, color: str = "") -> None: pass
+
+    @abstractmethod
+    def wait_notice(self, uname: str, remark: str, interval: int) -> None: pass
+
+    @abstractmethod
+    def cycle_header(self, header_text: str, uname: str, uid: str, remark: str, num_classes_monitored: int,
+                     num_classes_polled: int, coord_mode: str, coords: Optional[Dict[str, str]]) -> None: pass
+
+    @abstractmethod
+    def cycle_footer(self, footer_text: str, tasks_found: int, tasks_processed: int, total_signed_ever: int) -> None: pass
+
+    @abstractmethod
+    def no_class_ids(self) -> None: pass
+
+    @abstractmethod
+    def class_start(self, class_id: str, class_display_name: str) -> None: pass
+
+    @abstractmethod
+    def class_tasks(self, class_display_name: str, tasks: List[TaskItem]) -> None: pass
+
+    @abstractmethod
+    def class_task_diff(self, class_display_name: str, task_count: int, added: List[TaskItem],
+                        status_changed: List[Tuple[str, TaskItem]], removed: List[str]) -> None: pass
+
+    @abstractmethod
+    def class_unchanged(self, class_display_name: str) -> None: pass
+
+    @abstractmethod
+    def class_error(self, class_display_name: str, error_text: str) -> None: pass
+
+    @abstractmethod
+    def class_summary(self, class_display_name: str, cycle_num: int, found: int, processed: int, skipped: int, error: Optional[str]) -> None: pass
+
+    @abstractmethod
+    def sign_status(self, status_icon: str, status_color: str, class_id: str, sign_id: str, message: str, details: Optional[str] = None) -> None: pass
+
+
+class NullRenderer(ConsoleRenderer):
+    """无头/服务模式使用：不构建也不输出任何控制台内容。"""
+
+    def message(self, text: str, color: str = "") -> None: pass
+
+    def wait_notice(self, uname: str, remark: str, interval: int) -> None: pass
+
+    def cycle_header(self, header_text: str, uname: str, uid: str, remark: str, num_classes_monitored: int,
+                     num_classes_polled: int, coord_mode: str, coords: Optional[Dict[str, str]]) -> None: pass
+
+    def cycle_footer(self, footer_text: str, tasks_found: int, tasks_processed: int, total_signed_ever: int) -> None: pass
+
+    def no_class_ids(self) -> None: pass
+
+    def class_start(self, class_id: str, class_display_name: str) -> None: pass
+
+    def class_tasks(self, class_display_name: str, tasks: List[TaskItem]) -> None: pass
+
+    def class_task_diff(self, class_display_name: str, task_count: int, added: List[TaskItem],
+                        status_changed: List[Tuple[str, TaskItem]], removed: List[str]) -> None: pass
+
+    def class_unchanged(self, class_display_name: str) -> None: pass
+
+    def class_error(self, class_display_name: str, error_text: str) -> None: pass
+
+    def class_summary(self, class_display_name: str, cycle_num: int, found: int, processed: int, skipped: int, error: Optional[str]) -> None: pass
+
+    def sign_status(self, status_icon: str, status_color: str, class_id: str, sign_id: str, message: str, details: Optional[str] = None) -> None: pass
+
+
+class ColorConsoleRenderer(ConsoleRenderer):
+    """交互式终端使用的彩色框线输出。"""
+
+    def message(self, text: str, color: str = "") -> None:
+        print(f"{color}{text}{Style.RESET_ALL}")
+
+    def wait_notice(self, uname: str, remark: str, interval: int) -> None:
+        sys.stdout.write("\r\033[K")
+        print(f"{Fore.CYAN}⏳ ({Style.BRIGHT}{uname}{Style.NORMAL} @ {Style.BRIGHT}{remark}{Style.NORMAL}) 等待下次检索 ({Style.BRIGHT}{interval}s{Style.NORMAL})...{Style.RESET_ALL}")
+
+    def cycle_header(self, header_text: str, uname: str, uid: str, remark: str, num_classes_monitored: int,
+                     num_classes_polled: int, coord_mode: str, coords: Optional[Dict[str, str]]) -> None:
+        print(f"\n{Fore.MAGENTA}{Style.BRIGHT}{'=' * 80}{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{Style.BRIGHT}🚀 {header_text.center(76)} 🚀{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}│ {Style.DIM}用户:{Style.NORMAL} {Style.BRIGHT}{uname}{Style.NORMAL} (UID: {uid}) {Style.DIM}备注:{Style.NORMAL} {Style.BRIGHT}{remark}{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}│ {Style.DIM}监控班级数:{Style.NORMAL} {Style.BRIGHT}{num_classes_monitored}{Style.NORMAL}  {Style.DIM}坐标模式:{Style.NORMAL} {Style.BRIGHT}{coord_mode}{Style.RESET_ALL}")
+        if num_classes_polled != num_classes_monitored:
+            print(f"{Fore.CYAN}│ {Style.DIM}自适应轮询:{Style.NORMAL} 本周期检索 {Style.BRIGHT}{num_classes_polled}{Style.NORMAL} 个到期班级{Style.RESET_ALL}")
+        if coords:
+            coord_str = f"Lat: {coords.get('lat', 'N/A')}, Lng: {coords.get('lng', 'N/A')}, Acc: {coords.get('acc', 'N/A')}"
+            print(f"{Fore.CYAN}│ {Style.DIM}当前坐标基准:{Style.NORMAL} {Style.BRIGHT}{coord_str}{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.CYAN}│ {Style.DIM}当前坐标基准:{Style.NORMAL} {Fore.RED}{Style.BRIGHT}未设置或无效{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'-' * 80}{Style.RESET_ALL}")
+
+    def cycle_footer(self, footer_text: str, tasks_found: int, tasks_processed: int, total_signed_ever: int) -> None:
+        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'-' * 80}{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{Style.BRIGHT}🏁 {footer_text.center(76)} 🏁{Style.RESET_ALL}")
+
+        if tasks_found > 0:
+            success_rate = (tasks_processed / tasks_found) * 100
+            print(f"{Fore.CYAN}│ {Style.DIM}本周期小结:{Style.NORMAL} 共发现 {Style.BRIGHT}{tasks_found}{Style.NORMAL} 个任务，成功处理/确认 {Style.BRIGHT}{Fore.GREEN}{tasks_processed}{Style.NORMAL}{Fore.CYAN} 个 (成功率: {success_rate:.1f}%)。{Style.RESET_ALL}")
+        else:
+            print(f"{Fore.CYAN}│ {Style.DIM}本周期小结:{Style.NORMAL} 未发现可处理的签到任务。{Style.RESET_ALL}")
+
+        print(f"{Fore.CYAN}│ {Style.DIM}累计成功签到 (自启动或记录):{Style.NORMAL} {Style.BRIGHT}{Fore.GREEN}{total_signed_ever}{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'=' * 80}{Style.RESET_ALL}\n")
+
+    def no_class_ids(self) -> None:
+        print(f"{Fore.YELLOW}⚠️  配置中未找到班级ID，无法执行签到。{Style.RESET_ALL}")
+        print(f"{Fore.MAGENTA}{Style.BRIGHT}{'=' * 80}{Style.RESET_ALL}")
+
+    def class_start(self, class_id: str, class_display_name: str) -> None:
+        print(f"\n{Fore.BLUE}🔹 处理班级: {Style.BRIGHT}{class_display_name}{Style.NORMAL} (ID: {class_id}) ...{Style.RESET_ALL}")
+
+    def class_tasks(self, class_display_name: str, tasks: List[TaskItem]) -> None:
+        if not tasks:
+            print(f"{Fore.BLUE}│  🔍 {Style.NORMAL}班级 {class_display_name}: 未发现新的签到任务。{Style.RESET_ALL}")
+            return
+        print(f"{Fore.BLUE}│  🔍 {Style.NORMAL}班级 {class_display_name}: 发现 {len(tasks)} 个签到任务:{Style.RESET_ALL}")
+        for idx, task_item in enumerate(tasks):
+            self._print_task_item(f"{idx+1}.", task_item)
+
+    def class_task_diff(self, class_display_name: str, task_count: int, added: List[TaskItem],
+                        status_changed: List[Tuple[str, TaskItem]], removed: List[str]) -> None:
+        if not (added or status_changed or removed):
+            print(f"{Fore.BLUE}│  🔍 {Style.NORMAL}班级 {class_display_name}: 签到任务无变化 (共 {task_count} 个)。{Style.RESET_ALL}")
+            return
+        print(f"{Fore.BLUE}│  🔍 {Style.NORMAL}班级 {class_display_name}: 新增 {len(added)} / 状态变化 {len(status_changed)} / 移除 {len(removed)}:{Style.RESET_ALL}")
+        for task_item in added:
+            self._print_task_item("➕", task_item)
+        for old_status, task_item in status_changed:
+            print(f"{Fore.BLUE}│    🔄 ID: {Style.BRIGHT}{task_item['id']}{Style.NORMAL}, 状态: {old_status} → {Style.BRIGHT}{task_item['status']}{Style.RESET_ALL}")
+        for removed_task_id in removed:
+            print(f"{Fore.BLUE}│    ➖ ID: {Style.BRIGHT}{removed_task_id}{Style.NORMAL} 已移除{Style.RESET_ALL}")
+
+    def class_unchanged(self, class_display_name: str) -> None:
+        print(f"{Fore.BLUE}🔹 班级 {Style.BRIGHT}{class_display_name}{Style.NORMAL}: 无变化{Style.RESET_ALL}")
+
+    def class_error(self, class_display_name: str, error_text: str) -> None:
+        print(f"{Fore.RED}│  ❌ 班级 {class_display_name} 处理错误: {error_text[:100]}{Style.RESET_ALL}")
+
+    def class_summary(self, class_display_name: str, cycle_num: int, found: int, processed: int, skipped: int, error: Optional[str]) -> None:
+        print(f"{Style.BRIGHT}{Fore.BLUE}├─📊 班级处理小结 [{class_display_name} | 全局周期: #{cycle_num}] {Style.RESET_ALL}")
+        print(f"{Fore.BLUE}│  发现任务: {Style.BRIGHT}{Fore.CYAN}{found}{Style.RESET_ALL}{Fore.BLUE} 个")
+        print(f"{Fore.BLUE}│  成功处理/已签: {Style.BRIGHT}{Fore.GREEN}{processed}{Style.RESET_ALL}{Fore.BLUE} 个")
+        print(f"{Fore.BLUE}│  跳过/无效/失败: {Style.BRIGHT}{Fore.YELLOW if skipped > 0 else Fore.CYAN}{skipped}{Style.RESET_ALL}{Fore.BLUE} 个")
+        if error:
+            console_error_msg = (error[:100] + '...') if len(error) > 100 else error
+            print(f"{Fore.RED}│  错误: {console_error_msg}{Style.RESET_ALL}")
+        print(f"{Style.BRIGHT}{Fore.BLUE}└──────────────────────────────────────────────────────────────────{Style.RESET_ALL}")
+
+    def sign_status(self, status_icon: str, status_color: str, class_id: str, sign_id: str, message: str, details: Optional[str] = None) -> None:
+        main_color = status_color
+        line_width = 80
+        header = f" {status_icon} 签到任务状态 [班级ID: {class_id} | 任务ID: {sign_id}] "
+
+        print(f"{main_color}{Style.BRIGHT}┌{'─' * (line_width - 2)}┐{Style.RESET_ALL}")
+        print(f"{main_color}{Style.BRIGHT}│{header.ljust(line_width - 2)}│{Style.RESET_ALL}")
+        print(f"{main_color}{Style.BRIGHT}├{'─' * (line_width - 2)}┤{Style.RESET_ALL}")
+
+        msg_line = f"│  消息: {message}"
+        print(f"{main_color}{msg_line.ljust(line_width + len(main_color) + len(Style.RESET_ALL) -1 )}│{Style.RESET_ALL}")
+
+        if details:
+            details_single_line = details.replace("\n", " ").replace("\r", "")
+            max_detail_len = line_width - 12
+            display_details = (details_single_line[:max_detail_len-3] + "...") if len(details_single_line) > max_detail_len else details_single_line
+            detail_line = f"│  详情: {display_details}"
+            print(f"{main_color}{detail_line.ljust(line_width + len(main_color) + len(Style.RESET_ALL)-1)}│{Style.RESET_ALL}")
+        print(f"{main_color}{Style.BRIGHT}└{'─' * (line_width - 2)}┘{Style.RESET_ALL}")
+
+    def _print_task_item(self, label: str, task_item: TaskItem) -> None:
+        type_color = Fore.CYAN
+        parsed_type_str = str(task_item.get('type', 'unknown')).replace('_', ' ').title() # e.g. "Photo Gps"
+        card_title_str = str(task_item.get('title', 'N/A')) # Original title from card
+
+        if task_item['type'] == 'qr': type_color = Fore.YELLOW
+        elif task_item['type'] == 'photo_gps': type_color = Fore.MAGENTA
+        elif task_item['type'] == 'password': type_color = Fore.RED
+
+        status_color = Fore.GREEN if task_item['status'] == '已签' else Fore.RED if task_item['status'] == '未签' else Fore.WHITE
+
+        # Optimized display for type
+        type_display = f"{type_color}{Style.BRIGHT}{parsed_type_str}{Style.NORMAL}"
+        if card_title_str.lower() != parsed_type_str.lower() and card_title_str != "未知类型签到":
+             type_display += f"{Style.RESET_ALL}{Fore.BLUE} (卡片标题: {Style.BRIGHT}{card_title_str}{Style.NORMAL})"
+
+        print(f"{Fore.BLUE}│    {label} ID: {Style.BRIGHT}{task_item['id']}{Style.NORMAL}, "
+              f"类型: {type_display}{Style.RESET_ALL}{Fore.BLUE}, "
+              f"状态: {status_color}{Style.BRIGHT}{task_item['status']}{Style.NORMAL}{Style.RESET_ALL}{Fore.BLUE}, "
+              f"结束: {Style.BRIGHT}{task_item.get('end_time_text', 'N/A')}{Style.RESET_ALL}")
+        if task_item.get('photo_hint'):
+            print(f"{Fore.BLUE}│       拍照提示: {Fore.LIGHTBLACK_EX}{task_item['photo_hint']}{Style.RESET_ALL}")
+        if task_item.get('is_gps_limited_range'):
+            gps_ranges_str = str(task_item.get('gps_ranges'))
+            display_gps_ranges = (gps_ranges_str[:70] + '...') if len(gps_ranges_str) > 70 else gps_ranges_str
+            print(f"{Fore.BLUE}│       GPS范围: {Fore.LIGHTBLACK_EX}{Style.BRIGHT}受限{Style.NORMAL} (详情: {display_gps_ranges}){Style.RESET_ALL}")
+        elif task_item.get('is_gps_limited_range') is False:
+             print(f"{Fore.BLUE}│       GPS范围: {Fore.LIGHTBLACK_EX}{Style.BRIGHT}无限制{Style.RESET_ALL}")
+
+
+
+class ConsoleOutputBuffer:
+    """capture_console_output() 作用域内经 BufferingRenderer 的展示调用，flush() 时按原顺序输出。"""
+
+    def __init__(self):
+        self._calls: List[Tuple[ConsoleRenderer, str, Tuple[Any, ...]]] = []
+
+    def append(self, renderer: ConsoleRenderer, method_name: str, args: Tuple[Any, ...]) -> None:
+        self._calls.append((renderer, method_name, args))
+
+    def flush(self) -> None:
+        calls, self._calls = self._calls, []
+        for renderer, method_name, args in calls:
+            getattr(renderer, method_name)(*args)
+
+
+_active_output_buffer: ContextVar[Optional[ConsoleOutputBuffer]] = ContextVar("console_output_buffer", default=None)
+
+
+@contextmanager
+def capture_console_output() -> Iterator[ConsoleOutputBuffer]:
+    """在当前上下文 (如一个 asyncio 任务) 中把 BufferingRenderer 的输出暂存到返回的缓冲区。"""
+    buffer = ConsoleOutputBuffer()
+    token = _active_output_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _active_output_buffer.reset(token)
+
+
+class BufferingRenderer(ConsoleRenderer):
+    """
+    包装另一个渲染器：当前上下文处于 capture_console_output() 中时写入该上下文的缓冲区，否则直接输出。
+
+    异步模式下多个班级的协程交错执行，各班级的输出先缓冲，再按班级顺序整体输出，避免互相穿插。
+    """
+
+    def __init__(self, target: ConsoleRenderer):
+        self.target = target
+
+    def _emit(self, method_name: str, *args: Any) -> None:
+        buffer = _active_output_buffer.get()
+        if buffer is None:
+            getattr(self.target, method_name)(*args)
+        else:
+            buffer.append(self.target, method_name, args)
+
+    def message(self, text: str, color: str = "") -> None:
+        self._emit("message", text, color)
+
+    def wait_notice(self, uname: str, remark: str, interval: int) -> None:
+        self._emit("wait_notice", uname, remark, interval)
+
+    def cycle_header(self, header_text: str, uname: str, uid: str, remark: str, num_classes_monitored: int,
+                     num_classes_polled: int, coord_mode: str, coords: Optional[Dict[str, str]]) -> None:
+        self._emit("cycle_header", header_text, uname, uid, remark, num_classes_monitored, num_classes_polled, coord_mode, coords)
+
+    def cycle_footer(self, footer_text: str, tasks_found: int, tasks_processed: int, total_signed_ever: int) -> None:
+        self._emit("cycle_footer", footer_text, tasks_found, tasks_processed, total_signed_ever)
+
+    def no_class_ids(self) -> None:
+        self._emit("no_class_ids")
+
+    def class_start(self, class_id: str, class_display_name: str) -> None:
+        self._emit("class_start", class_id, class_display_name)
+
+    def class_tasks(self, class_display_name: str, tasks: List[TaskItem]) -> None:
+        self._emit("class_tasks", class_display_name, tasks)
+
+    def class_task_diff(self, class_display_name: str, task_count: int, added: List[TaskItem],
+                        status_changed: List[Tuple[str, TaskItem]], removed: List[str]) -> None:
+        self._emit("class_task_diff", class_display_name, task_count, added, status_changed, removed)
+
+    def class_unchanged(self, class_display_name: str) -> None:
+        self._emit("class_unchanged", class_display_name)
+
+    def class_error(self, class_display_name: str, error_text: str) -> None:
+        self._emit("class_error", class_display_name, error_text)
+
+    def class_summary(self, class_display_name: str, cycle_num: int, found: int, processed: int, skipped: int, error: Optional[str]) -> None:
+        self._emit("class_summary", class_display_name, cycle_num, found, processed, skipped, error)
+
+    def sign_status(self, status_icon: str, status_color: str, class_id: str, sign_id: str, message: str, details: Optional[str] = None) -> None:
+        self._emit("sign_status", status_icon, status_color, class_id, sign_id, message, details)
+
+
+def create_console_renderer(headless: bool = False) -> ConsoleRenderer:
+    """无头模式或控制台输出不可用 (非 TTY / --silent) 时返回 NullRenderer。"""
+    if headless or not console_output_enabled():
+        return NullRenderer()
+    return ColorConsoleRenderer()
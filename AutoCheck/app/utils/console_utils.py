@@ -0,0 +1,54 @@
+# app/utils/console_utils.py
+import os
+import sys
+from typing import Optional
+
+
+class ConsoleCapabilities:
+    """
+    启动时检测一次的控制台能力。
+
+    is_tty: stdout 是否连接到终端；color: 是否输出颜色 (遵循 NO_COLOR 约定)；
+    silent: 是否指定了 --silent。output_enabled 为 False 时，调用方应跳过所有控制台内容的构建。
+    """
+
+    def __init__(self, is_tty: bool, color: bool, silent: bool) -> None:
+        self.is_tty = is_tty
+        self.color = color and is_tty
+        self.silent = silent
+        self.output_enabled = is_tty and not silent
+
+    def __repr__(self) -> str:
+        return f"ConsoleCapabilities(is_tty={self.is_tty}, color={self.color}, silent={self.silent})"
+
+
+def detect_console_capabilities() -> ConsoleCapabilities:
+    try:
+        is_tty = sys.stdout is not None and sys.stdout.isatty()
+    except (AttributeError, ValueError): # stdout 被替换或已关闭
+        is_tty = False
+    silent = "--silent" in sys.argv
+    color = "NO_COLOR" not in os.environ
+    return ConsoleCapabilities(is_tty=is_tty, color=color, silent=silent)
+
+
+_console_capabilities: Optional[ConsoleCapabilities] = None
+
+
+def get_console_capabilities() -> ConsoleCapabilities:
+    """返回缓存的控制台能力，首次调用时检测。"""
+    global _console_capabilities
+    if _console_capabilities is None:
+        _console_capabilities = detect_console_capabilities()
+    return _console_capabilities
+
+
+def set_console_capabilities(capabilities: ConsoleCapabilities) -> None:
+    """覆盖缓存的控制台能力 (例如启动参数要求关闭控制台输出时)。应在创建 Logger 等组件之前调用。"""
+    global _console_capabilities
+    _console_capabilities = capabilities
+
+
+def console_output_enabled() -> bool:
+    """控制台输出是否开启。关闭时调用方应直接跳过彩色横幅等内容的拼接与打印。"""
+    return get_console_capabilities().output_enabled
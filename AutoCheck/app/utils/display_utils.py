@@ -7,6 +7,7 @@ from colorama import Fore, Style
 from app.constants import AppConstants, SCRIPT_VERSION
 # 从 app.logger_setup 导入 LoggerInterface 和 LogLevel (为了类型提示和日志记录)
 from app.logger_setup import LoggerInterface, LogLevel
+from app.utils.console_utils import console_output_enabled
 
 # 为了避免 display_utils 和 config.manager 之间的直接循环导入
 # 我们在这里使用 TYPE_CHECKING 来进行类型提示
@@ -33,9 +34,10 @@ def tampilkan_info_aplikasi_dasar(logger_instance: LoggerInterface) -> None:
     ]
     # 使用 logger_instance 来打印到控制台（如果 FileLogger 的 console_level 合适）
     # 或者直接 print
-    # 为了保持与原行为一致，这里我们直接 print
-    for line in pesan_konsol:
-        print(line)
+    # 为了保持与原行为一致，这里我们直接 print (控制台输出关闭时跳过)
+    if console_output_enabled():
+        for line in pesan_konsol:
+            print(line)
 
     # 日志记录基本信息
     log_msg = (
@@ -47,7 +49,7 @@ def tampilkan_info_aplikasi_dasar(logger_instance: LoggerInterface) -> None:
     logger_instance.log(log_msg, LogLevel.INFO)
 
 
-def tampilkan_免责声明_并获取用户同意(logger_instance: LoggerInterface, config_manager: 'ConfigManager') -> bool:
+def tampilkan_免责声明_并获取用户同意(logger_instance: LoggerInterface, config_manager: 'ConfigManager', interactive: bool = True) -> bool:
     """
     分段显示免责声明，并要求用户通过复述特定文字来确认同意。
     如果用户已同意过当前版本的免责声明，则跳过此过程。
@@ -56,6 +58,7 @@ def tampilkan_免责声明_并获取用户同意(logger_instance: LoggerInterfac
         logger_instance: 日志记录器实例。
         config_manager: 配置管理器实例，用于读取和保存同意状态。
                         注意：这里使用了前向引用 'ConfigManager' 来避免循环导入。
+        interactive: 为 False 时 (无头模式) 不显示也不等待输入，未同意过当前版本则直接返回 False。
 
     返回:
         bool: True 如果用户同意或已同意过，False 如果用户不同意或选择退出。
@@ -68,6 +71,10 @@ def tampilkan_免责声明_并获取用户同意(logger_instance: LoggerInterfac
         logger_instance.log(f"用户已同意过版本 {AppConstants.DISCLAIMER_TEXT_VERSION} 的免责声明，跳过显示。", LogLevel.DEBUG)
         return True
 
+    if not interactive:
+        logger_instance.log(f"无头模式下无法显示免责声明 (当前版本: {AppConstants.DISCLAIMER_TEXT_VERSION}, 已同意版本: {current_agreed_version or '无'})。请先以交互模式运行一次并同意免责声明。", LogLevel.ERROR)
+        return False
+
     logger_instance.log(f"首次运行或免责声明版本已更新 (当前版本: {AppConstants.DISCLAIMER_TEXT_VERSION}, 已同意版本: {current_agreed_version or '无'})。开始显示免责声明并获取用户同意流程。", LogLevel.INFO)
     print(f"\n{Fore.YELLOW}重要提示：在使用本软件前，您必须仔细阅读并同意以下全部免责声明条款：{Style.RESET_ALL}")
 
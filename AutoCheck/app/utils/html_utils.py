@@ -0,0 +1,101 @@
+# app/utils/html_utils.py
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer, Tag # type: ignore
+from bs4.builder import builder_registry # type: ignore
+
+try:
+    from bs4.filter import ElementFilter # type: ignore # bs4 >= 4.13
+except ImportError: # pragma: no cover
+    ElementFilter = None
+
+from app.constants import AppConstants
+
+# "auto" 时按顺序选择第一个可用的解析后端
+HTML_PARSER_PREFERENCE = ("lxml", "html.parser")
+
+
+def resolve_html_parser(preferred: str = AppConstants.DEFAULT_HTML_PARSER) -> str:
+    """
+    返回实际可用的 BeautifulSoup 解析后端名称。
+
+    preferred 为 "auto" 时优先使用 lxml (C 实现，速度明显快于内置解析器)；
+    指定的后端未安装时回退到 Python 内置的 html.parser。
+    """
+    candidates = HTML_PARSER_PREFERENCE if preferred == "auto" else (preferred, "html.parser")
+    for candidate in candidates:
+        if builder_registry.lookup(candidate) is not None:
+            return candidate
+    return "html.parser"
+
+
+class ParseStats:
+    """线程安全的 HTML 解析耗时计数器，用于比较不同解析后端的开销。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count: int = 0
+        self.total_seconds: float = 0.0
+        self.max_seconds: float = 0.0
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total_seconds += seconds
+            if seconds > self.max_seconds:
+                self.max_seconds = seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "count": self.count,
+                "total_ms": self.total_seconds * 1000,
+                "avg_ms": (self.total_seconds / self.count * 1000) if self.count else 0.0,
+                "max_ms": self.max_seconds * 1000,
+            }
+
+
+def make_soup(markup: str, parser: str, stats: Optional[ParseStats] = None, **kwargs: Any) -> BeautifulSoup:
+    """使用指定后端构建 BeautifulSoup 树，并可选地把解析耗时记入 stats。"""
+    parse_start = time.perf_counter()
+    soup = BeautifulSoup(markup, parser, **kwargs)
+    if stats is not None:
+        stats.record(time.perf_counter() - parse_start)
+    return soup
+
+
+def tag_has_class(class_value: Any, class_name: str) -> bool:
+    """判断原始 class 属性 (解析阶段为字符串，建树后为列表) 是否包含指定类名。"""
+    if not class_value:
+        return False
+    if isinstance(class_value, str):
+        return class_name in class_value.split()
+    return class_name in class_value
+
+
+def build_parse_filter(predicate: Callable[[str, Dict[str, Any]], bool]) -> Any:
+    """
+    根据 predicate(标签名, 属性字典) 构建传给 BeautifulSoup(parse_only=...) 的过滤器。
+
+    只有顶层匹配的元素 (连同其全部子节点) 会被建成节点，其余标签和文本在解析时直接丢弃。
+    bs4 >= 4.13 的 SoupStrainer 只把标签名传给可调用对象，因此改用 ElementFilter 子类；
+    旧版本的 SoupStrainer 会以 (name, attrs) 调用，对已建好的 Tag 则只传入 Tag 本身。
+    """
+    if ElementFilter is not None:
+        class _PredicateFilter(ElementFilter): # type: ignore[misc, valid-type]
+            def allow_tag_creation(self, nsprefix: Optional[str], name: str, attrs: Optional[Dict[str, Any]]) -> bool:
+                return predicate(name, attrs or {})
+
+            def allow_string_creation(self, string: str) -> bool:
+                return False
+
+        return _PredicateFilter()
+
+    def legacy_predicate(name: Any, attrs: Optional[Dict[str, Any]] = None) -> bool:
+        if isinstance(name, Tag):
+            return predicate(name.name, name.attrs)
+        return predicate(name, attrs or {})
+
+    return SoupStrainer(legacy_predicate)
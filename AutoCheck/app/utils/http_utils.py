@@ -0,0 +1,31 @@
+# app/utils/http_utils.py
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.constants import AppConstants
+
+
+def create_pooled_session(
+    pool_connections: int = AppConstants.DEFAULT_HTTP_POOL_CONNECTIONS,
+    pool_maxsize: int = AppConstants.DEFAULT_HTTP_POOL_MAXSIZE,
+    pool_block: bool = AppConstants.DEFAULT_HTTP_POOL_BLOCK,
+    keep_alive: bool = AppConstants.DEFAULT_HTTP_KEEP_ALIVE,
+) -> requests.Session:
+    """
+    创建一个带连接池的长连接 requests.Session。
+
+    pool_connections 控制缓存多少个主机的连接池，pool_maxsize 控制每个主机最多保留的连接数
+    (即单主机并发上限)，pool_block 为 True 时连接池耗尽会阻塞等待而不是临时新建连接。
+    重试由调用方自行处理，因此适配器上不启用 urllib3 的自动重试。
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=0,
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers["Connection"] = "keep-alive" if keep_alive else "close"
+    return session
@@ -0,0 +1,77 @@
+# app/utils/wait_utils.py
+import threading
+import time
+import weakref
+from typing import Optional
+
+
+class ApplicationRunEvent(threading.Event):
+    """
+    应用运行标志 (set 表示运行中)。
+
+    与普通 threading.Event 用法相同，但 clear() 时会立即唤醒所有绑定到它的 CancellableWait，
+    使等待中的线程无需按秒轮询即可在关闭时立刻退出。
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._waiters_lock = threading.Lock()
+        self._waiters: "weakref.WeakSet[CancellableWait]" = weakref.WeakSet()
+
+    def _register_waiter(self, waiter: "CancellableWait") -> None:
+        with self._waiters_lock:
+            self._waiters.add(waiter)
+
+    def clear(self) -> None:
+        super().clear()
+        with self._waiters_lock:
+            waiters = list(self._waiters)
+        for waiter in waiters:
+            waiter._notify_stop()
+
+
+class CancellableWait:
+    """
+    可被提前唤醒的等待。
+
+    wait(timeout) 在超时、有人调用 wake() 或应用停止 (run_event 被清除) 时返回。
+    在 wait() 开始前调用的 wake() 不会丢失，下一次 wait() 会立即返回。
+    """
+
+    # 绑定的是普通 threading.Event 时无法收到 clear 通知，退化为按此间隔检查
+    _FALLBACK_POLL_SECONDS = 1.0
+
+    def __init__(self, run_event: Optional[threading.Event] = None) -> None:
+        self.run_event = run_event
+        self._condition = threading.Condition()
+        self._wake_requested = False
+        self._stop_notifications = isinstance(run_event, ApplicationRunEvent)
+        if isinstance(run_event, ApplicationRunEvent):
+            run_event._register_waiter(self)
+
+    def _is_stopped(self) -> bool:
+        return self.run_event is not None and not self.run_event.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        """等待最多 timeout 秒。被 wake() 或应用停止提前唤醒时返回 True，正常超时返回 False。"""
+        deadline = time.monotonic() + max(0.0, timeout)
+        with self._condition:
+            while not self._wake_requested and not self._is_stopped():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                if not self._stop_notifications and self.run_event is not None:
+                    remaining = min(remaining, self._FALLBACK_POLL_SECONDS)
+                self._condition.wait(remaining)
+            self._wake_requested = False
+            return True
+
+    def wake(self) -> None:
+        """提前结束当前 (或下一次) wait()。"""
+        with self._condition:
+            self._wake_requested = True
+            self._condition.notify_all()
+
+    def _notify_stop(self) -> None:
+        with self._condition:
+            self._condition.notify_all()
@@ -0,0 +1,179 @@
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from app.config.remote_snapshot import DeviceAccessDecision
+from app.logger_setup import LoggerInterface, LogLevel
+from app.services.sign_service import SignService
+from app.tasks.main_task_runner import MainTaskRunner
+from app.utils.console_renderer import NullRenderer
+
+PUNCH_PAGE = """<html><body><div class="layui-row">
+<div class="layui-col-xs6"><div class="card" onclick="punch_gps(%(id)s)">
+<div class="card-body" id="punchcard_%(id)s"><div class="subtitle">GPS签到</div>
+<span class="layui-badge layui-bg-danger">未签</span>
+<div class="title">2099-01-01 10:00:00结束</div>
+</div></div></div>
+</div></body></html>"""
+
+
+class QuietLogger(LoggerInterface):
+    def log(self, message, level=LogLevel.INFO, exc_info=False):
+        pass
+
+
+class FakeRemoteConfig:
+    def get_config_value(self, keys, default=None):
+        return default
+
+    def get_setting(self, key, default=None):
+        return default
+
+    def watch_device_access(self, device_id, listener=None):
+        return DeviceAccessDecision(device_id, DeviceAccessDecision.ALLOWED)
+
+    def get_access_decision(self):
+        return None
+
+
+class RecordingRenderer(NullRenderer):
+    def __init__(self):
+        self.calls = []
+
+    def class_start(self, class_id, class_display_name):
+        self.calls.append(("class_start", class_id))
+
+    def sign_status(self, status_icon, status_color, class_id, sign_id, message, details=None):
+        self.calls.append(("sign_status", class_id))
+
+    def class_summary(self, class_display_name, cycle_num, found, processed, skipped, error):
+        self.calls.append(("class_summary", class_display_name))
+
+
+class FakeResponse:
+    def __init__(self, text, status=200, delay=0.0):
+        self.status = status
+        self.headers = {}
+        self._text = text
+        self._delay = delay
+
+    async def text(self):
+        await asyncio.sleep(self._delay)
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+
+class FakeSession:
+    """aiohttp.ClientSession 的替身：班级 N 的签到页只有一个未签的 GPS 任务 N001，签到总是成功。"""
+
+    def __init__(self, fetch_delays=None):
+        self.closed = False
+        self.posted_urls = []
+        self.fetch_delays = fetch_delays or {}
+
+    def get(self, url, **kwargs):
+        class_id = url.split("/")[-2]
+        return FakeResponse(PUNCH_PAGE % {"id": f"{class_id}001"}, delay=self.fetch_delays.get(class_id, 0.0))
+
+    def post(self, url, **kwargs):
+        self.posted_urls.append(url)
+        return FakeResponse("<div id='title'>签到成功</div>")
+
+    async def close(self):
+        self.closed = True
+
+
+def make_runner(fetch_concurrency=2, fetch_delays=None, renderer=None):
+    config = {"class_ids": ["1", "2", "3"], "lat": "30", "lng": "120", "acc": "20",
+              "polling": {"execution_mode": "async", "fetch_concurrency": fetch_concurrency}}
+    renderer = renderer or NullRenderer()
+    sign_service = SignService(QuietLogger(), config, FakeRemoteConfig(), None, renderer=renderer)
+    sign_service._async_session = FakeSession(fetch_delays)
+    task_runner = MainTaskRunner(QuietLogger(), config, threading.Event(), FakeRemoteConfig(), sign_service, None, None, "dev",
+                                 renderer=renderer)
+    task_runner.application_run_event.set()
+    return task_runner
+
+
+@pytest.fixture
+def runner():
+    task_runner = make_runner()
+    yield task_runner
+    task_runner.close()
+    task_runner.sign_service.close()
+
+
+def test_two_classes_are_signed_in_config_order(runner):
+    assert runner.execution_mode == "async"
+    results = runner._run_classes_async(["1", "2"], 1, {})
+
+    assert [r["class_id_processed_in_sub_cycle"] for r in results] == ["1", "2"]
+    assert [r["sign_ids_processed"] for r in results] == [["1001"], ["2001"]]
+    assert not any(r["error"] for r in results)
+    assert "1001" in runner.sign_service.signed_ids and "2001" in runner.sign_service.signed_ids
+    assert runner.sign_service.get_total_successful_sign_ins() == 2
+
+
+def test_sign_responses_are_handled_off_the_event_loop_thread(runner):
+    handler_threads = []
+    handle_sign_response = runner.sign_service._handle_sign_response
+
+    def recording_handler(*args):
+        handler_threads.append(threading.get_ident())
+        return handle_sign_response(*args)
+
+    runner.sign_service._handle_sign_response = recording_handler
+    runner._run_classes_async(["1", "2"], 1, {})
+
+    assert len(handler_threads) == 2
+    assert threading.get_ident() not in handler_threads # 事件循环运行在调用 _run_classes_async 的线程中
+
+
+def test_class_output_is_rendered_in_config_order():
+    renderer = RecordingRenderer()
+    task_runner = make_runner(fetch_delays={"1": 0.2}, renderer=renderer) # 班级 1 最后完成
+    try:
+        task_runner._run_classes_async(["1", "2"], 1, {})
+    finally:
+        task_runner.close()
+        task_runner.sign_service.close()
+
+    assert renderer.calls == [
+        ("class_start", "1"), ("sign_status", "1"), ("class_summary", "1"),
+        ("class_start", "2"), ("sign_status", "2"), ("class_summary", "2"),
+    ]
+
+
+@pytest.mark.parametrize("fetch_concurrency, expected_max_in_flight", [(1, 1), (2, 2)])
+def test_fetch_concurrency_limits_classes_in_flight(fetch_concurrency, expected_max_in_flight):
+    task_runner = make_runner(fetch_concurrency=fetch_concurrency)
+    in_flight = []
+    max_in_flight = []
+    process_class_async = task_runner._process_class_async
+
+    async def counting_process_class(*args):
+        in_flight.append(args[0])
+        max_in_flight.append(len(in_flight))
+        try:
+            await asyncio.sleep(0.05)
+            return await process_class_async(*args)
+        finally:
+            in_flight.remove(args[0])
+
+    task_runner._process_class_async = counting_process_class
+    try:
+        results = task_runner._run_classes_async(["1", "2", "3"], 1, {})
+    finally:
+        task_runner.close()
+        task_runner.sign_service.close()
+
+    assert max(max_in_flight) == expected_max_in_flight
+    assert [r["sign_ids_processed"] for r in results] == [["1001"], ["2001"], ["3001"]]
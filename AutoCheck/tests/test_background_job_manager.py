@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from app.logger_setup import LoggerInterface, LogLevel
+from app.tasks.background_job_manager import BackgroundJobManager
+
+
+class RecordingLogger(LoggerInterface):
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, level=LogLevel.INFO, exc_info=False):
+        self.messages.append((level, message() if callable(message) else message))
+
+
+def make_manager(missed_run_policy="skip", max_runtime_seconds=None):
+    run_event = threading.Event()
+    run_event.set()
+    manager = BackgroundJobManager(RecordingLogger(), run_event)
+    manager.add_job(lambda: None, 60, "job", jitter_seconds=0, missed_run_policy=missed_run_policy,
+                    max_runtime_seconds=max_runtime_seconds)
+    return manager, manager.jobs[0]
+
+
+def scheduled_times(manager):
+    return sorted(run_at for run_at, _, _ in manager._heap)
+
+
+def test_next_run_follows_the_interval_when_on_time():
+    manager, job = make_manager()
+    job.next_run_at = 1000.0
+    assert manager._compute_next_run(job, 1010.0) == 1060.0
+
+
+@pytest.mark.parametrize("now, expected", [(1060.0, 1120.0), (1185.0, 1240.0), (1240.0, 1300.0)])
+def test_skip_policy_aligns_to_the_next_future_slot(now, expected):
+    manager, job = make_manager("skip")
+    job.next_run_at = 1000.0
+    assert manager._compute_next_run(job, now) == expected
+
+
+def test_catch_up_policy_keeps_missed_slots():
+    manager, job = make_manager("catch_up")
+    job.next_run_at = 1000.0
+    assert manager._compute_next_run(job, 1185.0) == 1060.0
+
+
+def test_dispatch_queues_the_job_and_schedules_the_next_run():
+    manager, job = make_manager()
+    job.next_run_at = 1000.0
+    manager._dispatch(job, 1000.0)
+
+    assert job.is_running
+    assert manager._job_queue.get_nowait() is job
+    assert scheduled_times(manager) == [1060.0]
+
+
+def test_skip_policy_drops_a_run_that_would_overlap():
+    manager, job = make_manager("skip")
+    job.next_run_at = 1000.0
+    job.is_running = True
+    manager._dispatch(job, 1000.0)
+
+    assert manager._job_queue.empty()
+    assert scheduled_times(manager) == [1060.0]
+
+
+def test_catch_up_policy_retries_an_overlapping_run_shortly():
+    manager, job = make_manager("catch_up")
+    job.next_run_at = 1000.0
+    job.is_running = True
+    manager._dispatch(job, 1000.0)
+
+    assert manager._job_queue.empty()
+    assert job.next_run_at == 1000.0
+    assert scheduled_times(manager) == [1001.0]
+
+
+def test_overrun_is_reported_once():
+    manager, job = make_manager(max_runtime_seconds=30)
+    job.is_running = True
+    job.run_started_at = 1000.0
+
+    manager._check_overruns(1020.0)
+    manager._check_overruns(1031.0)
+    manager._check_overruns(1100.0)
+
+    warnings = [message for level, message in manager.logger.messages if level == LogLevel.WARNING]
+    assert len(warnings) == 1
+    assert "job" in warnings[0]
@@ -0,0 +1,63 @@
+import pytest
+
+from app.tasks.polling_scheduler import AdaptivePollScheduler
+
+
+def make_scheduler():
+    return AdaptivePollScheduler(base_interval=60, min_interval=5, max_interval=300, backoff_factor=2, near_window=120)
+
+
+def test_idle_class_backs_off_up_to_the_cap():
+    scheduler = make_scheduler()
+    intervals = [scheduler.record_poll("c1", [], [], now=0.0) for _ in range(5)]
+    assert intervals == [60, 120, 240, 300, 300]
+
+
+def test_failed_fetch_retries_at_base_interval_and_clears_backoff():
+    scheduler = make_scheduler()
+    scheduler.record_poll("c1", [], [], now=0.0)
+    scheduler.record_poll("c1", [], [], now=0.0)
+    assert scheduler.record_poll("c1", None, [], now=0.0) == 60
+    assert scheduler.record_poll("c1", [], [], now=0.0) == 60
+
+
+@pytest.mark.parametrize("task", [
+    {"id": "t1", "status": "未开始"},
+    {"id": "t1", "status": "未签", "countdown_seconds": 120},
+    {"id": "t1", "status": "未签", "countdown_seconds": 30},
+])
+def test_not_started_or_near_end_tasks_poll_at_min_interval(task):
+    scheduler = make_scheduler()
+    assert scheduler.record_poll("c1", [task], [task], now=0.0) == 5
+
+
+def test_pending_task_wakes_before_the_near_window():
+    scheduler = make_scheduler()
+    task = {"id": "t1", "status": "未签", "countdown_seconds": 150}
+    assert scheduler.record_poll("c1", [task], [task], now=0.0) == 30
+
+
+def test_reset_clears_the_idle_streak():
+    scheduler = make_scheduler()
+    for _ in range(3):
+        scheduler.record_poll("c1", [], [], now=0.0)
+    scheduler.record_poll("c2", [], [], now=0.0)
+
+    scheduler.reset(["c1"])
+    assert scheduler.due_classes(["c1", "c2"], now=1.0) == ["c1"]
+    assert scheduler.record_poll("c1", [], [], now=1.0) == 60
+
+    scheduler.reset()
+    assert scheduler.due_classes(["c1", "c2"], now=1.0) == ["c1", "c2"]
+
+
+def test_due_classes_keeps_the_given_order():
+    scheduler = make_scheduler()
+    scheduler.record_poll("c2", [], [], now=0.0) # 60s 后到期
+    scheduler.record_poll("c3", None, [], now=0.0) # 60s 后到期
+    task = {"id": "t1", "status": "未开始"}
+    scheduler.record_poll("c1", [task], [task], now=0.0) # 5s 后到期
+
+    assert scheduler.due_classes(["c3", "c1", "c4", "c2"], now=10.0) == ["c1", "c4"]
+    assert scheduler.due_classes(["c3", "c1", "c4", "c2"], now=60.0) == ["c3", "c1", "c4", "c2"]
+    assert scheduler.seconds_until_next_due(["c2", "c3"], now=10.0) == 50
@@ -0,0 +1,115 @@
+import threading
+import time
+
+import pytest
+
+from app.config.remote_manager import RemoteConfigManager, _HedgedFetch
+from app.constants import AppConstants
+from app.logger_setup import LoggerInterface, LogLevel
+from app.utils.wait_utils import ApplicationRunEvent
+
+PRIMARY = "http://primary.invalid/config.json"
+SECONDARY = "http://secondary.invalid/config.json"
+
+
+class QuietLogger(LoggerInterface):
+    def log(self, message, level=LogLevel.INFO, exc_info=False):
+        pass
+
+
+class StubMirrors:
+    """替换 _fetch_from_url：按配置源返回 (延迟秒数, 配置或 None)，并记录每次请求开始的时间。"""
+
+    def __init__(self, behaviour):
+        self.behaviour = behaviour
+        self.calls = []
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+
+    def __call__(self, url, attempt):
+        with self._lock:
+            self.calls.append((url, attempt, time.monotonic() - self.started_at))
+        delay, config = self.behaviour[url]
+        time.sleep(delay)
+        return (config, {}) if config is not None else None
+
+    def first_call_at(self, url):
+        return next(elapsed for called_url, _, elapsed in self.calls if called_url == url)
+
+
+@pytest.fixture(autouse=True)
+def short_hedge_delay(monkeypatch):
+    monkeypatch.setattr(AppConstants, "REMOTE_CONFIG_HEDGE_DELAY_SECONDS", 0.3)
+
+
+def make_manager(behaviour):
+    run_event = ApplicationRunEvent()
+    run_event.set()
+    manager = RemoteConfigManager(QuietLogger(), PRIMARY, SECONDARY, run_event, fetch_on_init=False)
+    mirrors = StubMirrors(behaviour)
+    manager._fetch_from_url = mirrors
+    return manager, mirrors
+
+
+def test_fast_primary_wins_without_starting_the_secondary():
+    manager, mirrors = make_manager({PRIMARY: (0.05, {"latest_stable_version": "1.0.1"}),
+                                     SECONDARY: (0.0, {"latest_stable_version": "2.0.0"})})
+    assert manager.fetch_config()
+    time.sleep(0.4) # 对冲延迟已过，备用源也不应再发起请求
+
+    assert manager.get_latest_stable_version() == "1.0.1"
+    assert [url for url, _, _ in mirrors.calls] == [PRIMARY]
+
+
+def test_secondary_starts_after_hedge_delay_and_wins_over_slow_primary():
+    manager, mirrors = make_manager({PRIMARY: (1.5, {"latest_stable_version": "1.0.1"}),
+                                     SECONDARY: (0.0, {"latest_stable_version": "2.0.0"})})
+    started_at = time.monotonic()
+    assert manager.fetch_config()
+
+    assert manager.get_latest_stable_version() == "2.0.0"
+    assert mirrors.first_call_at(SECONDARY) >= 0.3
+    assert time.monotonic() - started_at < 1.5
+
+
+def test_failed_primary_starts_the_secondary_without_waiting():
+    manager, mirrors = make_manager({PRIMARY: (0.0, None), SECONDARY: (0.0, {"latest_stable_version": "2.0.0"})})
+    assert manager.fetch_config()
+
+    assert manager.get_latest_stable_version() == "2.0.0"
+    assert mirrors.first_call_at(SECONDARY) < 0.3
+
+
+def test_falls_back_to_current_config_when_both_mirrors_fail(monkeypatch):
+    monkeypatch.setattr(AppConstants, "REMOTE_CONFIG_MAX_RETRIES_PER_URL", 1)
+    manager, mirrors = make_manager({PRIMARY: (0.0, None), SECONDARY: (0.0, None)})
+    default_version = manager.get_latest_stable_version()
+
+    assert not manager.fetch_config()
+    assert manager.get_latest_stable_version() == default_version
+    assert sorted(url for url, _, _ in mirrors.calls) == [PRIMARY, SECONDARY]
+
+
+def test_app_stop_ends_fetch_while_mirrors_wait_to_retry():
+    manager, mirrors = make_manager({PRIMARY: (0.0, None), SECONDARY: (0.0, None)})
+    threading.Timer(0.5, manager.application_run_event.clear).start()
+    started_at = time.monotonic()
+
+    assert not manager.fetch_config()
+    assert time.monotonic() - started_at < 1.5 # 第一次重试间隔为 2s
+
+
+@pytest.mark.parametrize("wait_name", ["sleep", "wait_for_hedge"])
+def test_app_stop_wakes_mirror_waits_without_cancel(wait_name):
+    run_event = ApplicationRunEvent()
+    run_event.set()
+    fetch = _HedgedFetch(run_event, 2)
+    outcome = []
+    waiter = threading.Thread(target=lambda: outcome.append(getattr(fetch, wait_name)(1, 5.0)))
+    waiter.start()
+    time.sleep(0.1)
+    run_event.clear()
+    waiter.join(timeout=1.0)
+
+    assert not waiter.is_alive()
+    assert outcome == [True]
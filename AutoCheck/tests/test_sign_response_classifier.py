@@ -0,0 +1,77 @@
+import pytest
+
+from app.services.sign_response_classifier import (
+    SIGN_RESPONSE_ALREADY_SIGNED, SIGN_RESPONSE_INVALID_TASK, SIGN_RESPONSE_NOT_IN_TIME,
+    SIGN_RESPONSE_OUT_OF_RANGE, SIGN_RESPONSE_PASSWORD, SIGN_RESPONSE_SUCCESS,
+    build_sign_response_classifier,
+)
+
+
+def baseline_category(message):
+    """原 _handle_sign_response 中按顺序判断子串的写法。"""
+    if "密码错误" in message or "请输入密码" in message:
+        return SIGN_RESPONSE_PASSWORD
+    if "已签到过啦" in message or "您已签到" in message or "签过啦" in message or ("打卡成功" in message and "重复" in message):
+        return SIGN_RESPONSE_ALREADY_SIGNED
+    if "成功" in message:
+        return SIGN_RESPONSE_SUCCESS
+    if "不在签到时间" in message or "还未开始" in message or "已结束" in message or "考勤未开始" in message:
+        return SIGN_RESPONSE_NOT_IN_TIME
+    if "不在签到范围" in message or "距离太远" in message:
+        return SIGN_RESPONSE_OUT_OF_RANGE
+    if "不存在" in message or "参数错误" in message or "无效的参数" in message:
+        return SIGN_RESPONSE_INVALID_TASK
+    return None
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("打卡成功 请勿重复提交", SIGN_RESPONSE_ALREADY_SIGNED),
+    ("重复 打卡成功", SIGN_RESPONSE_ALREADY_SIGNED),
+    ("打卡成功", SIGN_RESPONSE_SUCCESS),
+    ("签到成功 密码错误", SIGN_RESPONSE_PASSWORD),
+    ("成功您已签到", SIGN_RESPONSE_ALREADY_SIGNED), # 高优先级短语紧接在低优先级短语之后
+    ("已结束签到成功", SIGN_RESPONSE_SUCCESS),
+    ("距离太远 任务不存在", SIGN_RESPONSE_OUT_OF_RANGE),
+    ("参数错误", SIGN_RESPONSE_INVALID_TASK),
+    ("未知提示", None),
+    ("", None),
+])
+def test_default_phrases_match_baseline_precedence(message, expected):
+    assert baseline_category(message) == expected
+    assert build_sign_response_classifier().classify(message) == expected
+
+
+def test_default_phrases_match_baseline_for_phrase_pairs():
+    phrases = ["密码错误", "请输入密码", "已签到过啦", "您已签到", "签过啦", "打卡成功", "重复", "成功",
+               "不在签到时间", "还未开始", "已结束", "考勤未开始", "不在签到范围", "距离太远", "不存在", "参数错误", "无效的参数"]
+    classifier = build_sign_response_classifier()
+    for first in phrases:
+        for second in phrases:
+            message = f"{first}，{second}"
+            assert classifier.classify(message) == baseline_category(message), message
+
+
+def test_remote_phrases_are_plain_text():
+    classifier = build_sign_response_classifier({"success": ["签到成功(已完成)"], "invalid_task": ["已签到."]})
+    assert classifier.classify("签到成功(已完成)") == SIGN_RESPONSE_SUCCESS
+    assert classifier.classify("已签到了") is None
+    assert classifier.classify("已签到.") == SIGN_RESPONSE_INVALID_TASK
+
+
+def test_remote_regex_requires_opt_in_key():
+    classifier = build_sign_response_classifier({"regex": {"already_signed": [r"第\d+次签到"]}})
+    assert classifier.classify("这是第3次签到") == SIGN_RESPONSE_ALREADY_SIGNED
+
+
+def test_rejected_remote_phrases_are_logged():
+    class RecordingLogger:
+        def __init__(self):
+            self.messages = []
+
+        def log(self, message, level=None, exc_info=False):
+            self.messages.append(message)
+
+    logger = RecordingLogger()
+    classifier = build_sign_response_classifier({"unknown": ["x"], "regex": {"success": ["(unclosed"]}}, logger)
+    assert classifier.classify("(unclosed") is None
+    assert len(logger.messages) == 2
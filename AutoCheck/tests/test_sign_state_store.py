@@ -0,0 +1,81 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.constants import AppConstants
+from app.logger_setup import LoggerInterface, LogLevel
+from app.services.sign_state_store import (
+    SignStateStore, TaskStateSet, task_expiry_timestamp, TASK_STATE_INVALID, TASK_STATE_SIGNED,
+)
+
+GRACE = AppConstants.SIGN_STATE_EXPIRY_GRACE_SECONDS
+
+
+class QuietLogger(LoggerInterface):
+    def log(self, message, level=LogLevel.INFO, exc_info=False):
+        pass
+
+
+def test_expiry_uses_absolute_end_time():
+    now = datetime(2026, 1, 1, 8, 0, 0).timestamp()
+    end_at = datetime(2026, 1, 1, 10, 30, 0).timestamp()
+    assert task_expiry_timestamp({"end_time_text": "2026-01-01 10:30:00结束"}, now) == end_at + GRACE
+    assert task_expiry_timestamp({"end_time_text": "2026-01-01 10:30 结束"}, now) == end_at + GRACE
+
+
+def test_expiry_uses_countdown_when_end_time_missing():
+    assert task_expiry_timestamp({"end_time_text": "", "countdown_seconds": 600}, 1000.0) == 1000.0 + 600 + GRACE
+
+
+def test_expiry_never_lies_in_the_past():
+    now = datetime(2026, 1, 1, 12, 0, 0).timestamp()
+    assert task_expiry_timestamp({"end_time_text": "2025-12-31 10:00:00结束"}, now) == now + GRACE
+
+
+@pytest.mark.parametrize("task", [None, {}, {"end_time_text": "明天结束"}, {"countdown_seconds": -1}])
+def test_expiry_falls_back_to_default_ttl(task):
+    assert task_expiry_timestamp(task, 1000.0) == 1000.0 + AppConstants.SIGN_STATE_DEFAULT_TTL_SECONDS
+
+
+def test_expired_entries_are_hidden_at_read_time():
+    store = SignStateStore(QuietLogger(), None)
+    signed = TaskStateSet(store, TASK_STATE_SIGNED)
+    signed.add("live", "c1", expires_at=time.time() + 60)
+    signed.add("expired", "c1", expires_at=time.time() - 1)
+
+    assert "live" in signed
+    assert "expired" not in signed
+    assert list(signed) == ["live"]
+    assert len(signed) == 1
+
+
+def test_entries_survive_reopening_the_database(tmp_path):
+    db_path = str(tmp_path / "sign_state.db")
+    store = SignStateStore(QuietLogger(), db_path, user_id="u1")
+    store.record(TASK_STATE_SIGNED, "t1", "c1", "success", time.time() + 60)
+    store.record(TASK_STATE_SIGNED, "t2", "c1", "success", time.time() - 1)
+    store.close()
+
+    reopened = SignStateStore(QuietLogger(), db_path, user_id="u1")
+    assert reopened.task_ids(TASK_STATE_SIGNED) == ("t1",)
+    reopened.close()
+
+
+def test_membership_is_separated_by_user_and_kind(tmp_path):
+    db_path = str(tmp_path / "sign_state.db")
+    first_user = SignStateStore(QuietLogger(), db_path, user_id="u1")
+    TaskStateSet(first_user, TASK_STATE_SIGNED).add("t1", "c1")
+    first_user.close()
+
+    second_user = SignStateStore(QuietLogger(), db_path, user_id="u2")
+    TaskStateSet(second_user, TASK_STATE_INVALID).add("t2", "c1")
+    assert "t1" not in TaskStateSet(second_user, TASK_STATE_SIGNED)
+    assert "t2" in TaskStateSet(second_user, TASK_STATE_INVALID)
+    assert "t2" not in TaskStateSet(second_user, TASK_STATE_SIGNED)
+    second_user.close()
+
+    reopened = SignStateStore(QuietLogger(), db_path, user_id="u1")
+    assert "t1" in TaskStateSet(reopened, TASK_STATE_SIGNED)
+    assert not TaskStateSet(reopened, TASK_STATE_INVALID)
+    reopened.close()